@@ -0,0 +1,196 @@
+"""
+Measures the throughput and peak memory of the PSK and PSA readers and writers on synthetic files of several sizes.
+
+    python benchmarks/benchmark.py --sizes small medium --json results.json
+
+Each result records the time of the fastest of several repeats, the throughput in MB/s of the bytes the case actually
+reads or writes (and keys/s for animation paths) and the peak memory allocated by Python and NumPy during a separate,
+untimed run.
+"""
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from psk_psa_py.psa.reader import PsaReader
+from psk_psa_py.psa.writer import write_psa
+from psk_psa_py.psk.reader import PskReader, read_psk, read_psk_arrays
+from psk_psa_py.psk.writer import write_psk, write_psk_arrays
+from psk_psa_py.synthetic import generate_psa, generate_psk_arrays
+
+SIZES = {
+    'small': {
+        'psk': dict(point_count=1_000, wedge_count=1_500, face_count=2_000, bone_count=32, extra_uv_count=1, morph_count=1),
+        'psa': dict(bone_count=32, sequence_count=4, frame_count=30),
+    },
+    'medium': {
+        'psk': dict(point_count=20_000, wedge_count=30_000, face_count=40_000, bone_count=100, extra_uv_count=2, morph_count=4),
+        'psa': dict(bone_count=100, sequence_count=20, frame_count=60),
+    },
+    'large': {
+        'psk': dict(point_count=60_000, wedge_count=65_536, face_count=120_000, bone_count=200, extra_uv_count=2, morph_count=8),
+        'psa': dict(bone_count=200, sequence_count=100, frame_count=120),
+    },
+    'wedge32': {
+        'psk': dict(point_count=200_000, wedge_count=300_000, face_count=400_000, bone_count=200),
+        'psa': None,
+    },
+}
+
+
+def _measure(function: Callable[[], None], repeats: int) -> Dict[str, float]:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': min(times), 'peak_bytes': peak}
+
+
+def _psk_cases(path: Path) -> Dict[str, Callable[[], None]]:
+    def read_objects():
+        with open(path, 'rb') as fp:
+            read_psk(fp)
+
+    def read_arrays():
+        with open(path, 'rb') as fp:
+            read_psk_arrays(fp)
+
+    def read_lazy():
+        with PskReader(path) as reader:
+            reader.read_psk()
+
+    with open(path, 'rb') as fp:
+        psk = read_psk(fp)
+    with open(path, 'rb') as fp:
+        psk_arrays = read_psk_arrays(fp)
+
+    return {
+        'read_psk': read_objects,
+        'read_psk_arrays': read_arrays,
+        'PskReader.read_psk': read_lazy,
+        'write_psk': lambda: write_psk(psk, BytesIO(), is_extended_format=True),
+        'write_psk_arrays': lambda: write_psk_arrays(psk_arrays, BytesIO(), is_extended_format=True),
+    }
+
+
+def _psa_cases(path: Path) -> Dict[str, Callable[[], None]]:
+    def open_reader():
+        PsaReader(path).close()
+
+    def read_for_each_sequence(method: str, **kwargs) -> Callable[[], None]:
+        def run():
+            with PsaReader(path, **kwargs) as reader:
+                for sequence_name in reader.sequences.keys():
+                    getattr(reader, method)(sequence_name)
+        return run
+
+    with PsaReader(path) as reader:
+        psa = reader.psa
+        psa.keys = np.concatenate([reader.read_sequence_key_array(name).reshape(-1) for name in psa.sequences])
+
+    return {
+        'PsaReader': open_reader,
+        'read_sequence_keys': read_for_each_sequence('read_sequence_keys'),
+        'read_sequence_key_array': read_for_each_sequence('read_sequence_key_array'),
+        'read_sequence_data_matrix': read_for_each_sequence('read_sequence_data_matrix'),
+        'read_sequence_data_matrix (mmap)': read_for_each_sequence('read_sequence_data_matrix', use_mmap=True),
+        'write_psa': lambda: write_psa(psa, BytesIO()),
+    }
+
+
+def run(sizes: List[str], repeats: int, directory: Path) -> List[dict]:
+    results = []
+    for size in sizes:
+        spec = SIZES[size]
+        psk_path = directory / f'{size}.psk'
+        psk_arrays = generate_psk_arrays(**spec['psk'])
+        with open(psk_path, 'wb') as fp:
+            write_psk_arrays(psk_arrays, fp, is_extended_format=True)
+        file_size = psk_path.stat().st_size
+        for name, function in _psk_cases(psk_path).items():
+            measurement = _measure(function, repeats)
+            results.append({
+                'size': size,
+                'format': 'psk',
+                'case': name,
+                'file_bytes': file_size,
+                'processed_bytes': file_size,
+                'mb_per_second': file_size / measurement['seconds'] / 1e6,
+                **measurement,
+            })
+
+        if spec['psa'] is None:
+            continue
+        psa_path = directory / f'{size}.psa'
+        psa, keys = generate_psa(**spec['psa'])
+        with open(psa_path, 'wb') as fp:
+            write_psa(psa, fp)
+        file_size = psa_path.stat().st_size
+        with PsaReader(psa_path) as reader:
+            header_size = reader.keys_data_offset
+        for name, function in _psa_cases(psa_path).items():
+            measurement = _measure(function, repeats)
+            # Opening the reader only reads the sections before the keys.
+            size_bytes = header_size if name == 'PsaReader' else file_size
+            result = {
+                'size': size,
+                'format': 'psa',
+                'case': name,
+                'file_bytes': file_size,
+                'processed_bytes': size_bytes,
+                'mb_per_second': size_bytes / measurement['seconds'] / 1e6,
+                **measurement,
+            }
+            if name != 'PsaReader':
+                result['keys_per_second'] = len(keys) / measurement['seconds']
+            results.append(result)
+    return results
+
+
+def _print_table(results: List[dict]):
+    print(f'{"size":<8} {"case":<36} {"ms":>10} {"MB/s":>10} {"Mkeys/s":>10} {"peak MB":>10}')
+    for result in results:
+        keys_per_second = result.get('keys_per_second')
+        print(f'{result["size"]:<8} {result["format"] + " " + result["case"]:<36} '
+              f'{result["seconds"] * 1e3:>10.2f} {result["mb_per_second"]:>10.1f} '
+              f'{"" if keys_per_second is None else f"{keys_per_second / 1e6:.2f}":>10} '
+              f'{result["peak_bytes"] / 1e6:>10.1f}')
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES.keys()), default=['small', 'medium'])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--json', type=Path, help='Write the results to this file as JSON.')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = run(args.sizes, args.repeats, Path(directory))
+    _print_table(results)
+    if args.json is not None:
+        report = {
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'results': results,
+        }
+        args.json.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,5 @@
 from . import shared
 from . import psk
 from . import psa
+from . import synthetic
+from . import batch
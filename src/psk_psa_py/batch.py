@@ -0,0 +1,215 @@
+import glob
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from .psa.data import Psa, KEY_DTYPE
+from .psa.reader import PsaReader
+from .psk.arrays import PskArrays
+from .psk.reader import read_psk_arrays_from_file, _psk_arrays_from_cache_entry, _psk_arrays_to_cache_arrays
+from .shared.arrays import array_to_structures
+from .shared.data import PsxBone
+from .shared.file_cache import FileCacheEntry, structures_to_bytes
+
+# Arrays are aligned to this many bytes within the shared memory block of a file.
+_ALIGNMENT = 64
+
+
+class BatchResult(NamedTuple):
+    path: str
+    value: Any
+    """The loaded data, or None if loading failed."""
+    error: Optional[BaseException]
+    """The exception raised while loading the file, or None if it loaded successfully."""
+
+    @property
+    def is_ok(self) -> bool:
+        return self.error is None
+
+
+class _SharedArrays(NamedTuple):
+    # Describes arrays packed into a shared memory block by a worker process.
+    name: str
+    layout: List[Tuple[str, int, str, Tuple[int, ...]]]
+    """The name, offset, dtype and shape of each array."""
+    metadata: Dict[str, Any]
+
+
+def expand_paths(paths: Union[str, os.PathLike, Iterable[Union[str, os.PathLike]]]) -> List[str]:
+    """
+    @param paths: A path, a glob pattern (e.g., `'assets/**/*.psk'`) or an iterable of either.
+    @return: The matching paths, in the order given. Glob patterns are expanded recursively and sorted.
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    expanded = []
+    for path in paths:
+        path = os.fspath(path)
+        if glob.has_magic(path):
+            expanded.extend(sorted(glob.glob(path, recursive=True)))
+        else:
+            expanded.append(path)
+    return expanded
+
+
+def _to_shared_memory(arrays: Dict[str, np.ndarray], metadata: Dict[str, Any], owner_pid: int) -> _SharedArrays:
+    layout = []
+    size = 0
+    for name, array in arrays.items():
+        layout.append((name, size, array.dtype.str if array.dtype.fields is None else array.dtype.descr, array.shape))
+        size += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    try:
+        try:
+            for (_, offset, _, _), array in zip(layout, arrays.values()):
+                block.buf[offset:offset + array.nbytes] = np.ascontiguousarray(array).reshape(-1).view(np.uint8)
+        except BaseException:
+            block.unlink()
+            raise
+        if os.getpid() != owner_pid and os.name == 'posix':
+            # The block is freed by the process that receives it, so this worker process must not free it on exit.
+            # The resource tracker knows POSIX blocks by their name with a leading slash.
+            resource_tracker.unregister('/' + block.name, 'shared_memory')
+        return _SharedArrays(block.name, layout, metadata)
+    finally:
+        block.close()
+
+
+def _from_shared_memory(shared_arrays: _SharedArrays) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    # Copies the arrays out of the block (a single memcpy each) and frees it.
+    block = shared_memory.SharedMemory(name=shared_arrays.name)
+    try:
+        arrays = {}
+        for name, offset, dtype, shape in shared_arrays.layout:
+            dtype = np.dtype(dtype)
+            count = int(np.prod(shape, dtype=np.int64))
+            arrays[name] = np.frombuffer(block.buf, dtype=dtype, count=count, offset=offset).reshape(shape).copy()
+        return arrays, shared_arrays.metadata
+    finally:
+        block.close()
+        block.unlink()
+
+
+def _free_shared_memory(future: Future):
+    # Frees the block of a load whose result will never be received.
+    if future.cancelled() or future.exception() is not None:
+        return
+    try:
+        block = shared_memory.SharedMemory(name=future.result().name)
+    except FileNotFoundError:
+        return
+    block.close()
+    block.unlink()
+
+
+def _load_psk_arrays(owner_pid: int, path: str) -> _SharedArrays:
+    psk_arrays = read_psk_arrays_from_file(path)
+    metadata = {'material_references': psk_arrays.material_references}
+    return _to_shared_memory(_psk_arrays_to_cache_arrays(psk_arrays), metadata, owner_pid)
+
+
+def _build_psk_arrays(arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]) -> PskArrays:
+    psk_arrays = _psk_arrays_from_cache_entry(FileCacheEntry(arrays, metadata))
+    psk_arrays.material_references = metadata['material_references']
+    return psk_arrays
+
+
+def _load_psa(owner_pid: int, path: str, read_keys: bool) -> _SharedArrays:
+    with PsaReader(path) as reader:
+        arrays = {
+            'bones': structures_to_bytes(reader.bones),
+            'sequences': structures_to_bytes(reader.sequences.values()),
+        }
+        if read_keys:
+            arrays['keys'] = np.fromfile(path, dtype=KEY_DTYPE, count=reader.keys_data_count,
+                                         offset=reader.keys_data_offset)
+            if len(arrays['keys']) != reader.keys_data_count:
+                raise EOFError('Unexpected end of file while reading keys')
+    return _to_shared_memory(arrays, dict(), owner_pid)
+
+
+def _build_psa(arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]) -> Psa:
+    psa = Psa()
+    psa.bones = array_to_structures(PsxBone, arrays['bones'])
+    for sequence in array_to_structures(Psa.Sequence, arrays['sequences']):
+        psa.sequences[sequence.name.decode()] = sequence
+    if 'keys' in arrays:
+        psa.keys = arrays['keys']
+    return psa
+
+
+def _run_batch(paths, load: Callable[..., _SharedArrays], build: Callable[[Dict[str, np.ndarray], Dict[str, Any]], Any],
+               load_args: tuple, max_workers: Optional[int], executor: Optional[Executor]) -> List[BatchResult]:
+    paths = expand_paths(paths)
+
+    def run(executor: Executor) -> List[BatchResult]:
+        futures = [executor.submit(load, os.getpid(), path, *load_args) for path in paths]
+        results = []
+        try:
+            for path, future in zip(paths, futures):
+                try:
+                    value = build(*_from_shared_memory(future.result()))
+                except Exception as e:
+                    # This includes a worker process dying (`BrokenProcessPool`), which fails the remaining files.
+                    results.append(BatchResult(path, None, e))
+                else:
+                    results.append(BatchResult(path, value, None))
+            return results
+        finally:
+            # If the loop stopped early (e.g., on a `KeyboardInterrupt`), cancel the loads that have not started and free
+            # the blocks of the others once they finish, since nothing else will. Blocks that were already received are
+            # gone, so freeing them again does nothing.
+            for future in futures[len(results):]:
+                if not future.cancel():
+                    future.add_done_callback(_free_shared_memory)
+
+    if executor is not None:
+        return run(executor)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return run(executor)
+
+
+def load_psk_arrays_batch(paths, max_workers: Optional[int] = None,
+                          executor: Optional[Executor] = None) -> List[BatchResult]:
+    """
+    Reads many PSK files in parallel on a process pool.
+
+    Each worker parses a file with :read_psk_arrays_from_file (including its `.props.txt` sidecar) and hands the arrays
+    back through a shared memory block, so only a small description of the arrays is pickled.
+
+    @param paths: A path, a glob pattern or an iterable of either (see :expand_paths).
+    @param max_workers: The number of processes to use if no executor is given.
+    @param executor: An existing executor to submit the reads to. A `ThreadPoolExecutor` also works.
+    @return: A result for each path, in order. A file that fails to load has its exception in `BatchResult.error`,
+    and does not affect the other files.
+    """
+    return _run_batch(paths, _load_psk_arrays, _build_psk_arrays, (), max_workers, executor)
+
+
+def load_psa_batch(paths, read_keys: bool = False, max_workers: Optional[int] = None,
+                   executor: Optional[Executor] = None) -> List[BatchResult]:
+    """
+    Reads the bones and sequences of many PSA files in parallel on a process pool.
+
+    @param paths: A path, a glob pattern or an iterable of either (see :expand_paths).
+    @param read_keys: Also read all of the keys of each file into `Psa.keys`, as an array with the `KEY_DTYPE` dtype.
+    @param max_workers: The number of processes to use if no executor is given.
+    @param executor: An existing executor to submit the reads to.
+    @return: A `Psa` result for each path, in order (see :load_psk_arrays_batch).
+    """
+    return _run_batch(paths, _load_psa, _build_psa, (read_keys,), max_workers, executor)
+
+
+__all__ = [
+    'BatchResult',
+    'expand_paths',
+    'load_psk_arrays_batch',
+    'load_psa_batch'
+]
+
+
+def __dir__():
+    return __all__
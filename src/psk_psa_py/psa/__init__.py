@@ -1,12 +1,22 @@
+from . import cache
 from . import config
 from . import data
+from . import pose
 from . import reader
+from . import reduction
+from . import repack
+from . import resample
 from . import writer
 
 __all__ = [
+    'cache',
     'config',
     'data',
+    'pose',
     'reader',
+    'reduction',
+    'repack',
+    'resample',
     'writer'
 ]
 
@@ -0,0 +1,95 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class SequenceCache(object):
+    """
+    A thread-safe LRU cache of decoded sequence data, bounded by the total number of bytes held.
+
+    Entries are keyed by sequence name and output format. Values larger than the budget are never stored.
+    The `hits`, `misses` and `evictions` counters accumulate over the lifetime of the cache, see :stats.
+    """
+
+    def __init__(self, max_bytes: int):
+        if max_bytes < 0:
+            raise ValueError(f'Cache budget must not be negative (got {max_bytes})')
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, Tuple[Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int):
+        with self._lock:
+            if key in self._entries:
+                self.size_bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.size_bytes += size
+            while self.size_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size_bytes -= evicted_size
+                self.evictions += 1
+
+    def get_or_load(self, key: Hashable, load: Callable[[], Tuple[Any, int]]) -> Any:
+        """
+        Returns the cached value for `key`, calling `load` to produce it on a miss.
+
+        @param key: The cache key.
+        @param load: A function returning the value and its size in bytes.
+        @return: The value.
+        """
+        value = self.get(key)
+        if value is None:
+            # The load happens outside the lock so that concurrent misses on different sequences don't serialize.
+            value, size = load()
+            self.put(key, value, size)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        @return: A snapshot of the counters and current usage, suitable for exporting as metrics.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'size_bytes': self.size_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+__all__ = [
+    'SequenceCache'
+]
+
+
+def __dir__():
+    return __all__
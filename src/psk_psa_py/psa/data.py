@@ -2,6 +2,7 @@ from collections import OrderedDict
 from typing import List, OrderedDict as OrderedDictType
 
 from ctypes import Structure, c_char, c_int32, c_float
+import numpy as np
 from ..shared.data import PsxBone, Quaternion, Vector3
 
 
@@ -53,8 +54,17 @@ class Psa:
         self.keys: List[Psa.Key] = []
 
 
+# NumPy mirror of `Psa.Key`, used to decode the ANIMKEYS section without creating a ctypes object per key.
+KEY_DTYPE = np.dtype([
+    ('location', '<f4', (3,)),
+    ('rotation', '<f4', (4,)),
+    ('time', '<f4')
+])
+
+
 __all__ = [
-    'Psa'
+    'Psa',
+    'KEY_DTYPE'
 ]
 
 
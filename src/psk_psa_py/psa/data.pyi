@@ -1,6 +1,7 @@
 from typing import OrderedDict as OrderedDictType, Generator
 
 from ctypes import Structure
+import numpy as np
 from ..shared.data import PsxBone, Quaternion, Vector3
 
 
@@ -38,8 +39,12 @@ class Psa:
     keys: list[Psa.Key]
 
 
+KEY_DTYPE: np.dtype
+
+
 __all__ = [
-    'Psa'
+    'Psa',
+    'KEY_DTYPE'
 ]
 
 
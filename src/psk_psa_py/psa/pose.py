@@ -0,0 +1,175 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from ..shared.data import PsxBone
+
+
+def quaternion_multiply(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Multiplies two arrays of WXYZ quaternions element-wise, such that the result applies `b` first and then `a`.
+    """
+    aw, ax, ay, az = np.moveaxis(a, -1, 0)
+    bw, bx, by, bz = np.moveaxis(b, -1, 0)
+    return np.stack([
+        aw * bw - ax * bx - ay * by - az * bz,
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw
+    ], axis=-1)
+
+
+def quaternion_rotate(q: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """
+    Rotates an array of vectors by an array of unit WXYZ quaternions, element-wise.
+    """
+    w = q[..., 0:1]
+    xyz = q[..., 1:4]
+    t = 2.0 * np.cross(xyz, v)
+    return v + w * t + np.cross(xyz, t)
+
+
+def quaternion_to_matrix(q: np.ndarray) -> np.ndarray:
+    """
+    @return: The 3x3 rotation matrices of an array of unit WXYZ quaternions.
+    """
+    w, x, y, z = np.moveaxis(q, -1, 0)
+    matrix = np.empty(q.shape[:-1] + (3, 3), dtype=np.result_type(q, np.float32))
+    matrix[..., 0, 0] = 1.0 - 2.0 * (y * y + z * z)
+    matrix[..., 0, 1] = 2.0 * (x * y - z * w)
+    matrix[..., 0, 2] = 2.0 * (x * z + y * w)
+    matrix[..., 1, 0] = 2.0 * (x * y + z * w)
+    matrix[..., 1, 1] = 1.0 - 2.0 * (x * x + z * z)
+    matrix[..., 1, 2] = 2.0 * (y * z - x * w)
+    matrix[..., 2, 0] = 2.0 * (x * z - y * w)
+    matrix[..., 2, 1] = 2.0 * (y * z + x * w)
+    matrix[..., 2, 2] = 1.0 - 2.0 * (x * x + y * y)
+    return matrix
+
+
+def bones_to_data_matrix(bones: Sequence[PsxBone]) -> np.ndarray:
+    """
+    @return: A Bx7 matrix of the reference pose of the bones, laid out like a frame of a data matrix (rotation WXYZ
+    followed by location XYZ).
+    """
+    matrix = np.empty((len(bones), 7), dtype=np.float64)
+    for i, bone in enumerate(bones):
+        matrix[i, 0:4] = tuple(bone.rotation)
+        matrix[i, 4:7] = tuple(bone.location)
+    return matrix
+
+
+class PoseEvaluator(object):
+    """
+    Computes world-space bone transforms from local-space ones.
+
+    The bone hierarchy is sorted into levels by depth once, upon instantiation. Evaluating a pose then takes one batched
+    step per level, each of which transforms every bone of that level for every frame at once.
+
+    In PSK and PSA files, the rotations of all bones except the root are stored inverted. This is accounted for unless
+    `conjugate_child_rotations` is false.
+    """
+
+    def __init__(self, bones: Sequence[PsxBone], conjugate_child_rotations: bool = True):
+        self.bone_count = len(bones)
+        self.conjugate_child_rotations = conjugate_child_rotations
+        self.parent_indices: np.ndarray = np.array([bone.parent_index for bone in bones], dtype=np.intp)
+        self.depths: np.ndarray = _get_bone_depths(self.parent_indices)
+        self.levels: List[np.ndarray] = [np.flatnonzero(self.depths == depth) for depth in range(int(self.depths.max(initial=-1)) + 1)]
+        self.is_root: np.ndarray = self.depths == 0
+
+    def evaluate(self, matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Computes the world-space rotation and location of each bone.
+
+        @param matrix: An FxBx7 data matrix of local-space transforms, as returned by
+        `PsaReader.read_sequence_data_matrix`. A single Bx7 pose is also accepted.
+        @return: The world-space rotations (WXYZ) and locations, with shapes FxBx4 and FxBx3 (or Bx4 and Bx3).
+        """
+        matrix = np.asarray(matrix)
+        if matrix.shape[-2:] != (self.bone_count, 7):
+            raise ValueError(f'Data matrix must have a shape of FxBx7 with B = {self.bone_count} (got {matrix.shape})')
+        dtype = np.result_type(matrix, np.float32)
+        local_rotations = matrix[..., 0:4].astype(dtype)
+        local_rotations /= np.linalg.norm(local_rotations, axis=-1, keepdims=True)
+        if self.conjugate_child_rotations:
+            local_rotations[..., ~self.is_root, 1:4] *= -1.0
+        local_locations = matrix[..., 4:7].astype(dtype)
+
+        rotations = np.empty_like(local_rotations)
+        locations = np.empty_like(local_locations)
+        for depth, level in enumerate(self.levels):
+            if depth == 0:
+                rotations[..., level, :] = local_rotations[..., level, :]
+                locations[..., level, :] = local_locations[..., level, :]
+                continue
+            parents = self.parent_indices[level]
+            parent_rotations = rotations[..., parents, :]
+            rotations[..., level, :] = quaternion_multiply(parent_rotations, local_rotations[..., level, :])
+            locations[..., level, :] = locations[..., parents, :] + quaternion_rotate(parent_rotations, local_locations[..., level, :])
+        return rotations, locations
+
+    def evaluate_matrices(self, matrix: np.ndarray) -> np.ndarray:
+        """
+        Computes the world-space transform of each bone as a 4x4 matrix.
+
+        @param matrix: An FxBx7 data matrix of local-space transforms (see :evaluate).
+        @return: An FxBx4x4 array of matrices that transform column vectors from bone space to world space.
+        """
+        rotations, locations = self.evaluate(matrix)
+        return _to_matrices(rotations, locations)
+
+    def evaluate_reference_pose(self, bones: Sequence[PsxBone]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Computes the world-space rotation and location of each bone in its reference pose.
+
+        @param bones: The bones that this evaluator was created from.
+        @return: The world-space rotations (WXYZ) and locations, with shapes Bx4 and Bx3.
+        """
+        return self.evaluate(bones_to_data_matrix(bones))
+
+
+def _to_matrices(rotations: np.ndarray, locations: np.ndarray) -> np.ndarray:
+    matrices = np.zeros(rotations.shape[:-1] + (4, 4), dtype=rotations.dtype)
+    matrices[..., 0:3, 0:3] = quaternion_to_matrix(rotations)
+    matrices[..., 0:3, 3] = locations
+    matrices[..., 3, 3] = 1.0
+    return matrices
+
+
+def _get_bone_depths(parent_indices: np.ndarray) -> np.ndarray:
+    # A bone is a root if it has no parent, or is its own parent (which is how the first bone is usually stored).
+    bone_count = len(parent_indices)
+    depths = np.full(bone_count, -1, dtype=np.intp)
+    for bone_index in range(bone_count):
+        # Walk up to the first bone whose depth is known, then assign depths on the way back down.
+        chain = []
+        index = bone_index
+        while depths[index] < 0:
+            if index in chain:
+                raise ValueError(f'Bone hierarchy contains a cycle through bone {index}')
+            chain.append(index)
+            parent_index = parent_indices[index]
+            if parent_index < 0 or parent_index == index:
+                depths[index] = 0
+                chain.pop()
+                break
+            if parent_index >= bone_count:
+                raise ValueError(f'Bone {index} has an invalid parent index {parent_index}')
+            index = parent_index
+        for index in reversed(chain):
+            depths[index] = depths[parent_indices[index]] + 1
+    return depths
+
+
+__all__ = [
+    'PoseEvaluator',
+    'bones_to_data_matrix',
+    'quaternion_multiply',
+    'quaternion_rotate',
+    'quaternion_to_matrix'
+]
+
+
+def __dir__():
+    return __all__
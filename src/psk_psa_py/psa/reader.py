@@ -1,10 +1,27 @@
+import functools
+import mmap
+import os
+import threading
+import warnings
+from concurrent.futures import Executor, ThreadPoolExecutor
 from ctypes import sizeof
-from typing import List
+from typing import BinaryIO, Iterable, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
+from numpy.typing import DTypeLike
 
-from .data import Psa
+from .cache import SequenceCache
+from .data import Psa, KEY_DTYPE
+from ..shared.aio import ReadLimiter, run_blocking
+from ..shared.arrays import array_to_structures
 from ..shared.data import Section, PsxBone
+from ..shared.file_cache import FileCache, structures_to_bytes
+from ..shared.profiling import SectionObserver, SectionTimer
+from ..shared.reader import SectionStream
+
+# When the selected bones span no more than this fraction of the bones, each frame's span of bones is read on its own
+# instead of reading every bone of every frame.
+_BONE_SPAN_READ_FRACTION = 0.25
 
 
 def _try_fix_cue4parse_issue_103(sequences) -> bool:
@@ -24,24 +41,149 @@ def _try_fix_cue4parse_issue_103(sequences) -> bool:
     return False
 
 
+def key_array_to_data_matrix(keys: np.ndarray, dtype: DTypeLike = np.float64) -> np.ndarray:
+    """
+    Converts an array of keys into a data matrix.
+
+    @param keys: An array of keys with the `KEY_DTYPE` dtype.
+    @param dtype: The dtype of the returned matrix.
+    @return: An array with the same shape as `keys`, plus a trailing axis of 7 values laid out the same way as
+    `Psa.Key.data` (rotation WXYZ followed by location XYZ).
+    """
+    matrix = np.empty(keys.shape + (7,), dtype=dtype)
+    rotations = keys['rotation']
+    matrix[..., 0] = rotations[..., 3]
+    matrix[..., 1:4] = rotations[..., 0:3]
+    matrix[..., 4:7] = keys['location']
+    return matrix
+
+
+def data_matrix_to_key_array(matrix: np.ndarray, times: Union[float, np.ndarray] = 1.0) -> np.ndarray:
+    """
+    Converts a data matrix back into an array of keys. This is the inverse of :key_array_to_data_matrix.
+
+    @param matrix: An array with a trailing axis of 7 values (rotation WXYZ followed by location XYZ).
+    @param times: The time value of each key, or a single value for all keys.
+    @return: An array of keys with the `KEY_DTYPE` dtype and the shape of `matrix` without its trailing axis.
+    """
+    matrix = np.asarray(matrix)
+    if matrix.shape[-1:] != (7,):
+        raise ValueError(f'Data matrix must have a trailing axis of 7 values (got shape {matrix.shape})')
+    keys = np.empty(matrix.shape[:-1], dtype=KEY_DTYPE)
+    keys['rotation'][..., 3] = matrix[..., 0]
+    keys['rotation'][..., 0:3] = matrix[..., 1:4]
+    keys['location'] = matrix[..., 4:7]
+    keys['time'] = times
+    return keys
+
+
+def _keys_from_buffer(buffer) -> List[Psa.Key]:
+    # Copies each key out of a buffer of packed keys (or an array with the `KEY_DTYPE` dtype).
+    data_size = sizeof(Psa.Key)
+    return [Psa.Key.from_buffer_copy(buffer, offset) for offset in range(0, memoryview(buffer).nbytes, data_size)]
+
+
+def _is_mmap_view(array: np.ndarray) -> bool:
+    # Whether the array is a view into a memory-mapped file, rather than memory of its own.
+    base = array.base
+    while isinstance(base, np.ndarray):
+        base = base.base
+    if isinstance(base, memoryview):
+        base = base.obj
+    return isinstance(base, mmap.mmap)
+
+
+def _freeze(value) -> Tuple[object, int]:
+    # Makes a decoded value safe to share between callers of the cache and returns the heap memory it holds, in bytes.
+    # Views into a memory-mapped file are free, since their pages belong to the page cache.
+    arrays = value if isinstance(value, tuple) else (value,)
+    for array in arrays:
+        array.flags.writeable = False
+    return value, sum(array.nbytes for array in arrays if not _is_mmap_view(array))
+
+
+def _selection_key(frames: Optional[slice], bone_indices: Optional[Sequence[int]]) -> tuple:
+    # Slices are not hashable, so they are unpacked to be usable in a cache key.
+    frames_key = None if frames is None else (frames.start, frames.stop, frames.step)
+    bones_key = None if bone_indices is None else tuple(int(i) for i in np.asarray(bone_indices).reshape(-1))
+    return frames_key, bones_key
+
+
 class PsaReader(object):
     """
     This class reads the sequences and bone information immediately upon instantiation and holds onto a file handle.
     The keyframe data is not read into memory upon instantiation due to its potentially very large size.
     To read the key data for a particular sequence, call :read_sequence_keys.
+
+    Reading sequences does not move the file position (positional reads are used), so a single reader can be shared
+    between threads. See :read_sequence_data_matrices to read several sequences concurrently.
+
+    When `use_mmap` is set, the file is memory-mapped once and :read_sequence_key_array returns read-only views into the
+    mapped ANIMKEYS section instead of copies, so reading a sequence does not allocate and the pages are shared with any
+    other process that maps the same file.
+
+    When `cache_max_bytes` is set, decoded sequences are kept in an LRU cache (see :cache) keyed by sequence name and
+    output format, so repeated reads of the same sequence skip the file entirely. Arrays returned from the cache are
+    read-only and shared between callers. In mmap mode, key arrays that are views into the file hold no memory of their
+    own, so they are cached without counting against `cache_max_bytes`.
+
+    When `observer` is set, it is called with a `SectionEvent` for each section read upon instantiation, and for each
+    read of keys from the ANIMKEYS section afterwards.
+
+    The `_async` variants of the read methods (and :open_async) run in an executor so that they can be awaited without
+    blocking an event loop. Pass a `ReadLimiter` to bound how many reads, and how many bytes, are in flight at once.
+
+    When `file_cache` is set, the bones and sequences are loaded from it if it holds an entry for the current version of
+    the file, and stored in it otherwise. Keys are always read from the file itself.
     """
 
-    def __init__(self, path):
+    def __init__(self, path, use_mmap: bool = False, cache_max_bytes: Optional[int] = None,
+                 observer: Optional[SectionObserver] = None, file_cache: Optional[FileCache] = None):
         self.keys_data_offset: int = 0
+        self.keys_data_count: int = 0
+        self.observer = observer
         self.fp = open(path, 'rb')
-        self.psa: Psa = self._read(self.fp)
+        psa = None
+        if file_cache is not None:
+            file_cache_key = file_cache.get_key(path, 'psa')
+            psa = self._load_from_file_cache(file_cache, path, file_cache_key)
+        if psa is None:
+            psa = self._read(self.fp)
+            if file_cache is not None:
+                self._store_in_file_cache(file_cache, path, file_cache_key, psa)
+        self.psa: Psa = psa
+        self._lock = threading.Lock()
+        self._mmap: Optional[mmap.mmap] = None
+        if use_mmap:
+            self._mmap = mmap.mmap(self.fp.fileno(), 0, access=mmap.ACCESS_READ)
+        self.cache: Optional[SequenceCache] = None
+        if cache_max_bytes is not None:
+            self.cache = SequenceCache(cache_max_bytes)
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        # The cache may hold views into the mapping, so it is cleared first.
+        if self.cache is not None:
+            self.cache.clear()
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Arrays handed out by the reader still reference the mapping.
+                # It will be unmapped once the last of them is garbage collected.
+                pass
+            self._mmap = None
         self.fp.close()
 
+    @property
+    def is_mmap(self) -> bool:
+        return self._mmap is not None
+
     @property
     def bones(self):
         return self.psa.bones
@@ -50,85 +192,341 @@ class PsaReader(object):
     def sequences(self):
         return self.psa.sequences
 
-    def read_sequence_data_matrix(self, sequence_name: str) -> np.ndarray:
+    def read_sequence_data_matrix(self, sequence_name: str, dtype: DTypeLike = np.float64,
+                                  frames: Optional[slice] = None, bone_indices: Optional[Sequence[int]] = None) -> np.ndarray:
         """
         Reads and returns the data matrix for the given sequence.
         
         @param sequence_name: The name of the sequence.
+        @param dtype: The dtype of the returned matrix. Use `np.float32` to avoid upcasting the stored values.
+        @param frames: The frames to read, relative to the start of the sequence (e.g., `slice(0, 10, 2)`).
+        @param bone_indices: The bones to read, in the order they should appear in the matrix.
         @return: An FxBx7 matrix where F is the number of frames, B is the number of bones.
         """
+        dtype = np.dtype(dtype)
+        return self._cached(('data_matrix', sequence_name, dtype) + _selection_key(frames, bone_indices),
+                            lambda: key_array_to_data_matrix(self._read_key_array(sequence_name, frames, bone_indices), dtype))
+
+    def read_sequence_data_matrix_and_times(self, sequence_name: str, dtype: DTypeLike = np.float64,
+                                            frames: Optional[slice] = None,
+                                            bone_indices: Optional[Sequence[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Reads and returns the data matrix for the given sequence, along with the time value of each key.
+
+        @param sequence_name: The name of the sequence.
+        @param dtype: The dtype of the returned matrix.
+        @param frames: The frames to read (see :read_sequence_data_matrix).
+        @param bone_indices: The bones to read (see :read_sequence_data_matrix).
+        @return: An FxBx7 data matrix (see :read_sequence_data_matrix) and an FxB matrix of key times.
+        """
+        dtype = np.dtype(dtype)
+
+        def load():
+            keys = self._read_key_array(sequence_name, frames, bone_indices)
+            return key_array_to_data_matrix(keys, dtype), keys['time'].copy()
+
+        return self._cached(('data_matrix_and_times', sequence_name, dtype) + _selection_key(frames, bone_indices), load)
+
+    def read_sequence_data_matrices(self, sequence_names: Iterable[str], dtype: DTypeLike = np.float64,
+                                    max_workers: Optional[int] = None, executor: Optional[Executor] = None,
+                                    frames: Optional[slice] = None,
+                                    bone_indices: Optional[Sequence[int]] = None) -> List[np.ndarray]:
+        """
+        Reads the data matrices for several sequences concurrently.
+
+        @param sequence_names: The names of the sequences.
+        @param dtype: The dtype of the returned matrices.
+        @param max_workers: The number of threads to use if no executor is given.
+        @param executor: An existing executor to submit the reads to.
+        @param frames: The frames to read from each sequence (see :read_sequence_data_matrix).
+        @param bone_indices: The bones to read from each sequence (see :read_sequence_data_matrix).
+        @return: The data matrices, in the same order as `sequence_names`.
+        """
+        def read(sequence_name: str) -> np.ndarray:
+            return self.read_sequence_data_matrix(sequence_name, dtype, frames, bone_indices)
+
+        if executor is not None:
+            return list(executor.map(read, sequence_names))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(read, sequence_names))
+
+    def read_sequence_key_array(self, sequence_name: str, frames: Optional[slice] = None,
+                                bone_indices: Optional[Sequence[int]] = None) -> np.ndarray:
+        """
+        Reads and returns the key data for a sequence as a structured array, without creating an object per key.
+
+        Only the byte ranges covering the selected frames and bones are read from the file.
+
+        @param sequence_name: The name of the sequence.
+        @param frames: The frames to read (see :read_sequence_data_matrix).
+        @param bone_indices: The bones to read (see :read_sequence_data_matrix).
+        @return: An FxB array with the `KEY_DTYPE` dtype, where F is the number of frames, B is the number of bones.
+        In mmap mode, this is a read-only view into the file unless `bone_indices` is given.
+        """
+        return self._cached(('key_array', sequence_name) + _selection_key(frames, bone_indices),
+                            lambda: self._read_key_array(sequence_name, frames, bone_indices))
+
+    def _read_key_array(self, sequence_name: str, frames: Optional[slice] = None,
+                        bone_indices: Optional[Sequence[int]] = None) -> np.ndarray:
         sequence = self.psa.sequences[sequence_name]
-        keys = self.read_sequence_keys(sequence_name)
-        bone_count = len(self.bones)
-        matrix_size = sequence.frame_count, bone_count, 7
-        matrix = np.zeros(matrix_size)
-        keys_iter = iter(keys)
-        for frame_index in range(sequence.frame_count):
-            for bone_index in range(bone_count):
-                matrix[frame_index, bone_index, :] = list(next(keys_iter).data)
-        return matrix
+        bone_count = len(self.psa.bones)
+        frame_range = range(sequence.frame_count)
+        if frames is not None:
+            frame_range = frame_range[frames]
+        bone_start, bone_stop = 0, bone_count
+        if bone_indices is not None:
+            bone_indices = np.asarray(bone_indices, dtype=np.intp).reshape(-1)
+            if bone_indices.size > 0:
+                bone_start, bone_stop = int(bone_indices.min()), int(bone_indices.max()) + 1
+                if bone_start < 0 or bone_stop > bone_count:
+                    raise IndexError(f'Bone indices must be in the range [0, {bone_count}) '
+                                     f'(got [{bone_start}, {bone_stop - 1}])')
+                bone_indices = bone_indices - bone_start
+        is_narrow = (bone_stop - bone_start) <= bone_count * _BONE_SPAN_READ_FRACTION
+        if len(frame_range) == 0:
+            keys = np.empty((0, bone_count), dtype=KEY_DTYPE)
+        elif self._mmap is not None or (frame_range.step == 1 and not is_narrow):
+            # Read the contiguous run of frames that covers the selection, then slice it.
+            # In mmap mode this is free, as nothing is copied until the bones are gathered.
+            first_frame = min(frame_range[0], frame_range[-1])
+            frame_count = abs(frame_range[-1] - frame_range[0]) + 1
+            buffer = self._read_sequence_buffer(sequence, first_frame, frame_count)
+            keys = np.frombuffer(buffer, dtype=KEY_DTYPE).reshape(frame_count, bone_count)
+            start = frame_range[0] - first_frame
+            stop = start + len(frame_range) * frame_range.step
+            keys = keys[start:stop if stop >= 0 else None:frame_range.step, bone_start:bone_stop]
+        else:
+            # Strided frames and narrow bone selections are read one span of bones at a time, skipping everything in
+            # between.
+            keys = self._read_strided_keys(sequence, frame_range, bone_start, bone_stop)
+        if bone_indices is not None:
+            keys = keys[:, bone_indices]
+        return keys
+
+    def _read_strided_keys(self, sequence: Psa.Sequence, frame_range: range, bone_start: int, bone_stop: int) -> np.ndarray:
+        data_size = sizeof(Psa.Key)
+        bone_count = len(self.psa.bones)
+        span_length = (bone_stop - bone_start) * data_size
+        timer = SectionTimer(self.observer)
+        buffer = bytearray(span_length * len(frame_range))
+        view = memoryview(buffer)
+        sequence_keys_offset = self.keys_data_offset + (sequence.frame_start_index * bone_count * data_size)
+        for i, frame_index in enumerate(frame_range):
+            offset = sequence_keys_offset + ((frame_index * bone_count) + bone_start) * data_size
+            if self._read_at(offset, view[i * span_length:(i + 1) * span_length]) != span_length:
+                raise EOFError(f'Unexpected end of file while reading keys for sequence "{sequence.name.decode()}"')
+        first_offset = sequence_keys_offset + ((frame_range[0] * bone_count) + bone_start) * data_size
+        timer.report('read', b'ANIMKEYS', first_offset, data_size, len(buffer) // data_size)
+        return np.frombuffer(buffer, dtype=KEY_DTYPE).reshape(len(frame_range), bone_stop - bone_start)
 
     def read_sequence_keys(self, sequence_name: str) -> List[Psa.Key]:
         """
         Reads and returns the key data for a sequence.
 
         @param sequence_name: The name of the sequence.
-        @return: A list of Psa.Keys.
+        @return: A list of Psa.Keys. When caching is enabled, the cached key array (see :read_sequence_key_array) is
+        used, and new keys are made from it on each call, so the keys can be modified freely.
         """
-        # Set the file reader to the beginning of the keys data
-        sequence = self.psa.sequences[sequence_name]
+        if self.cache is None:
+            return self._read_keys(sequence_name)
+        return _keys_from_buffer(self.read_sequence_key_array(sequence_name).reshape(-1))
+
+    @classmethod
+    async def open_async(cls, path, executor: Optional[Executor] = None, **kwargs) -> 'PsaReader':
+        """
+        Opens a reader in an executor, without blocking the event loop.
+
+        @param path: The path of the file.
+        @param executor: The executor to open the file in. Defaults to the default executor of the event loop.
+        @param kwargs: The remaining arguments of the reader (e.g., `use_mmap`).
+        """
+        return await run_blocking(functools.partial(cls, path, **kwargs), executor=executor)
+
+    async def read_sequence_data_matrix_async(self, sequence_name: str, dtype: DTypeLike = np.float64,
+                                              frames: Optional[slice] = None,
+                                              bone_indices: Optional[Sequence[int]] = None,
+                                              executor: Optional[Executor] = None,
+                                              limiter: Optional[ReadLimiter] = None) -> np.ndarray:
+        """
+        Reads the data matrix of a sequence (see :read_sequence_data_matrix) in an executor, without blocking the event
+        loop.
+
+        @param executor: The executor to read the sequence in. Defaults to the default executor of the event loop.
+        @param limiter: Limits the reads in progress. The size of the sequence's keys is reserved while it is read.
+        """
+        return await run_blocking(self.read_sequence_data_matrix, sequence_name, dtype, frames, bone_indices,
+                                  size=self._get_sequence_size(sequence_name), executor=executor, limiter=limiter)
+
+    async def read_sequence_key_array_async(self, sequence_name: str, frames: Optional[slice] = None,
+                                            bone_indices: Optional[Sequence[int]] = None,
+                                            executor: Optional[Executor] = None,
+                                            limiter: Optional[ReadLimiter] = None) -> np.ndarray:
+        """
+        Reads the keys of a sequence as a structured array (see :read_sequence_key_array) in an executor, without
+        blocking the event loop.
+        """
+        return await run_blocking(self.read_sequence_key_array, sequence_name, frames, bone_indices,
+                                  size=self._get_sequence_size(sequence_name), executor=executor, limiter=limiter)
+
+    async def read_sequence_keys_async(self, sequence_name: str, executor: Optional[Executor] = None,
+                                       limiter: Optional[ReadLimiter] = None) -> List[Psa.Key]:
+        """
+        Reads the keys of a sequence (see :read_sequence_keys) in an executor, without blocking the event loop.
+        """
+        return await run_blocking(self.read_sequence_keys, sequence_name,
+                                  size=self._get_sequence_size(sequence_name), executor=executor, limiter=limiter)
+
+    def _get_sequence_size(self, sequence_name: str) -> int:
+        # The size of the sequence's keys in the file, in bytes.
+        return self.psa.sequences[sequence_name].frame_count * len(self.psa.bones) * sizeof(Psa.Key)
+
+    def _read_keys(self, sequence_name: str) -> List[Psa.Key]:
+        return _keys_from_buffer(self._read_sequence_buffer(self.psa.sequences[sequence_name]))
+
+    def _cached(self, key, load):
+        if self.cache is None:
+            return load()
+        return self.cache.get_or_load(key, lambda: _freeze(load()))
+
+    def _read_sequence_buffer(self, sequence: Psa.Sequence, first_frame: int = 0,
+                              frame_count: Optional[int] = None) -> Union[bytearray, memoryview]:
         data_size = sizeof(Psa.Key)
         bone_count = len(self.psa.bones)
-        buffer_length = data_size * bone_count * sequence.frame_count
-        sequence_keys_offset = self.keys_data_offset + (sequence.frame_start_index * bone_count * data_size)
-        self.fp.seek(sequence_keys_offset, 0)
-        buffer = self.fp.read(buffer_length)
-        offset = 0
-        keys = []
-        for _ in range(sequence.frame_count * bone_count):
-            key = Psa.Key.from_buffer_copy(buffer, offset)
-            keys.append(key)
-            offset += data_size
-        return keys
+        if frame_count is None:
+            frame_count = sequence.frame_count - first_frame
+        buffer_length = data_size * bone_count * frame_count
+        frame_index = sequence.frame_start_index + first_frame
+        sequence_keys_offset = self.keys_data_offset + (frame_index * bone_count * data_size)
+        timer = SectionTimer(self.observer)
+        if self._mmap is not None:
+            if sequence_keys_offset + buffer_length > len(self._mmap):
+                raise EOFError(f'Unexpected end of file while reading keys for sequence "{sequence.name.decode()}"')
+            buffer = memoryview(self._mmap)[sequence_keys_offset:sequence_keys_offset + buffer_length]
+        else:
+            buffer = bytearray(buffer_length)
+            if self._read_at(sequence_keys_offset, buffer) != len(buffer):
+                raise EOFError(f'Unexpected end of file while reading keys for sequence "{sequence.name.decode()}"')
+        timer.report('read', b'ANIMKEYS', sequence_keys_offset, data_size, bone_count * frame_count)
+        return buffer
 
-    @staticmethod
-    def _read_types(fp, data_class, section: Section, data):
-        buffer_length = section.data_size * section.data_count
-        buffer = fp.read(buffer_length)
-        offset = 0
-        for _ in range(section.data_count):
-            data.append(data_class.from_buffer_copy(buffer, offset))
-            offset += section.data_size
+    def _read_at(self, offset: int, buffer: Union[bytearray, memoryview]) -> int:
+        # Reads into the buffer from the given offset without relying on the shared file position.
+        if hasattr(os, 'preadv'):
+            fd = self.fp.fileno()
+            view = memoryview(buffer)
+            position = 0
+            while position < len(buffer):
+                count = os.preadv(fd, [view[position:]], offset + position)
+                if count == 0:
+                    break
+                position += count
+            return position
+        # Positional reads are not available on this platform (e.g., Windows), so serialize the seek and read.
+        with self._lock:
+            self.fp.seek(offset, 0)
+            return self.fp.readinto(buffer)
 
-    def _read(self, fp) -> Psa:
+    def _load_from_file_cache(self, file_cache: FileCache, path, key: str) -> Optional[Psa]:
+        entry = file_cache.load(path, 'psa', key)
+        if entry is None:
+            return None
         psa = Psa()
-        while fp.read(1):
-            fp.seek(-1, 1)
-            section = Section.from_buffer_copy(fp.read(sizeof(Section)))
-            match section.name:
-                case b'ANIMHEAD':
-                    pass
-                case b'BONENAMES':
-                    PsaReader._read_types(fp, PsxBone, section, psa.bones)
-                case b'ANIMINFO':
-                    sequences = []
-                    PsaReader._read_types(fp, Psa.Sequence, section, sequences)
-                    # Try to fix CUE4Parse bug, if necessary.
-                    _try_fix_cue4parse_issue_103(sequences)
-                    for sequence in sequences:
-                        psa.sequences[sequence.name.decode()] = sequence
-                case b'ANIMKEYS':
-                    # Skip keys on this pass. We will keep this file open and read from it as needed.
-                    self.keys_data_offset = fp.tell()
-                    fp.seek(section.data_size * section.data_count, 1)
-                case _:
-                    fp.seek(section.data_size * section.data_count, 1)
-                    print(f'Unrecognized section in PSA: "{section.name}"')
+        psa.bones = array_to_structures(PsxBone, entry.arrays['bones'])
+        for sequence in array_to_structures(Psa.Sequence, entry.arrays['sequences']):
+            psa.sequences[sequence.name.decode()] = sequence
+        self.keys_data_offset = entry.metadata['keys_data_offset']
+        self.keys_data_count = entry.metadata['keys_data_count']
         return psa
 
+    def _store_in_file_cache(self, file_cache: FileCache, path, key: str, psa: Psa):
+        # The sequences are stored after the CUE4Parse fix has been applied, so it is not needed when loading them.
+        arrays = {
+            'bones': structures_to_bytes(psa.bones),
+            'sequences': structures_to_bytes(psa.sequences.values()),
+        }
+        metadata = {
+            'keys_data_offset': self.keys_data_offset,
+            'keys_data_count': self.keys_data_count,
+        }
+        file_cache.store(path, 'psa', arrays, metadata, key)
+
+    def _read(self, fp) -> Psa:
+        psa, self.keys_data_offset, self.keys_data_count = _read_psa_sections(SectionStream(fp), self.observer, False)
+        return psa
+
+
+def _read_types(stream: SectionStream, data_class, section: Section, data):
+    buffer_length = section.data_size * section.data_count
+    buffer = stream.read(buffer_length)
+    if len(buffer) != buffer_length:
+        raise EOFError(f'Unexpected end of file while reading section "{section.name.decode()}"')
+    offset = 0
+    for _ in range(section.data_count):
+        data.append(data_class.from_buffer_copy(buffer, offset))
+        offset += section.data_size
+
+
+def _read_psa_sections(stream: SectionStream, observer: Optional[SectionObserver],
+                       read_keys: bool) -> Tuple[Psa, int, int]:
+    # Returns the PSA, and the offset and count of its keys. The keys are read into `Psa.keys` if `read_keys` is set.
+    psa = Psa()
+    keys_data_offset = 0
+    keys_data_count = 0
+    for section in stream:
+        timer = SectionTimer(observer)
+        offset = stream.offset
+        operation = 'read'
+        match section.name:
+            case b'ANIMHEAD':
+                pass
+            case b'BONENAMES':
+                _read_types(stream, PsxBone, section, psa.bones)
+            case b'ANIMINFO':
+                sequences = []
+                _read_types(stream, Psa.Sequence, section, sequences)
+                # Try to fix CUE4Parse bug, if necessary.
+                _try_fix_cue4parse_issue_103(sequences)
+                for sequence in sequences:
+                    psa.sequences[sequence.name.decode()] = sequence
+            case b'ANIMKEYS':
+                keys_data_offset = offset
+                keys_data_count = section.data_count
+                if read_keys:
+                    if section.data_size != KEY_DTYPE.itemsize:
+                        raise RuntimeError(f'Unexpected element size ({section.data_size}) for section "ANIMKEYS"')
+                    buffer = bytearray(section.data_size * section.data_count)
+                    if stream.readinto(buffer) != len(buffer):
+                        raise EOFError('Unexpected end of file while reading section "ANIMKEYS"')
+                    psa.keys = np.frombuffer(buffer, dtype=KEY_DTYPE)
+                else:
+                    # Skip keys on this pass. The reader keeps the file open and reads from it as needed.
+                    stream.skip_section()
+                    operation = 'skip'
+            case _:
+                stream.skip_section()
+                operation = 'skip'
+                warnings.warn(f'Unrecognized section in PSA: "{section.name}"')
+        timer.report(operation, section.name, offset, section.data_size, section.data_count)
+    return psa, keys_data_offset, keys_data_count
+
+
+def read_psa(fp: BinaryIO, observer: Optional[SectionObserver] = None) -> Psa:
+    """
+    Reads a whole PSA file, including its keys, from any readable stream. Unlike `PsaReader`, this does not need a
+    seekable file, so it can read directly from a `zipfile` or `tarfile` member, a `gzip` stream or a pipe.
+
+    @param fp: The stream to read from.
+    @param observer: If set, called with a `SectionEvent` for each section read or skipped.
+    @return: The PSA, with its keys in `Psa.keys` as an array with the `KEY_DTYPE` dtype.
+    """
+    psa, _, _ = _read_psa_sections(SectionStream(fp), observer, True)
+    return psa
 
 __all__ = [
-    'PsaReader'
+    'PsaReader',
+    'read_psa',
+    'key_array_to_data_matrix',
+    'data_matrix_to_key_array'
 ]
 
 
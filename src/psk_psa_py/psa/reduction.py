@@ -0,0 +1,145 @@
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from .data import Psa
+from .resample import slerp_quaternions
+
+# The default maximum number of frames between two kept keys, which bounds the cost of the scan on long sequences.
+DEFAULT_MAX_FRAME_GAP = 30
+
+
+class KeyReductionResult(NamedTuple):
+    mask: np.ndarray
+    """An FxB boolean array that is true for each key that must be kept."""
+    key_counts: np.ndarray
+    """The number of keys kept for each bone track."""
+    key_quotum: int
+    """The total number of keys kept."""
+    key_reduction: float
+    """The fraction of keys kept, from 0 to 1, where 1 means that no keys were dropped."""
+
+
+def compute_key_reduction(matrix: np.ndarray, position_tolerance: float = 1e-3, angle_tolerance: float = 1e-3,
+                          max_frame_gap: Optional[int] = DEFAULT_MAX_FRAME_GAP) -> KeyReductionResult:
+    """
+    Finds the keys of each bone track that can be dropped because they are reconstructed, within the given tolerances,
+    by interpolating between the keys that are kept around them.
+
+    Tracks are scanned frame by frame, with all bones processed at once. A key is dropped if interpolating from the
+    last kept key to the next key reproduces every key in between. The first and last keys are always kept.
+
+    @param matrix: An FxBx7 data matrix, as returned by `PsaReader.read_sequence_data_matrix`.
+    @param position_tolerance: The largest distance between a dropped location and its reconstruction.
+    @param angle_tolerance: The largest angle, in radians, between a dropped rotation and its reconstruction.
+    @param max_frame_gap: No more than this many frames are left between two kept keys. This also bounds the cost of
+    the scan to O(F * max_frame_gap * B). If None, there is no limit, and the cost grows with the square of the length
+    of the longest static stretch, up to O(F^2 * B).
+    @return: The mask of kept keys along with the resulting key counts.
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    if matrix.ndim != 3 or matrix.shape[2] != 7:
+        raise ValueError(f'Data matrix must have a shape of FxBx7 (got {matrix.shape})')
+    if max_frame_gap is not None and max_frame_gap < 1:
+        raise ValueError(f'max_frame_gap must be at least 1 (got {max_frame_gap})')
+    frame_count, bone_count = matrix.shape[0:2]
+    mask = np.ones((frame_count, bone_count), dtype=bool)
+    bones = np.arange(bone_count)
+    anchors = np.zeros(bone_count, dtype=np.intp)
+    # The cosine of half the angle tolerance, which is what the quaternion dot product is compared against.
+    min_dot = np.cos(min(angle_tolerance, np.pi) / 2.0)
+
+    for frame_index in range(1, frame_count - 1):
+        next_index = frame_index + 1
+        spans = frame_index - anchors
+        # Test the interpolation from each anchor to the next key against every key in between.
+        offsets = np.arange(1, int(spans.max()) + 1)[:, np.newaxis]
+        is_between = offsets <= spans
+        between = np.minimum(anchors + offsets, frame_index)
+        t = (between - anchors) / (next_index - anchors)
+        start = matrix[anchors, bones]
+        end = matrix[next_index]
+        rotations = slerp_quaternions(start[:, 0:4], end[:, 0:4], t)
+        locations = start[:, 4:7] + (end[:, 4:7] - start[:, 4:7]) * t[..., np.newaxis]
+        actual = matrix[between, bones]
+        dots = np.abs(np.sum(rotations * actual[..., 0:4], axis=-1))
+        distances = np.linalg.norm(locations - actual[..., 4:7], axis=-1)
+        is_reconstructed = (dots >= min_dot) & (distances <= position_tolerance)
+        is_droppable = np.all(is_reconstructed | ~is_between, axis=0)
+        if max_frame_gap is not None:
+            is_droppable &= spans < max_frame_gap
+        mask[frame_index] = ~is_droppable
+        anchors = np.where(is_droppable, anchors, frame_index)
+
+    key_counts = mask.sum(axis=0)
+    key_quotum = int(key_counts.sum())
+    key_reduction = key_quotum / mask.size if mask.size > 0 else 1.0
+    return KeyReductionResult(mask, key_counts, key_quotum, key_reduction)
+
+
+def reconstruct_data_matrix(matrix: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """
+    Rebuilds a data matrix from only the keys selected by `mask`, by interpolating the dropped keys from the kept keys
+    on either side of them. This is what a consumer of the reduced keys will see.
+
+    @param matrix: An FxBx7 data matrix.
+    @param mask: An FxB boolean array of the keys to keep. The first and last key of each track must be kept.
+    @return: An FxBx7 data matrix with the same dtype as `matrix`.
+    """
+    matrix = np.asarray(matrix)
+    mask = np.asarray(mask, dtype=bool)
+    if mask.shape != matrix.shape[0:2]:
+        raise ValueError(f'Mask shape {mask.shape} does not match data matrix shape {matrix.shape}')
+    frame_count, bone_count = mask.shape
+    if frame_count == 0:
+        return matrix.copy()
+    if not (mask[0].all() and mask[-1].all()):
+        raise ValueError('The first and last key of each track must be kept')
+    frame_indices = np.arange(frame_count)[:, np.newaxis]
+    previous = np.maximum.accumulate(np.where(mask, frame_indices, 0), axis=0)
+    following = np.minimum.accumulate(np.where(mask, frame_indices, frame_count - 1)[::-1], axis=0)[::-1]
+    span = np.maximum(following - previous, 1)
+    t = (frame_indices - previous) / span
+    bones = np.arange(bone_count)
+    start = matrix[previous, bones].astype(np.float64)
+    end = matrix[following, bones].astype(np.float64)
+    result = np.empty_like(matrix)
+    result[..., 0:4] = slerp_quaternions(start[..., 0:4], end[..., 0:4], t)
+    result[..., 4:7] = start[..., 4:7] + (end[..., 4:7] - start[..., 4:7]) * t[..., np.newaxis]
+    result[mask] = matrix[mask]
+    return result
+
+
+def reduce_sequence_keys(sequence: Psa.Sequence, matrix: np.ndarray, position_tolerance: float = 1e-3,
+                         angle_tolerance: float = 1e-3,
+                         max_frame_gap: Optional[int] = DEFAULT_MAX_FRAME_GAP) -> KeyReductionResult:
+    """
+    Runs :compute_key_reduction on a sequence and stores the outcome in its `key_quotum` and `key_reduction` fields,
+    which are written to the ANIMINFO section by `write_psa`.
+
+    `key_quotum` is set to the number of keys kept, and `key_reduction` to the fraction of keys kept (1.0 when nothing
+    is dropped, which is what exporters write for sequences that were not reduced), not to the fraction dropped.
+
+    The keys themselves are left in place, as ANIMKEYS always holds one key per frame and bone.
+
+    @param sequence: The sequence to update.
+    @param matrix: The FxBx7 data matrix of the sequence.
+    @return: The key reduction result (see :compute_key_reduction).
+    """
+    result = compute_key_reduction(matrix, position_tolerance, angle_tolerance, max_frame_gap)
+    sequence.key_quotum = result.key_quotum
+    sequence.key_reduction = result.key_reduction
+    return result
+
+
+__all__ = [
+    'DEFAULT_MAX_FRAME_GAP',
+    'KeyReductionResult',
+    'compute_key_reduction',
+    'reconstruct_data_matrix',
+    'reduce_sequence_keys'
+]
+
+
+def __dir__():
+    return __all__
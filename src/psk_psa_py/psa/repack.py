@@ -0,0 +1,201 @@
+import os
+from contextlib import ExitStack
+from ctypes import sizeof
+from typing import BinaryIO, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from .data import Psa
+from .reader import PsaReader
+from ..shared.data import Section, PsxBone
+from ..shared.profiling import SectionObserver, SectionTimer, tell
+from ..shared.writer import write_section
+
+# The size of the buffer used to copy keys when the operating system cannot copy between the files directly.
+COPY_BUFFER_SIZE = 1 << 20
+
+
+class SequenceSource(NamedTuple):
+    reader: PsaReader
+    sequence_name: str
+    name: Optional[str] = None
+    """The name of the sequence in the output, if it is to be renamed."""
+
+
+def check_bones_match(bones: Sequence[PsxBone], other_bones: Sequence[PsxBone]):
+    """
+    Checks that two bone lists describe the same skeleton: the same number of bones, with the same names
+    (case-insensitive) and parents, in the same order. The reference pose is not compared.
+
+    @raise ValueError: If the bone lists do not match.
+    """
+    if len(bones) != len(other_bones):
+        raise ValueError(f'Bone counts do not match ({len(bones)} != {len(other_bones)})')
+    for i, (bone, other_bone) in enumerate(zip(bones, other_bones)):
+        if bone.name.lower() != other_bone.name.lower() or bone.parent_index != other_bone.parent_index:
+            raise ValueError(f'Bone {i} does not match ("{bone.name.decode(errors="replace")}" with parent '
+                             f'{bone.parent_index} != "{other_bone.name.decode(errors="replace")}" with parent '
+                             f'{other_bone.parent_index})')
+
+
+def _get_key_range(source: SequenceSource) -> Tuple[int, int]:
+    # Returns the offset and length of the keys of a sequence in its source file.
+    reader = source.reader
+    sequence = reader.sequences[source.sequence_name]
+    bone_count = len(reader.bones)
+    key_count = sequence.frame_count * bone_count
+    if (sequence.frame_start_index * bone_count) + key_count > reader.keys_data_count:
+        raise EOFError(f'Keys of sequence "{source.sequence_name}" extend past the end of the ANIMKEYS section')
+    offset = reader.keys_data_offset + (sequence.frame_start_index * bone_count * sizeof(Psa.Key))
+    return offset, key_count * sizeof(Psa.Key)
+
+
+def _is_seekable_file(fp: BinaryIO) -> bool:
+    # Whether the output is a regular file that the operating system can copy into at explicit offsets.
+    try:
+        fp.fileno()
+        return fp.seekable()
+    except (AttributeError, OSError):
+        return False
+
+
+def _copy_range(reader: PsaReader, offset: int, length: int, fp: BinaryIO) -> int:
+    # Copies bytes from the file of a reader to another file, in the kernel where possible. The reader's file position
+    # is never used, so the reader can be shared with other threads. Returns the position of the copy in the output, or
+    # -1 if the output cannot report one (e.g., a pipe).
+    if not _is_seekable_file(fp):
+        _copy_range_buffered(reader, offset, length, fp)
+        return tell(fp)
+    fp.flush()
+    position = fp.tell()
+    if length == 0 or not hasattr(os, 'copy_file_range'):
+        _copy_range_buffered(reader, offset, length, fp)
+        return position
+    # Copy at explicit offsets, then seek past the copy so that the position of the buffered writer matches that of
+    # the file.
+    source_fd = reader.fp.fileno()
+    fd = fp.fileno()
+    copied = 0
+    try:
+        while copied < length:
+            count = os.copy_file_range(source_fd, fd, length - copied, offset + copied, position + copied)
+            if count == 0:
+                raise EOFError('Unexpected end of file while copying keys')
+            copied += count
+    except OSError:
+        # e.g., the files are on different file systems on an older kernel. Copy the remainder through a buffer.
+        fp.seek(position + copied)
+        _copy_range_buffered(reader, offset + copied, length - copied, fp)
+        return position
+    fp.seek(position + length)
+    return position
+
+
+def _copy_range_buffered(reader: PsaReader, offset: int, length: int, fp: BinaryIO):
+    if length == 0:
+        return
+    buffer = bytearray(min(COPY_BUFFER_SIZE, length))
+    view = memoryview(buffer)
+    copied = 0
+    while copied < length:
+        count = min(length - copied, len(buffer))
+        if reader._read_at(offset + copied, view[:count]) != count:
+            raise EOFError('Unexpected end of file while copying keys')
+        fp.write(view[:count])
+        copied += count
+
+
+def write_psa_sequences(fp: Union[BinaryIO, str, os.PathLike], sources: Iterable[Union[SequenceSource, Tuple]],
+                        observer: Optional[SectionObserver] = None) -> Psa:
+    """
+    Writes a PSA file made of sequences from other PSA files, without decoding their keys.
+
+    Only the ANIMINFO entries are rewritten (with new `frame_start_index` values). The keys of each sequence are
+    copied from its source file as a single byte range, with `copy_file_range` where the operating system supports it.
+    Other sections of the source files (e.g., SCALEKEYS) are not copied.
+
+    @param fp: The file to write to, or its path.
+    @param sources: The sequences to write, in order, as `SequenceSource`s or (reader, sequence name[, new name]) tuples.
+    The bones of all of the readers must match (see :check_bones_match).
+    @param observer: If set, called with a `SectionEvent` for each section written, and for each range of keys copied.
+    @return: The written `Psa`, without keys.
+    @raise ValueError: If the bones do not match, no sources are given or two sequences have the same name.
+    """
+    sources = [SequenceSource(*source) for source in sources]
+    if len(sources) == 0:
+        raise ValueError('At least one sequence is required')
+    psa = Psa()
+    psa.bones = list(sources[0].reader.bones)
+    frame_start_index = 0
+    for source in sources:
+        if source.reader is not sources[0].reader:
+            check_bones_match(psa.bones, source.reader.bones)
+        sequence = Psa.Sequence.from_buffer_copy(source.reader.sequences[source.sequence_name])
+        if source.name is not None:
+            sequence.name = source.name.encode('windows-1252')
+        name = sequence.name.decode()
+        if name in psa.sequences:
+            raise ValueError(f'Duplicate sequence name "{name}"')
+        sequence.frame_start_index = frame_start_index
+        frame_start_index += sequence.frame_count
+        psa.sequences[name] = sequence
+    key_ranges = [_get_key_range(source) for source in sources]
+
+    with ExitStack() as stack:
+        if isinstance(fp, (str, os.PathLike)):
+            fp = stack.enter_context(open(fp, 'wb'))
+        write_section(fp, b'ANIMHEAD', observer=observer)
+        write_section(fp, b'BONENAMES', PsxBone, psa.bones, observer)
+        write_section(fp, b'ANIMINFO', Psa.Sequence, list(psa.sequences.values()), observer)
+        section = Section()
+        section.name = b'ANIMKEYS'
+        section.data_size = sizeof(Psa.Key)
+        section.data_count = frame_start_index * len(psa.bones)
+        fp.write(section)
+        # Consecutive sequences that are also consecutive in their source file are copied as one range.
+        runs: List[List] = []
+        for source, (offset, length) in zip(sources, key_ranges):
+            if runs and runs[-1][0] is source.reader and runs[-1][1] + runs[-1][2] == offset:
+                runs[-1][2] += length
+            else:
+                runs.append([source.reader, offset, length])
+        for reader, offset, length in runs:
+            timer = SectionTimer(observer)
+            output_offset = _copy_range(reader, offset, length, fp)
+            timer.report('write', b'ANIMKEYS', output_offset, sizeof(Psa.Key), length // sizeof(Psa.Key))
+    return psa
+
+
+def merge_psa_files(paths: Iterable[Union[str, os.PathLike]], fp: Union[BinaryIO, str, os.PathLike],
+                    observer: Optional[SectionObserver] = None) -> Psa:
+    """
+    Merges all of the sequences of several PSA files with the same bones into one file, in order.
+
+    @raise ValueError: If the bones do not match, or a sequence name appears in more than one file.
+    """
+    with ExitStack() as stack:
+        readers: List[PsaReader] = [stack.enter_context(PsaReader(path)) for path in paths]
+        sources = [SequenceSource(reader, name) for reader in readers for name in reader.sequences.keys()]
+        return write_psa_sequences(fp, sources, observer)
+
+
+def extract_psa_sequences(path: Union[str, os.PathLike], fp: Union[BinaryIO, str, os.PathLike],
+                          sequence_names: Iterable[str], observer: Optional[SectionObserver] = None) -> Psa:
+    """
+    Writes a subset of the sequences of a PSA file to a new file, in the given order.
+    Split a file by extracting each group of sequences to its own file.
+    """
+    with PsaReader(path) as reader:
+        return write_psa_sequences(fp, [SequenceSource(reader, name) for name in sequence_names], observer)
+
+
+__all__ = [
+    'COPY_BUFFER_SIZE',
+    'SequenceSource',
+    'check_bones_match',
+    'write_psa_sequences',
+    'merge_psa_files',
+    'extract_psa_sequences'
+]
+
+
+def __dir__():
+    return __all__
@@ -0,0 +1,128 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .data import Psa
+from .reader import data_matrix_to_key_array
+
+# Below this angle between two rotations, spherical interpolation is replaced by a normalized linear interpolation,
+# which is indistinguishable and avoids dividing by a vanishing sine.
+SLERP_DOT_THRESHOLD = 0.9995
+
+
+def slerp_quaternions(q0: np.ndarray, q1: np.ndarray, t: np.ndarray) -> np.ndarray:
+    """
+    Spherically interpolates between two arrays of quaternions, taking the shortest path between each pair.
+
+    @param q0: The start quaternions, with a trailing axis of 4.
+    @param q1: The end quaternions, with the same shape as `q0`.
+    @param t: The interpolation factors, broadcastable against `q0` without its trailing axis.
+    @return: The normalized interpolated quaternions, as float64.
+    """
+    q0 = np.asarray(q0, dtype=np.float64)
+    q1 = np.asarray(q1, dtype=np.float64)
+    t = np.asarray(t, dtype=np.float64)[..., np.newaxis]
+    dot = np.sum(q0 * q1, axis=-1, keepdims=True)
+    # Hemisphere correction: q and -q are the same rotation, so flip the end to take the short way around.
+    q1 = np.where(dot < 0.0, -q1, q1)
+    dot = np.abs(dot)
+    theta = np.arccos(np.minimum(dot, 1.0))
+    sin_theta = np.sin(theta)
+    is_linear = dot > SLERP_DOT_THRESHOLD
+    safe_sin_theta = np.where(is_linear, 1.0, sin_theta)
+    w0 = np.where(is_linear, 1.0 - t, np.sin((1.0 - t) * theta) / safe_sin_theta)
+    w1 = np.where(is_linear, t, np.sin(t * theta) / safe_sin_theta)
+    q = w0 * q0 + w1 * q1
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+
+def resample_data_matrix(matrix: np.ndarray, frame_count: int) -> np.ndarray:
+    """
+    Retimes a data matrix to a new number of frames spanning the same interval.
+
+    The first and last frames are kept as they are. Frames in between are interpolated from their two nearest source
+    frames, using spherical interpolation for rotations and linear interpolation for locations. All bones are
+    interpolated at once.
+
+    @param matrix: An FxBx7 data matrix, as returned by `PsaReader.read_sequence_data_matrix`.
+    @param frame_count: The number of frames to resample to.
+    @return: A frame_count x B x 7 data matrix with the same dtype as `matrix`.
+    """
+    matrix = np.asarray(matrix)
+    if matrix.ndim != 3 or matrix.shape[2] != 7:
+        raise ValueError(f'Data matrix must have a shape of FxBx7 (got {matrix.shape})')
+    if frame_count < 1:
+        raise ValueError(f'Frame count must be at least 1 (got {frame_count})')
+    source_frame_count = matrix.shape[0]
+    if source_frame_count == 0:
+        raise ValueError('Cannot resample a data matrix with no frames')
+    if source_frame_count == 1 or frame_count == 1:
+        return np.repeat(matrix[:1], frame_count, axis=0)
+    positions = np.linspace(0.0, source_frame_count - 1, frame_count)
+    lower = np.minimum(positions.astype(np.intp), source_frame_count - 2)
+    upper = lower + 1
+    t = (positions - lower)[:, np.newaxis]
+    result = np.empty((frame_count,) + matrix.shape[1:], dtype=matrix.dtype)
+    result[:, :, 0:4] = slerp_quaternions(matrix[lower, :, 0:4], matrix[upper, :, 0:4], t)
+    locations = matrix[:, :, 4:7].astype(np.float64)
+    result[:, :, 4:7] = locations[lower] + (locations[upper] - locations[lower]) * t[..., np.newaxis]
+    return result
+
+
+def get_resampled_frame_count(frame_count: int, fps: float, target_fps: float) -> int:
+    """
+    @return: The number of frames needed to cover a sequence of `frame_count` frames at `fps` when played at
+    `target_fps`.
+    """
+    if fps <= 0.0 or target_fps <= 0.0:
+        raise ValueError(f'Frame rates must be positive (got {fps} and {target_fps})')
+    return max(1, int(round((frame_count - 1) * target_fps / fps)) + 1)
+
+
+def resample_sequence(sequence: Psa.Sequence, matrix: np.ndarray, fps: Optional[float] = None,
+                      frame_count: Optional[int] = None) -> Tuple[Psa.Sequence, np.ndarray]:
+    """
+    Resamples a sequence to a new frame rate or frame count.
+
+    The returned sequence is a copy of `sequence` with its `fps`, `frame_count` and `track_time` updated. Its
+    `frame_start_index` must be set by the caller when it is placed in a `Psa` along with other sequences, and the keys
+    appended to `Psa.keys` at that index before calling `write_psa`.
+
+    @param sequence: The sequence to resample.
+    @param matrix: The FxBx7 data matrix of the sequence.
+    @param fps: The frame rate to resample to. The duration of the sequence is kept.
+    @param frame_count: The number of frames to resample to. The frame rate is scaled so the duration is kept.
+    @return: The new sequence and its keys, as an array with the `KEY_DTYPE` dtype. Key times are set to the duration
+    of a frame, as exporters do.
+    """
+    if (fps is None) == (frame_count is None):
+        raise ValueError('Exactly one of fps and frame_count must be given')
+    source_frame_count = matrix.shape[0]
+    if fps is None:
+        fps = sequence.fps
+        if source_frame_count > 1 and frame_count > 1:
+            fps = sequence.fps * (frame_count - 1) / (source_frame_count - 1)
+    else:
+        frame_count = get_resampled_frame_count(source_frame_count, sequence.fps, fps)
+
+    resampled = Psa.Sequence.from_buffer_copy(sequence)
+    resampled.fps = fps
+    resampled.frame_count = frame_count
+    resampled.frame_start_index = 0
+    if source_frame_count > 0:
+        resampled.track_time = sequence.track_time * frame_count / source_frame_count
+
+    keys = data_matrix_to_key_array(resample_data_matrix(matrix, frame_count), 1.0 / fps)
+    return resampled, keys
+
+
+__all__ = [
+    'slerp_quaternions',
+    'resample_data_matrix',
+    'get_resampled_frame_count',
+    'resample_sequence'
+]
+
+
+def __dir__():
+    return __all__
@@ -1,35 +1,201 @@
-from ctypes import Structure, sizeof
-from typing import Optional, Type, Collection, BinaryIO
+import os
+import shutil
+import tempfile
+from ctypes import sizeof
+from typing import BinaryIO, List, Optional, Sequence, Union
 
 from .data import Psa
-from ..shared.data import PsxBone, Section
+from ..shared.data import Section, PsxBone
+from ..shared.profiling import SectionObserver, SectionTimer, tell
+from ..shared.writer import get_section_payload, write_section
 
 
-def _write_section(fp, name: bytes, data_type: Optional[Type[Structure]] = None, data: Optional[Collection] = None):
-    section = Section()
-    section.name = name
-    if data_type is not None and data is not None:
-        section.data_size = sizeof(data_type)
-        section.data_count = len(data)
-    fp.write(section)
-    if data is not None:
-        for datum in data:
-            fp.write(datum)
+def write_psa(psa: Psa, fp: BinaryIO, observer: Optional[SectionObserver] = None):
+    """
+    Writes a PSA file.
+    `psa.keys` can be a list of `Psa.Key`, an array with the `KEY_DTYPE` dtype (of any shape) or a bytes-like object.
+    Each section is written with a bounded number of large writes.
+    If `observer` is set, it is called with a `SectionEvent` for each section written.
+    """
+    write_section(fp, b'ANIMHEAD', observer=observer)
+    write_section(fp, b'BONENAMES', PsxBone, psa.bones, observer)
+    write_section(fp, b'ANIMINFO', Psa.Sequence, list(psa.sequences.values()), observer)
+    write_section(fp, b'ANIMKEYS', Psa.Key, psa.keys, observer)
 
 
-def write_psa(psa: Psa, fp: BinaryIO):
-    _write_section(fp, b'ANIMHEAD')
-    _write_section(fp, b'BONENAMES', PsxBone, psa.bones)
-    _write_section(fp, b'ANIMINFO', Psa.Sequence, list(psa.sequences.values()))
-    _write_section(fp, b'ANIMKEYS', Psa.Key, psa.keys)
+def write_psa_to_file(psa: Psa, path: str, observer: Optional[SectionObserver] = None):
+    with open(path, 'wb') as fp:
+        write_psa(psa, fp, observer)
 
 
-def write_psa_to_file(psa: Psa, path: str):
-    with open(path, 'wb') as fp:
-        write_psa(psa, fp)
+class PsaWriter(object):
+    """
+    Writes a PSA file one sequence at a time, so that only the keys of the sequence being added are held in memory.
+
+    The keys of each sequence are written as soon as it is added, and the ANIMINFO section, which comes before them in
+    the file, is completed when the writer is closed:
+
+    * If `sequence_count` is given and the file is seekable, space for the ANIMINFO section is reserved up front and
+      filled in on close. Exactly `sequence_count` sequences must be added.
+    * Otherwise, keys are spooled to a temporary file (in `spool_directory`, if given) and copied after the headers on
+      close.
+
+    If `sequence_count` is given, :close raises a `ValueError` without writing anything if a different number of
+    sequences was added, and the writer stays open so that the missing sequences can still be added. If the `with` block
+    exits with an exception, or closing it fails, the writer is released without completing the file: a file that the
+    writer opened from a path is deleted, since it would otherwise look like a valid file with empty ANIMINFO records,
+    while a file object given by the caller is left incomplete.
+
+    Example:
+
+        with PsaWriter('out.psa', bones) as writer:
+            for sequence, keys in baked_sequences():
+                writer.add_sequence(sequence, keys)
+    """
+
+    def __init__(self, fp: Union[BinaryIO, str, os.PathLike], bones: Sequence[PsxBone],
+                 sequence_count: Optional[int] = None, observer: Optional[SectionObserver] = None,
+                 spool_directory: Optional[str] = None):
+        """
+        @param fp: The file to write to, or its path.
+        @param bones: The bones of the animation.
+        @param sequence_count: The number of sequences that will be added, if known.
+        @param observer: If set, called with a `SectionEvent` for each section, and for the keys of each sequence.
+        @param spool_directory: The directory of the temporary file that keys are spooled to, if one is needed.
+        """
+        self._owns_file = isinstance(fp, (str, os.PathLike))
+        self._path = fp if self._owns_file else None
+        self.fp: BinaryIO = open(fp, 'wb') if self._owns_file else fp
+        self.bones: List[PsxBone] = list(bones)
+        self.sequences: List[Psa.Sequence] = []
+        self.sequence_count = sequence_count
+        self.observer = observer
+        self.frame_count = 0
+        self.is_closed = False
+        self._spool: Optional[BinaryIO] = None
+        self._sequences_offset = 0
+        self._keys_section_offset = 0
+        is_seekable = self.fp.seekable() if hasattr(self.fp, 'seekable') else False
+        if sequence_count is not None and is_seekable:
+            write_section(self.fp, b'ANIMHEAD', observer=observer)
+            write_section(self.fp, b'BONENAMES', PsxBone, self.bones, observer)
+            self._write_section_header(b'ANIMINFO', Psa.Sequence, sequence_count)
+            self._sequences_offset = self.fp.tell()
+            self.fp.seek(sequence_count * sizeof(Psa.Sequence), os.SEEK_CUR)
+            self._keys_section_offset = self.fp.tell()
+            self._write_section_header(b'ANIMKEYS', Psa.Key, 0)
+        else:
+            self._spool = tempfile.TemporaryFile(dir=spool_directory)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            try:
+                self.close()
+            except BaseException:
+                self._abort()
+                raise
+        else:
+            self._abort()
+
+    @property
+    def key_count(self) -> int:
+        return self.frame_count * len(self.bones)
+
+    def add_sequence(self, sequence: Psa.Sequence, keys) -> Psa.Sequence:
+        """
+        Adds a sequence and writes its keys.
+
+        @param sequence: The sequence. Its `bone_count`, `frame_start_index` and `frame_count` are filled in.
+        @param keys: The keys of the sequence, frame by frame, in any form accepted by :write_psa (e.g., an FxB array
+        with the `KEY_DTYPE` dtype).
+        @return: The copy of the sequence that will be written.
+        """
+        if self.is_closed:
+            raise ValueError('Cannot add a sequence to a closed writer')
+        if self.sequence_count is not None and len(self.sequences) >= self.sequence_count:
+            raise ValueError(f'Cannot add more than the {self.sequence_count} sequences the writer was created for')
+        timer = SectionTimer(self.observer)
+        payload = get_section_payload(keys, Psa.Key)
+        key_count = len(keys) if payload is None else payload.nbytes // sizeof(Psa.Key)
+        bone_count = len(self.bones)
+        if bone_count == 0 or key_count % bone_count != 0:
+            raise ValueError(f'The number of keys ({key_count}) must be a multiple of the number of bones ({bone_count})')
+        sequence = Psa.Sequence.from_buffer_copy(sequence)
+        sequence.bone_count = bone_count
+        sequence.frame_start_index = self.frame_count
+        sequence.frame_count = key_count // bone_count
+        fp = self._spool if self._spool is not None else self.fp
+        offset = tell(fp) if self.observer is not None else -1
+        if payload is not None:
+            fp.write(payload)
+        else:
+            fp.write(b''.join(keys))
+        timer.report('write', b'ANIMKEYS', offset, sizeof(Psa.Key), key_count)
+        self.sequences.append(sequence)
+        self.frame_count += sequence.frame_count
+        return sequence
+
+    def close(self):
+        """
+        Completes the file. Closes it as well if the writer was given a path.
+
+        @raise ValueError: If `sequence_count` was given and a different number of sequences was added. Nothing is
+        written and the writer stays open.
+        """
+        if self.is_closed:
+            return
+        if self.sequence_count is not None and len(self.sequences) != self.sequence_count:
+            raise ValueError(f'Expected {self.sequence_count} sequences to be added (got {len(self.sequences)})')
+        try:
+            if self._spool is not None:
+                write_section(self.fp, b'ANIMHEAD', observer=self.observer)
+                write_section(self.fp, b'BONENAMES', PsxBone, self.bones, self.observer)
+                write_section(self.fp, b'ANIMINFO', Psa.Sequence, self.sequences, self.observer)
+                self._write_section_header(b'ANIMKEYS', Psa.Key, self.key_count)
+                self._spool.seek(0)
+                shutil.copyfileobj(self._spool, self.fp, 1 << 20)
+            else:
+                end_offset = self.fp.tell()
+                timer = SectionTimer(self.observer)
+                self.fp.seek(self._sequences_offset)
+                self.fp.write(b''.join(self.sequences))
+                timer.report('write', b'ANIMINFO', self._sequences_offset, sizeof(Psa.Sequence), len(self.sequences))
+                self.fp.seek(self._keys_section_offset)
+                self._write_section_header(b'ANIMKEYS', Psa.Key, self.key_count)
+                self.fp.seek(end_offset)
+        finally:
+            self._release()
+
+    def _write_section_header(self, name: bytes, data_type, data_count: int):
+        section = Section()
+        section.name = name
+        section.data_size = sizeof(data_type)
+        section.data_count = data_count
+        self.fp.write(section)
+
+    def _abort(self):
+        # Releases the writer without completing the file, and deletes the file if the writer created it.
+        self._release()
+        if self._owns_file:
+            try:
+                os.remove(self._path)
+            except FileNotFoundError:
+                pass
+
+    def _release(self):
+        self.is_closed = True
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+        if self._owns_file:
+            self.fp.close()
 
 
 __all__ = [
+    'PsaWriter',
     'write_psa',
     'write_psa_to_file'
 ]
@@ -1,3 +1,10 @@
 from . import data
 from . import reader
 from . import writer
+from . import arrays
+from . import weights
+from . import welding
+from . import skinning
+from . import bounds
+from . import partition
+from . import normals
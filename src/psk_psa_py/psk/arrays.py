@@ -0,0 +1,253 @@
+from typing import List, Optional
+
+import numpy as np
+
+from .weights import sort_and_normalize_weight_arrays
+from .data import Psk, WEDGE16_DTYPE, WEDGE32_DTYPE, FACE_DTYPE, FACE32_DTYPE, WEIGHT_DTYPE, MORPH_DATA_DTYPE
+from ..shared.arrays import structures_to_array, array_to_structures
+from ..shared.data import Color, PsxBone, Vector2, Vector3, COLOR_DTYPE, VECTOR2_DTYPE, VECTOR3_DTYPE
+
+
+class PskArrays(object):
+    """
+    A columnar (struct-of-arrays) counterpart to `Psk`.
+
+    Each per-element section is stored as one or more NumPy arrays instead of a list of ctypes objects, which keeps
+    large meshes compact in memory and lets them be processed with array operations.
+    Small sections (materials, bones and morph infos) are kept as lists of their ctypes structures.
+    Use :from_psk and :to_psk to convert to and from the object model.
+    """
+
+    def __init__(self):
+        self.points: np.ndarray = np.empty((0, 3), dtype=np.float32)
+        self.wedge_point_indices: np.ndarray = np.empty(0, dtype=np.uint32)
+        self.wedge_uvs: np.ndarray = np.empty((0, 2), dtype=np.float32)
+        self.wedge_material_indices: np.ndarray = np.empty(0, dtype=np.uint32)
+        self.face_wedge_indices: np.ndarray = np.empty((0, 3), dtype=np.uint32)
+        self.face_material_indices: np.ndarray = np.empty(0, dtype=np.uint8)
+        self.face_aux_material_indices: np.ndarray = np.empty(0, dtype=np.uint8)
+        self.face_smoothing_groups: np.ndarray = np.empty(0, dtype=np.int32)
+        self.materials: List[Psk.Material] = []
+        self.bones: List[PsxBone] = []
+        self.weight_values: np.ndarray = np.empty(0, dtype=np.float32)
+        self.weight_point_indices: np.ndarray = np.empty(0, dtype=np.int32)
+        self.weight_bone_indices: np.ndarray = np.empty(0, dtype=np.int32)
+        self.extra_uvs: List[np.ndarray] = []
+        self.vertex_colors: np.ndarray = np.empty((0, 4), dtype=np.uint8)
+        self.vertex_normals: np.ndarray = np.empty((0, 3), dtype=np.float32)
+        self.morph_infos: List[Psk.MorphInfo] = []
+        self.morph_position_deltas: np.ndarray = np.empty((0, 3), dtype=np.float32)
+        self.morph_tangent_z_deltas: np.ndarray = np.empty((0, 3), dtype=np.float32)
+        self.morph_point_indices: np.ndarray = np.empty(0, dtype=np.int32)
+        self.material_references: List[str] = []
+
+    @property
+    def point_count(self) -> int:
+        return len(self.points)
+
+    @property
+    def wedge_count(self) -> int:
+        return len(self.wedge_point_indices)
+
+    @property
+    def face_count(self) -> int:
+        return len(self.face_wedge_indices)
+
+    @property
+    def has_extra_uvs(self):
+        return len(self.extra_uvs) > 0
+
+    @property
+    def has_vertex_colors(self):
+        return len(self.vertex_colors) > 0
+
+    @property
+    def has_vertex_normals(self):
+        return len(self.vertex_normals) > 0
+
+    @property
+    def has_material_references(self):
+        return len(self.material_references) > 0
+
+    @property
+    def has_morph_data(self):
+        return len(self.morph_infos) > 0
+
+    def set_wedges(self, wedges: np.ndarray):
+        """
+        Sets the wedge columns from a structured array with the `WEDGE16_DTYPE` or `WEDGE32_DTYPE` dtype.
+        """
+        self.wedge_point_indices = wedges['point_index'].astype(np.uint32)
+        self.wedge_uvs = np.stack((wedges['u'], wedges['v']), axis=-1).astype(np.float32, copy=False)
+        self.wedge_material_indices = wedges['material_index'].astype(np.uint32)
+
+    def get_wedges(self, dtype: np.dtype = WEDGE16_DTYPE) -> np.ndarray:
+        """
+        Returns the wedges as a structured array with the `WEDGE16_DTYPE` or `WEDGE32_DTYPE` dtype.
+        """
+        wedges = np.zeros(self.wedge_count, dtype=dtype)
+        wedges['point_index'] = self.wedge_point_indices
+        wedges['u'] = self.wedge_uvs[:, 0]
+        wedges['v'] = self.wedge_uvs[:, 1]
+        wedges['material_index'] = self.wedge_material_indices
+        return wedges
+
+    def set_faces(self, faces: np.ndarray):
+        """
+        Sets the face columns from a structured array with the `FACE_DTYPE` or `FACE32_DTYPE` dtype.
+        """
+        self.face_wedge_indices = faces['wedge_indices'].astype(np.uint32)
+        self.face_material_indices = faces['material_index'].copy()
+        self.face_aux_material_indices = faces['aux_material_index'].copy()
+        self.face_smoothing_groups = faces['smoothing_groups'].copy()
+
+    def get_faces(self, dtype: np.dtype = FACE_DTYPE) -> np.ndarray:
+        """
+        Returns the faces as a structured array with the `FACE_DTYPE` or `FACE32_DTYPE` dtype.
+        """
+        faces = np.zeros(self.face_count, dtype=dtype)
+        faces['wedge_indices'] = self.face_wedge_indices
+        faces['material_index'] = self.face_material_indices
+        faces['aux_material_index'] = self.face_aux_material_indices
+        faces['smoothing_groups'] = self.face_smoothing_groups
+        return faces
+
+    def set_weights(self, weights: np.ndarray):
+        """
+        Sets the weight columns from a structured array with the `WEIGHT_DTYPE` dtype.
+        """
+        self.weight_values = weights['weight'].copy()
+        self.weight_point_indices = weights['point_index'].copy()
+        self.weight_bone_indices = weights['bone_index'].copy()
+
+    def get_weights(self) -> np.ndarray:
+        """
+        Returns the weights as a structured array with the `WEIGHT_DTYPE` dtype.
+        """
+        weights = np.zeros(len(self.weight_values), dtype=WEIGHT_DTYPE)
+        weights['weight'] = self.weight_values
+        weights['point_index'] = self.weight_point_indices
+        weights['bone_index'] = self.weight_bone_indices
+        return weights
+
+    def sort_and_normalize_weights(self, max_influences: Optional[int] = None):
+        """
+        Sorts the weights by point index and normalizes the weights of each point so that they sum to one.
+
+        @param max_influences: If set, only the largest `max_influences` weights of each point are kept.
+        """
+        order, values = sort_and_normalize_weight_arrays(self.weight_point_indices, self.weight_values, max_influences)
+        self.weight_values = values
+        self.weight_point_indices = self.weight_point_indices[order]
+        self.weight_bone_indices = self.weight_bone_indices[order]
+
+    def set_morph_data(self, morph_data: np.ndarray):
+        """
+        Sets the morph data columns from a structured array with the `MORPH_DATA_DTYPE` dtype.
+        """
+        self.morph_position_deltas = morph_data['position_delta'].copy()
+        self.morph_tangent_z_deltas = morph_data['tangent_z_delta'].copy()
+        self.morph_point_indices = morph_data['point_index'].copy()
+
+    def get_morph_data(self) -> np.ndarray:
+        """
+        Returns the morph data as a structured array with the `MORPH_DATA_DTYPE` dtype.
+        """
+        morph_data = np.zeros(len(self.morph_point_indices), dtype=MORPH_DATA_DTYPE)
+        morph_data['position_delta'] = self.morph_position_deltas
+        morph_data['tangent_z_delta'] = self.morph_tangent_z_deltas
+        morph_data['point_index'] = self.morph_point_indices
+        return morph_data
+
+    @classmethod
+    def from_psk(cls, psk: Psk) -> 'PskArrays':
+        """
+        Converts a `Psk` into its columnar representation.
+        """
+        psk_arrays = cls()
+        psk_arrays.points = structures_to_array(psk.points, VECTOR3_DTYPE)
+        psk_arrays.set_wedges(wedges_to_array(psk.wedges))
+        psk_arrays.set_faces(faces_to_array(psk.faces))
+        psk_arrays.materials = list(psk.materials)
+        psk_arrays.bones = list(psk.bones)
+        psk_arrays.set_weights(structures_to_array(psk.weights, WEIGHT_DTYPE))
+        psk_arrays.extra_uvs = [structures_to_array(extra_uvs, VECTOR2_DTYPE) for extra_uvs in psk.extra_uvs]
+        psk_arrays.vertex_colors = structures_to_array(psk.vertex_colors, COLOR_DTYPE)
+        psk_arrays.vertex_normals = structures_to_array(psk.vertex_normals, VECTOR3_DTYPE)
+        psk_arrays.morph_infos = list(psk.morph_infos)
+        psk_arrays.set_morph_data(structures_to_array(psk.morph_data, MORPH_DATA_DTYPE))
+        psk_arrays.material_references = list(psk.material_references)
+        return psk_arrays
+
+    def to_psk(self) -> Psk:
+        """
+        Converts the columnar representation into a `Psk`.
+
+        Wedges and faces are created with the 32-bit structures only when their values do not fit the 16-bit ones.
+        """
+        psk = Psk()
+        psk.points = array_to_structures(Vector3, self.points.astype(np.float32, copy=False))
+        if self.wedge_count > 0 and self.wedge_material_indices.max() > 0xFF:
+            psk.wedges = array_to_structures(Psk._Wedge32, self.get_wedges(WEDGE32_DTYPE))
+        else:
+            psk.wedges = array_to_structures(Psk._Wedge16, self.get_wedges(WEDGE16_DTYPE))
+        if self.face_count > 0 and self.face_wedge_indices.max() > 0xFFFF:
+            psk.faces = array_to_structures(Psk._Face32, self.get_faces(FACE32_DTYPE))
+        else:
+            psk.faces = array_to_structures(Psk.Face, self.get_faces(FACE_DTYPE))
+        psk.materials = list(self.materials)
+        psk.bones = list(self.bones)
+        psk.weights = array_to_structures(Psk.Weight, self.get_weights())
+        psk.extra_uvs = [array_to_structures(Vector2, extra_uvs.astype(np.float32, copy=False)) for extra_uvs in self.extra_uvs]
+        psk.vertex_colors = array_to_structures(Color, self.vertex_colors.astype(np.uint8, copy=False))
+        psk.vertex_normals = array_to_structures(Vector3, self.vertex_normals.astype(np.float32, copy=False))
+        psk.morph_infos = list(self.morph_infos)
+        psk.morph_data = array_to_structures(Psk.MorphData, self.get_morph_data())
+        psk.material_references = list(self.material_references)
+        return psk
+
+
+def wedges_to_array(wedges) -> np.ndarray:
+    """
+    Converts a list of wedges (`Psk.Wedge`, `Psk._Wedge16` or `Psk._Wedge32`) into a structured array.
+    Arrays are returned unchanged.
+    """
+    if isinstance(wedges, np.ndarray):
+        return wedges
+    if len(wedges) > 0 and all(isinstance(wedge, Psk._Wedge16) for wedge in wedges):
+        return structures_to_array(wedges, WEDGE16_DTYPE)
+    # `Psk.Wedge` is a plain object (and may be mixed with the structure types), so gather its fields one by one.
+    array = np.zeros(len(wedges), dtype=WEDGE32_DTYPE)
+    array['point_index'] = np.fromiter((wedge.point_index for wedge in wedges), dtype=np.uint32, count=len(wedges))
+    array['u'] = np.fromiter((wedge.u for wedge in wedges), dtype=np.float32, count=len(wedges))
+    array['v'] = np.fromiter((wedge.v for wedge in wedges), dtype=np.float32, count=len(wedges))
+    array['material_index'] = np.fromiter((wedge.material_index for wedge in wedges), dtype=np.uint32, count=len(wedges))
+    return array
+
+
+def faces_to_array(faces) -> np.ndarray:
+    """
+    Converts a list of faces (`Psk.Face` or `Psk._Face32`) into a structured array.
+    Arrays are returned unchanged.
+    """
+    if isinstance(faces, np.ndarray):
+        return faces
+    if all(isinstance(face, Psk.Face) for face in faces):
+        return structures_to_array(faces, FACE_DTYPE)
+    if all(isinstance(face, Psk._Face32) for face in faces):
+        return structures_to_array(faces, FACE32_DTYPE)
+    array = np.zeros(len(faces), dtype=FACE32_DTYPE)
+    for i, face in enumerate(faces):
+        array[i] = (tuple(face.wedge_indices), face.material_index, face.aux_material_index, face.smoothing_groups)
+    return array
+
+
+__all__ = [
+    'PskArrays',
+    'wedges_to_array',
+    'faces_to_array'
+]
+
+
+def __dir__():
+    return __all__
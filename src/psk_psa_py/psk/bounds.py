@@ -0,0 +1,166 @@
+from typing import Iterable, Iterator, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+
+from .data import Psk
+from .skinning import Skinner
+from ..psa.pose import quaternion_rotate
+from ..psa.reader import PsaReader
+from ..shared.data import PsxBone
+
+# Bounds are stored as a 2x3 array of the minimum and maximum corners. Empty bounds are all NaN.
+
+
+class SequenceBounds(NamedTuple):
+    sequence_name: str
+    frame_bounds: np.ndarray
+    """An Fx2x3 array of the bounds of the mesh on each frame."""
+    bounds: np.ndarray
+    """The 2x3 bounds of the mesh over the whole sequence."""
+
+
+def compute_bone_bounds(skinner: Skinner, min_weight: float = 0.0) -> np.ndarray:
+    """
+    Computes the bounds of the points influenced by each bone, in the space of that bone in its reference pose.
+
+    @param skinner: The skinned mesh.
+    @param min_weight: Points are only counted for bones whose normalized weight on them is greater than this.
+    @return: A Bx2x3 array of bounds, where B is the number of bones. Bones that influence no points have NaN bounds.
+    """
+    bone_bounds = np.full((len(skinner.bones), 2, 3), np.nan)
+    weight_counts = np.diff(np.append(skinner.weight_starts, len(skinner.weight_values)))
+    point_indices = np.repeat(skinner.weighted_point_indices, weight_counts)
+    is_influenced = skinner.weight_values > min_weight
+    point_indices = point_indices[is_influenced]
+    bone_indices = skinner.weight_bone_indices[is_influenced]
+    if len(bone_indices) == 0:
+        return bone_bounds
+    local_points = quaternion_rotate(skinner.inverse_bind_rotations[bone_indices], skinner.points[point_indices]) + \
+        skinner.inverse_bind_locations[bone_indices]
+    order = np.argsort(bone_indices, kind='stable')
+    bone_indices = bone_indices[order]
+    local_points = local_points[order]
+    bones, starts = np.unique(bone_indices, return_index=True)
+    bone_bounds[bones, 0] = np.minimum.reduceat(local_points, starts, axis=0)
+    bone_bounds[bones, 1] = np.maximum.reduceat(local_points, starts, axis=0)
+    return bone_bounds
+
+
+def compute_frame_bounds(skinner: Skinner, matrix: np.ndarray, psa_bones: Optional[Sequence[PsxBone]] = None,
+                         frame_chunk_size: Optional[int] = 32) -> np.ndarray:
+    """
+    Computes the exact bounds of the skinned mesh on each frame of an animation.
+
+    @param skinner: The skinned mesh.
+    @param matrix: An FxBx7 data matrix, as returned by `PsaReader.read_sequence_data_matrix`.
+    @param psa_bones: The bones of the animation, if they differ from those of the mesh (see `Skinner.get_local_pose`).
+    @param frame_chunk_size: The number of frames to deform at once. Only the positions of one chunk are held in memory.
+    @return: An Fx2x3 array of bounds.
+    """
+    matrix = np.asarray(matrix)
+    frame_count = len(matrix)
+    frame_bounds = np.full((frame_count, 2, 3), np.nan)
+    if len(skinner.points) == 0:
+        return frame_bounds
+    if frame_chunk_size is None:
+        frame_chunk_size = max(frame_count, 1)
+    for frame_start in range(0, frame_count, frame_chunk_size):
+        frames = slice(frame_start, frame_start + frame_chunk_size)
+        positions = skinner.deform(matrix[frames], psa_bones, dtype=np.float64)
+        frame_bounds[frames, 0] = positions.min(axis=1)
+        frame_bounds[frames, 1] = positions.max(axis=1)
+    return frame_bounds
+
+
+def compute_conservative_frame_bounds(skinner: Skinner, matrix: np.ndarray, bone_bounds: np.ndarray,
+                                      psa_bones: Optional[Sequence[PsxBone]] = None) -> np.ndarray:
+    """
+    Computes bounds that contain the skinned mesh on each frame of an animation, from the per-bone bounds alone.
+
+    The corners of each bone's bounds are moved with the bone, so the cost is independent of the number of points.
+    The result contains the exact bounds, provided `bone_bounds` was computed with a `min_weight` of zero.
+
+    @param skinner: The skinned mesh.
+    @param matrix: An FxBx7 data matrix.
+    @param bone_bounds: The per-bone bounds, as returned by :compute_bone_bounds.
+    @param psa_bones: The bones of the animation, if they differ from those of the mesh.
+    @return: An Fx2x3 array of bounds.
+    """
+    frame_bounds = np.full((len(matrix), 2, 3), np.nan)
+    has_bounds = ~np.isnan(bone_bounds[:, 0, 0])
+    if len(matrix) == 0 or not has_bounds.any():
+        return frame_bounds
+    skinning_matrices = skinner.get_skinning_matrices(matrix, psa_bones)[:, has_bounds]
+    bone_bounds = bone_bounds[has_bounds]
+    # The eight corners of each box, in the reference pose space of the mesh.
+    corner_selectors = np.array([[(i >> axis) & 1 for axis in range(3)] for i in range(8)])
+    local_corners = bone_bounds[:, corner_selectors, [0, 1, 2]]
+    reference_rotations = skinner.inverse_bind_rotations[has_bounds] * [1.0, -1.0, -1.0, -1.0]
+    reference_locations = -quaternion_rotate(reference_rotations, skinner.inverse_bind_locations[has_bounds])
+    corners = quaternion_rotate(reference_rotations[:, np.newaxis], local_corners) + reference_locations[:, np.newaxis]
+    corners = np.einsum('fbij,bcj->fbci', skinning_matrices[..., 0:3], corners) + skinning_matrices[..., np.newaxis, :, 3]
+    corners = corners.reshape(len(matrix), -1, 3)
+    frame_bounds[:, 0] = corners.min(axis=1)
+    frame_bounds[:, 1] = corners.max(axis=1)
+    if len(skinner.weighted_point_indices) < len(skinner.points):
+        # Points without weights stay where they are.
+        is_static = np.ones(len(skinner.points), dtype=bool)
+        is_static[skinner.weighted_point_indices] = False
+        static_points = skinner.points[is_static]
+        frame_bounds[:, 0] = np.minimum(frame_bounds[:, 0], static_points.min(axis=0))
+        frame_bounds[:, 1] = np.maximum(frame_bounds[:, 1], static_points.max(axis=0))
+    return frame_bounds
+
+
+def union_bounds(bounds: np.ndarray) -> np.ndarray:
+    """
+    @param bounds: An array of bounds with a shape of ...x2x3.
+    @return: The 2x3 bounds that contain all of them, ignoring empty bounds.
+    """
+    bounds = np.asarray(bounds).reshape(-1, 2, 3)
+    bounds = bounds[~np.isnan(bounds[:, 0, 0])]
+    if len(bounds) == 0:
+        return np.full((2, 3), np.nan)
+    return np.stack([bounds[:, 0].min(axis=0), bounds[:, 1].max(axis=0)])
+
+
+def iter_sequence_bounds(psk: Union[Psk, Skinner], psa_reader: PsaReader, sequence_names: Optional[Iterable[str]] = None,
+                         conservative: bool = False, frame_chunk_size: Optional[int] = 32) -> Iterator[SequenceBounds]:
+    """
+    Computes the bounds of a skinned mesh for each sequence of an animation.
+
+    Sequences are read and processed one at a time, so memory use does not grow with the number of sequences.
+
+    @param psk: The mesh, or a `Skinner` made from it, to avoid rebuilding it for every animation.
+    @param psa_reader: The animation.
+    @param sequence_names: The sequences to compute the bounds of. Defaults to all of them.
+    @param conservative: Compute the bounds from the per-bone bounds (see :compute_conservative_frame_bounds) instead
+    of deforming every point.
+    @param frame_chunk_size: The number of frames to deform at once, when not `conservative`.
+    @return: The bounds of each sequence, in order.
+    """
+    skinner = psk if isinstance(psk, Skinner) else Skinner.from_psk(psk)
+    bone_bounds = compute_bone_bounds(skinner) if conservative else None
+    if sequence_names is None:
+        sequence_names = list(psa_reader.sequences.keys())
+    for sequence_name in sequence_names:
+        matrix = psa_reader.read_sequence_data_matrix(sequence_name)
+        if conservative:
+            frame_bounds = compute_conservative_frame_bounds(skinner, matrix, bone_bounds, psa_reader.bones)
+        else:
+            frame_bounds = compute_frame_bounds(skinner, matrix, psa_reader.bones, frame_chunk_size)
+        yield SequenceBounds(sequence_name, frame_bounds, union_bounds(frame_bounds))
+
+
+__all__ = [
+    'SequenceBounds',
+    'compute_bone_bounds',
+    'compute_frame_bounds',
+    'compute_conservative_frame_bounds',
+    'union_bounds',
+    'iter_sequence_bounds'
+]
+
+
+def __dir__():
+    return __all__
@@ -1,6 +1,10 @@
 from ctypes import Structure, c_uint32, c_float, c_int32, c_uint8, c_int8, c_int16, c_char, c_uint16
-from typing import List
+from typing import List, Optional
 
+import numpy as np
+
+from .weights import sort_and_normalize_weight_arrays
+from ..shared.arrays import structures_to_array, array_to_structures
 from ..shared.data import Vector3, Quaternion, Color, Vector2, PsxBone, StructureEq
 
 
@@ -113,32 +117,21 @@ class Psk(object):
     def has_morph_data(self):
         return len(self.morph_infos) > 0
     
-    def sort_and_normalize_weights(self):
-        self.weights.sort(key=lambda x: x.point_index)
-
-        weight_index = 0
-        weight_total = len(self.weights)
-
-        while weight_index < weight_total:
-            point_index = self.weights[weight_index].point_index
-            weight_sum = self.weights[weight_index].weight
-            point_weight_total = 1
-
-            # Calculate the sum of weights for the current point_index.
-            for i in range(weight_index + 1, weight_total):
-                if self.weights[i].point_index != point_index:
-                    break
-                weight_sum += self.weights[i].weight
-                point_weight_total += 1
-
-            # Normalize the weights for the current point_index.
-            if weight_sum != 0.0:
-                for i in range(weight_index, weight_index + point_weight_total):
-                    self.weights[i].weight /= weight_sum
-
-            # Move to the next group of weights.
-            weight_index += point_weight_total
-    
+    def sort_and_normalize_weights(self, max_influences: Optional[int] = None):
+        """
+        Sorts the weights by point index and normalizes the weights of each point so that they sum to one.
+
+        @param max_influences: If set, only the largest `max_influences` weights of each point are kept.
+        """
+        weights = structures_to_array(self.weights, WEIGHT_DTYPE)
+        order, values = sort_and_normalize_weight_arrays(weights['point_index'], weights['weight'], max_influences)
+        weights = weights[order]
+        weights['weight'] = values
+        if isinstance(self.weights, np.ndarray):
+            self.weights = weights
+        else:
+            self.weights = array_to_structures(Psk.Weight, weights)
+
     def __init__(self):
         self.points: List[Vector3] = []
         self.wedges: List[Psk.Wedge] = []
@@ -153,8 +146,58 @@ class Psk(object):
         self.morph_data: List[Psk.MorphData] = []
         self.material_references: List[str] = []
 
+# NumPy mirrors of the on-disk structures, used to decode and encode whole sections at once.
+WEDGE16_DTYPE = np.dtype([
+    ('point_index', '<u4'),
+    ('u', '<f4'),
+    ('v', '<f4'),
+    ('material_index', 'u1'),
+    ('reserved', 'i1'),
+    ('padding2', '<i2')
+])
+
+WEDGE32_DTYPE = np.dtype([
+    ('point_index', '<u4'),
+    ('u', '<f4'),
+    ('v', '<f4'),
+    ('material_index', '<u4')
+])
+
+FACE_DTYPE = np.dtype({
+    'names': ['wedge_indices', 'material_index', 'aux_material_index', 'smoothing_groups'],
+    'formats': [('<u2', (3,)), 'u1', 'u1', '<i4'],
+    'offsets': [0, 6, 7, 8],
+    'itemsize': 12
+})
+
+FACE32_DTYPE = np.dtype([
+    ('wedge_indices', '<u4', (3,)),
+    ('material_index', 'u1'),
+    ('aux_material_index', 'u1'),
+    ('smoothing_groups', '<i4')
+])
+
+WEIGHT_DTYPE = np.dtype([
+    ('weight', '<f4'),
+    ('point_index', '<i4'),
+    ('bone_index', '<i4')
+])
+
+MORPH_DATA_DTYPE = np.dtype([
+    ('position_delta', '<f4', (3,)),
+    ('tangent_z_delta', '<f4', (3,)),
+    ('point_index', '<i4')
+])
+
+
 __all__ = [
-    'Psk'
+    'Psk',
+    'WEDGE16_DTYPE',
+    'WEDGE32_DTYPE',
+    'FACE_DTYPE',
+    'FACE32_DTYPE',
+    'WEIGHT_DTYPE',
+    'MORPH_DATA_DTYPE'
 ]
 
 def __dir__():
@@ -1,4 +1,5 @@
 from ctypes import Structure
+import numpy as np
 from ..shared.data import Color, Vector2, Vector3, Quaternion, PsxBone
 
 class Psk:
@@ -87,7 +88,7 @@ class Psk:
     def has_morph_data(self) -> bool:
         pass
     
-    def sort_and_normalize_weights(self):
+    def sort_and_normalize_weights(self, max_influences: int | None = None):
         pass
 
     points: list[Vector3] = []
@@ -102,3 +103,11 @@ class Psk:
     morph_infos: list[Psk.MorphInfo] = []
     morph_data: list[Psk.MorphData] = []
     material_references: list[str] = []
+
+
+WEDGE16_DTYPE: np.dtype
+WEDGE32_DTYPE: np.dtype
+FACE_DTYPE: np.dtype
+FACE32_DTYPE: np.dtype
+WEIGHT_DTYPE: np.dtype
+MORPH_DATA_DTYPE: np.dtype
@@ -0,0 +1,171 @@
+from typing import Optional, Union
+
+import numpy as np
+
+from .arrays import PskArrays, faces_to_array, wedges_to_array
+from .data import Psk
+from ..shared.arrays import array_to_structures, structures_to_array
+from ..shared.data import Vector3, VECTOR3_DTYPE
+
+WEIGHTINGS = ('area', 'angle', 'uniform')
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    # Normalizes each row, leaving zero-length rows as zero.
+    lengths = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, lengths, out=np.zeros_like(vectors), where=lengths > 0.0)
+
+
+def compute_face_normals(points: np.ndarray, face_point_indices: np.ndarray) -> np.ndarray:
+    """
+    @param points: An Nx3 array of point positions.
+    @param face_point_indices: An Mx3 array of the point index of each face corner.
+    @return: An Mx3 array of unit face normals. Degenerate faces have a zero normal.
+    """
+    corners = np.asarray(points, dtype=np.float64)[face_point_indices]
+    return _normalize(np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]))
+
+
+def _compute_corner_contributions(points: np.ndarray, face_point_indices: np.ndarray, weighting: str) -> np.ndarray:
+    # Returns the weighted face normal that each face corner contributes to the normal of its point (Mx3x3).
+    if weighting not in WEIGHTINGS:
+        raise ValueError(f'Unrecognized weighting "{weighting}" (expected one of {WEIGHTINGS})')
+    corners = np.asarray(points, dtype=np.float64)[face_point_indices]
+    cross = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    if weighting == 'area':
+        # The length of the cross product is twice the area of the face.
+        return np.repeat(cross[:, np.newaxis], 3, axis=1)
+    normals = _normalize(cross)
+    if weighting == 'uniform':
+        return np.repeat(normals[:, np.newaxis], 3, axis=1)
+    # The angle of each corner, between the edges to the next and previous corners.
+    next_edges = _normalize(np.roll(corners, -1, axis=1) - corners)
+    previous_edges = _normalize(np.roll(corners, 1, axis=1) - corners)
+    angles = np.arccos(np.clip(np.einsum('fci,fci->fc', next_edges, previous_edges), -1.0, 1.0))
+    return normals[:, np.newaxis] * angles[..., np.newaxis]
+
+
+def _sum_rows(indices: np.ndarray, values: np.ndarray, count: int) -> np.ndarray:
+    # Sums the rows of `values` that share an index (a faster `np.add.at` for a trailing axis of 3).
+    sums = np.empty((count, 3), dtype=np.float64)
+    for axis in range(3):
+        sums[:, axis] = np.bincount(indices, values[:, axis], minlength=count)
+    return sums
+
+
+def compute_corner_normals(points: np.ndarray, face_point_indices: np.ndarray,
+                           smoothing_groups: Optional[np.ndarray] = None, weighting: str = 'angle') -> np.ndarray:
+    """
+    Computes a normal for each face corner, smoothing across the faces that share its point and at least one
+    smoothing group bit with its face. Faces with no smoothing group bits set are flat shaded.
+
+    The faces around each point are grouped by their smoothing group bit masks, so the cost grows with the number of
+    distinct masks around a point rather than the number of faces.
+
+    @param points: An Nx3 array of point positions.
+    @param face_point_indices: An Mx3 array of the point index of each face corner.
+    @param smoothing_groups: The smoothing group bit mask of each face. If None, all faces are smoothed together.
+    @param weighting: How each face contributes to the normals of its corners: 'area' (by face area), 'angle' (by the
+    angle of the face at the corner) or 'uniform'.
+    @return: An Mx3x3 array of unit normals. Corners whose faces are all degenerate have a zero normal.
+    """
+    face_point_indices = np.asarray(face_point_indices, dtype=np.int64).reshape(-1, 3)
+    contributions = _compute_corner_contributions(points, face_point_indices, weighting).reshape(-1, 3)
+    corner_points = face_point_indices.reshape(-1)
+    if smoothing_groups is None:
+        sums = _sum_rows(corner_points, contributions, len(points))
+        return _normalize(sums[corner_points]).reshape(-1, 3, 3)
+
+    masks = np.repeat(np.asarray(smoothing_groups).astype(np.uint32).astype(np.int64), 3)
+    # Sum the contributions of each distinct (point, mask) pair. The keys sort by point first.
+    keys, inverse = np.unique((corner_points << 32) | masks, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    key_count = len(keys)
+    key_sums = _sum_rows(inverse, contributions, key_count)
+    # Faces without smoothing groups are flat, so they only take their own contribution.
+    is_flat = masks == 0
+    key_points = keys >> 32
+    key_masks = keys & 0xFFFFFFFF
+
+    # Pair every key with every key of the same point, and add up the pairs that share a smoothing group.
+    _, group_starts, group_counts = np.unique(key_points, return_index=True, return_counts=True)
+    key_group_counts = np.repeat(group_counts, group_counts)
+    key_group_starts = np.repeat(group_starts, group_counts)
+    pair_a = np.repeat(np.arange(key_count), key_group_counts)
+    pair_offsets = np.arange(len(pair_a)) - np.repeat(np.cumsum(key_group_counts) - key_group_counts, key_group_counts)
+    pair_b = np.repeat(key_group_starts, key_group_counts) + pair_offsets
+    is_shared = (key_masks[pair_a] & key_masks[pair_b]) != 0
+    smoothed_sums = _sum_rows(pair_a[is_shared], key_sums[pair_b[is_shared]], key_count)
+
+    normals = smoothed_sums[inverse]
+    normals[is_flat] = contributions[is_flat]
+    return _normalize(normals).reshape(-1, 3, 3)
+
+
+def compute_wedge_normals(psk_arrays: PskArrays, use_smoothing_groups: bool = True,
+                          weighting: str = 'angle') -> np.ndarray:
+    """
+    Computes a normal for each wedge of a mesh, as the average of the normals of the face corners that use it
+    (see :compute_corner_normals).
+
+    @return: A Wx3 array of unit normals, where W is the number of wedges. Unused wedges have a zero normal.
+    """
+    face_point_indices = psk_arrays.wedge_point_indices[psk_arrays.face_wedge_indices]
+    smoothing_groups = psk_arrays.face_smoothing_groups if use_smoothing_groups else None
+    corner_normals = compute_corner_normals(psk_arrays.points, face_point_indices, smoothing_groups, weighting)
+    sums = _sum_rows(psk_arrays.face_wedge_indices.reshape(-1).astype(np.int64), corner_normals.reshape(-1, 3),
+                     psk_arrays.wedge_count)
+    return _normalize(sums)
+
+
+def compute_point_normals(points: np.ndarray, face_point_indices: np.ndarray, weighting: str = 'angle') -> np.ndarray:
+    """
+    Computes a normal for each point, smoothing across all of the faces that use it.
+
+    @return: An Nx3 array of unit normals. Unused points have a zero normal.
+    """
+    face_point_indices = np.asarray(face_point_indices, dtype=np.int64).reshape(-1, 3)
+    contributions = _compute_corner_contributions(points, face_point_indices, weighting).reshape(-1, 3)
+    return _normalize(_sum_rows(face_point_indices.reshape(-1), contributions, len(points)))
+
+
+def generate_vertex_normals(psk: Union[Psk, PskArrays], weighting: str = 'angle', overwrite: bool = False) -> bool:
+    """
+    Fills in the vertex normals of a mesh, so that they are written to the VTXNORMS section by
+    `write_psk(..., is_extended_format=True)`.
+
+    The VTXNORMS section holds one normal per point, so the normals are smoothed across all of the faces of each point,
+    and smoothing groups cannot be represented in it. Use :compute_corner_normals or :compute_wedge_normals for normals
+    that are split along smoothing group boundaries.
+
+    @param psk: The mesh.
+    @param weighting: How each face contributes to the normals (see :compute_corner_normals).
+    @param overwrite: Replace any existing vertex normals.
+    @return: Whether the vertex normals were generated.
+    """
+    if psk.has_vertex_normals and not overwrite:
+        return False
+    if isinstance(psk, PskArrays):
+        normals = compute_point_normals(psk.points, psk.wedge_point_indices[psk.face_wedge_indices], weighting)
+        psk.vertex_normals = normals.astype(np.float32)
+        return True
+    points = structures_to_array(psk.points, VECTOR3_DTYPE)
+    wedge_point_indices = wedges_to_array(psk.wedges)['point_index'].astype(np.int64)
+    face_wedge_indices = faces_to_array(psk.faces)['wedge_indices'].astype(np.int64)
+    normals = compute_point_normals(points, wedge_point_indices[face_wedge_indices], weighting)
+    psk.vertex_normals = array_to_structures(Vector3, normals.astype(np.float32))
+    return True
+
+
+__all__ = [
+    'WEIGHTINGS',
+    'compute_face_normals',
+    'compute_corner_normals',
+    'compute_wedge_normals',
+    'compute_point_normals',
+    'generate_vertex_normals'
+]
+
+
+def __dir__():
+    return __all__
@@ -0,0 +1,155 @@
+from typing import List
+
+import numpy as np
+
+from .arrays import PskArrays
+from .data import Psk
+from .writer import MAX_WEDGE_COUNT
+
+
+def extract_faces(psk_arrays: PskArrays, face_indices: np.ndarray) -> PskArrays:
+    """
+    Creates a mesh from a subset of the faces of another mesh.
+
+    Only the wedges and points used by the faces are kept, along with their weights, extra UVs, vertex colors, vertex
+    normals and morph data, and all indices are remapped to match. The materials and bones are kept as they are, so
+    material and bone indices do not change.
+
+    @param psk_arrays: The mesh.
+    @param face_indices: The indices of the faces to keep, in the order they should appear in the new mesh.
+    @return: The new mesh.
+    """
+    face_indices = np.asarray(face_indices, dtype=np.intp).reshape(-1)
+    corner_wedge_indices = psk_arrays.face_wedge_indices[face_indices].reshape(-1)
+    wedge_indices, face_wedge_indices = np.unique(corner_wedge_indices, return_inverse=True)
+    point_indices, wedge_point_indices = np.unique(psk_arrays.wedge_point_indices[wedge_indices], return_inverse=True)
+    # Maps the points of the mesh to those of the new mesh, or to -1 if they are not used.
+    point_map = np.full(psk_arrays.point_count, -1, dtype=np.int64)
+    point_map[point_indices] = np.arange(len(point_indices))
+
+    chunk = PskArrays()
+    chunk.points = psk_arrays.points[point_indices]
+    chunk.wedge_point_indices = wedge_point_indices.reshape(-1).astype(np.uint32)
+    chunk.wedge_uvs = psk_arrays.wedge_uvs[wedge_indices]
+    chunk.wedge_material_indices = psk_arrays.wedge_material_indices[wedge_indices]
+    chunk.face_wedge_indices = face_wedge_indices.reshape(-1, 3).astype(np.uint32)
+    chunk.face_material_indices = psk_arrays.face_material_indices[face_indices]
+    chunk.face_aux_material_indices = psk_arrays.face_aux_material_indices[face_indices]
+    chunk.face_smoothing_groups = psk_arrays.face_smoothing_groups[face_indices]
+    chunk.materials = list(psk_arrays.materials)
+    chunk.bones = list(psk_arrays.bones)
+    chunk.material_references = list(psk_arrays.material_references)
+
+    weight_point_indices = point_map[psk_arrays.weight_point_indices]
+    has_weight = weight_point_indices >= 0
+    chunk.weight_values = psk_arrays.weight_values[has_weight]
+    chunk.weight_point_indices = weight_point_indices[has_weight].astype(np.int32)
+    chunk.weight_bone_indices = psk_arrays.weight_bone_indices[has_weight]
+
+    chunk.extra_uvs = [extra_uvs[wedge_indices] for extra_uvs in psk_arrays.extra_uvs]
+    if psk_arrays.has_vertex_colors:
+        chunk.vertex_colors = psk_arrays.vertex_colors[wedge_indices]
+    if psk_arrays.has_vertex_normals:
+        chunk.vertex_normals = psk_arrays.vertex_normals[point_indices]
+
+    if psk_arrays.has_morph_data:
+        morph_point_indices = point_map[psk_arrays.morph_point_indices]
+        has_morph_data = morph_point_indices >= 0
+        chunk.morph_position_deltas = psk_arrays.morph_position_deltas[has_morph_data]
+        chunk.morph_tangent_z_deltas = psk_arrays.morph_tangent_z_deltas[has_morph_data]
+        chunk.morph_point_indices = morph_point_indices[has_morph_data].astype(np.int32)
+        # The morph data is laid out one morph after another, so count what is left of each.
+        vertex_counts = np.array([morph_info.vertex_count for morph_info in psk_arrays.morph_infos], dtype=np.int64)
+        if vertex_counts.sum() != len(has_morph_data):
+            raise ValueError(f'Morph vertex counts ({vertex_counts.sum()}) do not match the number of morph data '
+                             f'elements ({len(has_morph_data)})')
+        morph_indices = np.repeat(np.arange(len(vertex_counts)), vertex_counts)
+        vertex_counts = np.bincount(morph_indices[has_morph_data], minlength=len(vertex_counts))
+        for morph_info, vertex_count in zip(psk_arrays.morph_infos, vertex_counts):
+            morph_info = Psk.MorphInfo.from_buffer_copy(morph_info)
+            morph_info.vertex_count = int(vertex_count)
+            chunk.morph_infos.append(morph_info)
+    return chunk
+
+
+def _count_wedges(psk_arrays: PskArrays, face_indices: np.ndarray) -> int:
+    return len(np.unique(psk_arrays.face_wedge_indices[face_indices]))
+
+
+def _split_spatially(psk_arrays: PskArrays, face_indices: np.ndarray, centroids: np.ndarray,
+                     max_wedge_count: int) -> List[np.ndarray]:
+    # Splits the faces in half at the median of their centroids along the longest axis of their bounds, until each
+    # group uses no more than `max_wedge_count` wedges.
+    groups = []
+    stack = [face_indices]
+    while stack:
+        face_indices = stack.pop()
+        if _count_wedges(psk_arrays, face_indices) <= max_wedge_count:
+            groups.append(face_indices)
+            continue
+        group_centroids = centroids[face_indices]
+        axis = int(np.argmax(group_centroids.max(axis=0) - group_centroids.min(axis=0)))
+        order = np.argsort(group_centroids[:, axis], kind='stable')
+        half = len(order) // 2
+        # Pushed in reverse, so that the groups come out in order along the axis.
+        stack.append(np.sort(face_indices[order[half:]]))
+        stack.append(np.sort(face_indices[order[:half]]))
+    return groups
+
+
+def split_psk_arrays(psk_arrays: PskArrays, max_wedge_count: int = MAX_WEDGE_COUNT,
+                     by_material: bool = True) -> List[PskArrays]:
+    """
+    Splits a mesh into meshes that each have no more than `max_wedge_count` wedges, so that each can be written with
+    the 16-bit wedge and face formats for engines that do not support the 32-bit ones.
+
+    @param psk_arrays: The mesh.
+    @param max_wedge_count: The maximum number of wedges of each mesh.
+    @param by_material: Group faces by material first, packing whole materials into each mesh in order for as long as
+    they fit. Materials that do not fit in a mesh of their own are split spatially. If False, the mesh is only split
+    spatially, by repeatedly halving it along the longest axis of the bounds of its face centroids.
+    @return: The meshes (see :extract_faces). A mesh that already fits is returned as a single copy.
+    """
+    if max_wedge_count < 3:
+        raise ValueError(f'max_wedge_count must be at least 3 (got {max_wedge_count})')
+    face_indices = np.arange(psk_arrays.face_count)
+    if psk_arrays.face_count == 0 or _count_wedges(psk_arrays, face_indices) <= max_wedge_count:
+        return [extract_faces(psk_arrays, face_indices)]
+
+    face_points = psk_arrays.wedge_point_indices[psk_arrays.face_wedge_indices]
+    centroids = psk_arrays.points[face_points].mean(axis=1)
+
+    if not by_material:
+        groups = _split_spatially(psk_arrays, face_indices, centroids, max_wedge_count)
+    else:
+        groups = []
+        order = np.argsort(psk_arrays.face_material_indices, kind='stable')
+        _, starts = np.unique(psk_arrays.face_material_indices[order], return_index=True)
+        material_face_indices = np.split(order, starts[1:])
+        pending = []
+        pending_wedge_count = 0
+        for face_indices in material_face_indices:
+            wedge_count = _count_wedges(psk_arrays, face_indices)
+            if wedge_count > max_wedge_count:
+                groups.extend(_split_spatially(psk_arrays, face_indices, centroids, max_wedge_count))
+                continue
+            # The sum of the wedge counts is an upper bound, since materials rarely share wedges.
+            if pending and pending_wedge_count + wedge_count > max_wedge_count:
+                groups.append(np.concatenate(pending))
+                pending = []
+                pending_wedge_count = 0
+            pending.append(face_indices)
+            pending_wedge_count += wedge_count
+        if pending:
+            groups.append(np.concatenate(pending))
+    return [extract_faces(psk_arrays, group) for group in groups]
+
+
+__all__ = [
+    'extract_faces',
+    'split_psk_arrays'
+]
+
+
+def __dir__():
+    return __all__
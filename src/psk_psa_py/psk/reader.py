@@ -2,21 +2,42 @@ import ctypes
 import os
 import re
 import warnings
+from concurrent.futures import Executor
 from pathlib import Path
-from typing import BinaryIO, List
-from ..shared.data import Section, Color, PsxBone, Vector2, Vector3
-from .data import Psk
+from typing import BinaryIO, Dict, List, Optional
+
+import numpy as np
+
+from ..shared.data import Section, Color, PsxBone, Vector2, Vector3, COLOR_DTYPE, VECTOR2_DTYPE, VECTOR3_DTYPE
+from ..shared.aio import ReadLimiter, run_blocking
+from ..shared.arrays import array_to_structures
+from ..shared.file_cache import FileCache, FileCacheEntry, structures_to_bytes
+from ..shared.profiling import SectionObserver, SectionTimer
+from ..shared.reader import SectionEntry, SectionStream, read_section_index
+from .arrays import PskArrays
+from .data import Psk, WEDGE16_DTYPE, WEDGE32_DTYPE, FACE_DTYPE, FACE32_DTYPE, WEIGHT_DTYPE, MORPH_DATA_DTYPE
 
 
 def _read_types(fp, data_class, section: Section, data):
     buffer_length = section.data_size * section.data_count
     buffer = fp.read(buffer_length)
+    if len(buffer) != buffer_length:
+        raise EOFError(f'Unexpected end of file while reading section "{section.name.decode()}"')
     offset = 0
     for _ in range(section.data_count):
         data.append(data_class.from_buffer_copy(buffer, offset))
         offset += section.data_size
 
 
+def _read_array(fp, dtype: np.dtype, section: Section) -> np.ndarray:
+    if section.data_size != dtype.itemsize:
+        raise RuntimeError(f'Unexpected element size ({section.data_size}) for section "{section.name.decode()}"')
+    buffer = bytearray(section.data_size * section.data_count)
+    if fp.readinto(buffer) != len(buffer):
+        raise EOFError(f'Unexpected end of file while reading section "{section.name.decode()}"')
+    return np.frombuffer(buffer, dtype=dtype)
+
+
 def _read_material_references(path: str) -> List[str]:
     property_file_path = Path(path).with_suffix('.props.txt')
     if not property_file_path.is_file():
@@ -28,9 +49,18 @@ def _read_material_references(path: str) -> List[str]:
     return re.findall(pattern, contents)
 
 
-def read_psk_from_file(path: str):
+def read_psk_from_file(path: str, observer: Optional[SectionObserver] = None, cache: Optional[FileCache] = None):
+    """
+    Reads a PSK file.
+
+    If `cache` is given, the file is read through :read_psk_arrays_from_file and converted with `PskArrays.to_psk`, so
+    wedges and faces use the smallest structures that hold their values.
+    """
+    if cache is not None:
+        return read_psk_arrays_from_file(path, observer, cache).to_psk()
+
     with open(path, 'rb') as fp:
-        psk = read_psk(fp)
+        psk = read_psk(fp, observer)
     
     """
     UEViewer exports a sidecar file (*.props.txt) with fully-qualified reference paths for each material
@@ -41,52 +71,61 @@ def read_psk_from_file(path: str):
     return psk
 
 
-def read_psk(fp: BinaryIO) -> Psk:
+def read_psk(fp: BinaryIO, observer: Optional[SectionObserver] = None) -> Psk:
+    """
+    Reads a PSK file.
+    `fp` can be any readable stream, including ones that cannot seek (e.g., a `zipfile` member or a pipe).
+    If `observer` is set, it is called with a `SectionEvent` for each section read or skipped.
+    """
     psk = Psk()
 
     # Read the PSK file sections.
-    while fp.read(1):
-        fp.seek(-1, 1)
-        section = Section.from_buffer_copy(fp.read(ctypes.sizeof(Section)))
+    stream = SectionStream(fp)
+    for section in stream:
+        timer = SectionTimer(observer)
+        offset = stream.offset
+        operation = 'read'
         match section.name:
             case b'ACTRHEAD':
                 pass
             case b'PNTS0000':
-                _read_types(fp, Vector3, section, psk.points)
+                _read_types(stream, Vector3, section, psk.points)
             case b'VTXW0000':
                 if section.data_size == ctypes.sizeof(Psk._Wedge16):
-                    _read_types(fp, Psk._Wedge16, section, psk.wedges)
+                    _read_types(stream, Psk._Wedge16, section, psk.wedges)
                 elif section.data_size == ctypes.sizeof(Psk._Wedge32):
-                    _read_types(fp, Psk._Wedge32, section, psk.wedges)
+                    _read_types(stream, Psk._Wedge32, section, psk.wedges)
                 else:
                     raise RuntimeError('Unrecognized wedge format')
             case b'FACE0000':
-                _read_types(fp, Psk.Face, section, psk.faces)
+                _read_types(stream, Psk.Face, section, psk.faces)
             case b'MATT0000':
-                _read_types(fp, Psk.Material, section, psk.materials)
+                _read_types(stream, Psk.Material, section, psk.materials)
             case b'REFSKELT':
-                _read_types(fp, PsxBone, section, psk.bones)
+                _read_types(stream, PsxBone, section, psk.bones)
             case b'RAWWEIGHTS':
-                _read_types(fp, Psk.Weight, section, psk.weights)
+                _read_types(stream, Psk.Weight, section, psk.weights)
             case b'FACE3200':
-                _read_types(fp, Psk._Face32, section, psk.faces)
+                _read_types(stream, Psk._Face32, section, psk.faces)
             case b'VERTEXCOLOR':
-                _read_types(fp, Color, section, psk.vertex_colors)
+                _read_types(stream, Color, section, psk.vertex_colors)
             case b'VTXNORMS':
-                _read_types(fp, Vector3, section, psk.vertex_normals)
+                _read_types(stream, Vector3, section, psk.vertex_normals)
             case b'MRPHINFO':
-                _read_types(fp, Psk.MorphInfo, section, psk.morph_infos)
+                _read_types(stream, Psk.MorphInfo, section, psk.morph_infos)
             case b'MRPHDATA':
-                _read_types(fp, Psk.MorphData, section, psk.morph_data)
+                _read_types(stream, Psk.MorphData, section, psk.morph_data)
             case _:
                 if section.name.startswith(b'EXTRAUV'):
                     extra_uvs: List[Vector2] = []
-                    _read_types(fp, Vector2, section, extra_uvs)
+                    _read_types(stream, Vector2, section, extra_uvs)
                     psk.extra_uvs.append(extra_uvs)
                 else:
                     # Section is not handled, skip it.
-                    fp.seek(section.data_size * section.data_count, os.SEEK_CUR)
-                    warnings.warn(f'Unrecognized section "{section.name} at position {fp.tell():15}"')
+                    stream.skip_section()
+                    operation = 'skip'
+                    warnings.warn(f'Unrecognized section "{section.name} at position {offset:15}"')
+        timer.report(operation, section.name, offset, section.data_size, section.data_count)
 
     """
     Tools like UEViewer and CUE4Parse write the point index as a 32-bit integer, exploiting the fact that due to struct
@@ -103,8 +142,344 @@ def read_psk(fp: BinaryIO) -> Psk:
     return psk
 
 
+def read_psk_arrays_from_file(path: str, observer: Optional[SectionObserver] = None,
+                              cache: Optional[FileCache] = None) -> PskArrays:
+    """
+    Reads a PSK file into its columnar representation.
+
+    If `cache` is given and holds an entry for the current version of the file, the arrays are memory-mapped from it
+    (read-only) instead of reading the file. Otherwise, the file is read and stored in the cache.
+    """
+    psk_arrays = None
+    if cache is not None:
+        # The file is only looked at once, so that data parsed from it is never stored under the key of a newer version.
+        key = cache.get_key(path, 'psk')
+        entry = cache.load(path, 'psk', key)
+        if entry is not None:
+            psk_arrays = _psk_arrays_from_cache_entry(entry)
+    if psk_arrays is None:
+        with open(path, 'rb') as fp:
+            psk_arrays = read_psk_arrays(fp, observer)
+        if cache is not None:
+            cache.store(path, 'psk', _psk_arrays_to_cache_arrays(psk_arrays), key=key)
+    psk_arrays.material_references = _read_material_references(path)
+    return psk_arrays
+
+
+# The columns of `PskArrays` that are stored as-is in a `FileCache`.
+_CACHED_PSK_COLUMNS = (
+    'points',
+    'wedge_point_indices',
+    'wedge_uvs',
+    'wedge_material_indices',
+    'face_wedge_indices',
+    'face_material_indices',
+    'face_aux_material_indices',
+    'face_smoothing_groups',
+    'weight_values',
+    'weight_point_indices',
+    'weight_bone_indices',
+    'vertex_colors',
+    'vertex_normals',
+    'morph_position_deltas',
+    'morph_tangent_z_deltas',
+    'morph_point_indices',
+)
+
+# The sections of `PskArrays` that are lists of structures, which are stored as bytes.
+_CACHED_PSK_STRUCTURES = {
+    'materials': Psk.Material,
+    'bones': PsxBone,
+    'morph_infos': Psk.MorphInfo,
+}
+
+
+def _psk_arrays_to_cache_arrays(psk_arrays: PskArrays) -> Dict[str, np.ndarray]:
+    arrays = {name: getattr(psk_arrays, name) for name in _CACHED_PSK_COLUMNS}
+    for name in _CACHED_PSK_STRUCTURES.keys():
+        arrays[name] = structures_to_bytes(getattr(psk_arrays, name))
+    for i, extra_uvs in enumerate(psk_arrays.extra_uvs):
+        arrays[f'extra_uvs_{i}'] = extra_uvs
+    return arrays
+
+
+def _psk_arrays_from_cache_entry(entry: FileCacheEntry) -> PskArrays:
+    psk_arrays = PskArrays()
+    for name in _CACHED_PSK_COLUMNS:
+        setattr(psk_arrays, name, entry.arrays[name])
+    for name, data_type in _CACHED_PSK_STRUCTURES.items():
+        setattr(psk_arrays, name, array_to_structures(data_type, entry.arrays[name]))
+    extra_uv_count = sum(1 for name in entry.arrays.keys() if name.startswith('extra_uvs_'))
+    psk_arrays.extra_uvs = [entry.arrays[f'extra_uvs_{i}'] for i in range(extra_uv_count)]
+    return psk_arrays
+
+
+def read_psk_arrays(fp: BinaryIO, observer: Optional[SectionObserver] = None) -> PskArrays:
+    """
+    Reads a PSK file into its columnar representation.
+    `fp` can be any readable stream, including ones that cannot seek (e.g., a `zipfile` member or a pipe).
+    Each section is decoded with a single `np.frombuffer` call instead of creating an object per element.
+    If `observer` is set, it is called with a `SectionEvent` for each section read or skipped.
+    """
+    psk_arrays = PskArrays()
+
+    stream = SectionStream(fp)
+    for section in stream:
+        timer = SectionTimer(observer)
+        offset = stream.offset
+        operation = 'read'
+        match section.name:
+            case b'ACTRHEAD':
+                pass
+            case b'PNTS0000':
+                psk_arrays.points = _read_array(stream, VECTOR3_DTYPE, section)
+            case b'VTXW0000':
+                if section.data_size == WEDGE16_DTYPE.itemsize:
+                    psk_arrays.set_wedges(_read_array(stream, WEDGE16_DTYPE, section))
+                elif section.data_size == WEDGE32_DTYPE.itemsize:
+                    psk_arrays.set_wedges(_read_array(stream, WEDGE32_DTYPE, section))
+                else:
+                    raise RuntimeError('Unrecognized wedge format')
+            case b'FACE0000':
+                psk_arrays.set_faces(_read_array(stream, FACE_DTYPE, section))
+            case b'MATT0000':
+                _read_types(stream, Psk.Material, section, psk_arrays.materials)
+            case b'REFSKELT':
+                _read_types(stream, PsxBone, section, psk_arrays.bones)
+            case b'RAWWEIGHTS':
+                psk_arrays.set_weights(_read_array(stream, WEIGHT_DTYPE, section))
+            case b'FACE3200':
+                psk_arrays.set_faces(_read_array(stream, FACE32_DTYPE, section))
+            case b'VERTEXCOLOR':
+                psk_arrays.vertex_colors = _read_array(stream, COLOR_DTYPE, section)
+            case b'VTXNORMS':
+                psk_arrays.vertex_normals = _read_array(stream, VECTOR3_DTYPE, section)
+            case b'MRPHINFO':
+                _read_types(stream, Psk.MorphInfo, section, psk_arrays.morph_infos)
+            case b'MRPHDATA':
+                psk_arrays.set_morph_data(_read_array(stream, MORPH_DATA_DTYPE, section))
+            case _:
+                if section.name.startswith(b'EXTRAUV'):
+                    psk_arrays.extra_uvs.append(_read_array(stream, VECTOR2_DTYPE, section))
+                else:
+                    # Section is not handled, skip it.
+                    stream.skip_section()
+                    operation = 'skip'
+                    warnings.warn(f'Unrecognized section "{section.name} at position {offset:15}"')
+        timer.report(operation, section.name, offset, section.data_size, section.data_count)
+
+    # See `read_psk` for why the point indices are truncated to 16 bits.
+    if psk_arrays.point_count <= 65536:
+        psk_arrays.wedge_point_indices &= 0xFFFF
+
+    return psk_arrays
+
+
+async def read_psk_async(path: str, cache: Optional[FileCache] = None, executor: Optional[Executor] = None,
+                         limiter: Optional[ReadLimiter] = None) -> Psk:
+    """
+    Reads a PSK file (see :read_psk_from_file) in an executor, without blocking the event loop.
+
+    @param path: The path of the file.
+    @param cache: The cache to load the file from, if any.
+    @param executor: The executor to read the file in. Defaults to the default executor of the event loop.
+    @param limiter: Limits the reads in progress. The size of the file is reserved while it is read.
+    """
+    return await run_blocking(read_psk_from_file, path, None, cache, size=os.path.getsize(path), executor=executor,
+                              limiter=limiter)
+
+
+async def read_psk_arrays_async(path: str, cache: Optional[FileCache] = None, executor: Optional[Executor] = None,
+                                limiter: Optional[ReadLimiter] = None) -> PskArrays:
+    """
+    Reads a PSK file (see :read_psk_arrays_from_file) in an executor, without blocking the event loop.
+
+    @param path: The path of the file.
+    @param cache: The cache to load the file from, if any.
+    @param executor: The executor to read the file in. Defaults to the default executor of the event loop.
+    @param limiter: Limits the reads in progress. The size of the file is reserved while it is read.
+    """
+    return await run_blocking(read_psk_arrays_from_file, path, None, cache, size=os.path.getsize(path),
+                              executor=executor, limiter=limiter)
+
+
+class PskReader(object):
+    """
+    This class reads only the section headers upon instantiation and holds onto a file handle.
+    Each section is decoded the first time it is accessed, so reading a few small sections (e.g., the bones or the
+    materials) of a large file only touches those sections.
+    If `observer` is set, it is called with a `SectionEvent` each time a section is decoded.
+    """
+
+    # The structure type of each section with a fixed name. Wedges and extra UVs are handled separately.
+    _section_types = {
+        b'PNTS0000': Vector3,
+        b'FACE0000': Psk.Face,
+        b'FACE3200': Psk._Face32,
+        b'MATT0000': Psk.Material,
+        b'REFSKELT': PsxBone,
+        b'RAWWEIGHTS': Psk.Weight,
+        b'VERTEXCOLOR': Color,
+        b'VTXNORMS': Vector3,
+        b'MRPHINFO': Psk.MorphInfo,
+        b'MRPHDATA': Psk.MorphData,
+    }
+
+    def __init__(self, path, observer: Optional[SectionObserver] = None):
+        self.path = path
+        self.observer = observer
+        self.fp = open(path, 'rb')
+        self.sections: Dict[bytes, SectionEntry] = read_section_index(self.fp)
+        self._cache: Dict[bytes, list] = dict()
+        self._material_references: Optional[List[str]] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.fp.close()
+
+    def has_section(self, name: bytes) -> bool:
+        return name in self.sections
+
+    def read_section(self, name: bytes) -> list:
+        """
+        Reads and returns the elements of a section. The result is cached, so each section is only decoded once.
+
+        @param name: The name of the section (e.g., b'REFSKELT').
+        @return: A list of structures, or an empty list if the file does not have the section.
+        """
+        if name in self._cache:
+            return self._cache[name]
+        entry = self.sections.get(name)
+        data = []
+        if entry is not None:
+            timer = SectionTimer(self.observer)
+            data_class = self._get_section_type(name, entry)
+            section = Section()
+            section.name = name
+            section.data_size = entry.data_size
+            section.data_count = entry.data_count
+            self.fp.seek(entry.offset, 0)
+            _read_types(self.fp, data_class, section, data)
+            if name == b'VTXW0000':
+                # See `read_psk` for why the point indices are truncated to 16 bits.
+                if self.point_count <= 65536:
+                    for wedge in data:
+                        wedge.point_index &= 0xFFFF
+            timer.report('read', name, entry.offset, entry.data_size, entry.data_count)
+        self._cache[name] = data
+        return data
+
+    def _get_section_type(self, name: bytes, entry: SectionEntry):
+        if name == b'VTXW0000':
+            if entry.data_size == ctypes.sizeof(Psk._Wedge16):
+                return Psk._Wedge16
+            elif entry.data_size == ctypes.sizeof(Psk._Wedge32):
+                return Psk._Wedge32
+            raise RuntimeError('Unrecognized wedge format')
+        if name.startswith(b'EXTRAUV'):
+            return Vector2
+        if name not in self._section_types:
+            raise KeyError(f'Unrecognized section "{name}"')
+        return self._section_types[name]
+
+    @property
+    def point_count(self) -> int:
+        entry = self.sections.get(b'PNTS0000')
+        return 0 if entry is None else entry.data_count
+
+    @property
+    def wedge_count(self) -> int:
+        entry = self.sections.get(b'VTXW0000')
+        return 0 if entry is None else entry.data_count
+
+    @property
+    def face_count(self) -> int:
+        entry = self.sections.get(b'FACE0000', self.sections.get(b'FACE3200'))
+        return 0 if entry is None else entry.data_count
+
+    @property
+    def points(self) -> List[Vector3]:
+        return self.read_section(b'PNTS0000')
+
+    @property
+    def wedges(self) -> list:
+        return self.read_section(b'VTXW0000')
+
+    @property
+    def faces(self) -> list:
+        return self.read_section(b'FACE0000') + self.read_section(b'FACE3200')
+
+    @property
+    def materials(self) -> List[Psk.Material]:
+        return self.read_section(b'MATT0000')
+
+    @property
+    def bones(self) -> List[PsxBone]:
+        return self.read_section(b'REFSKELT')
+
+    @property
+    def weights(self) -> List[Psk.Weight]:
+        return self.read_section(b'RAWWEIGHTS')
+
+    @property
+    def extra_uvs(self) -> List[List[Vector2]]:
+        return [self.read_section(name) for name in self.sections.keys() if name.startswith(b'EXTRAUV')]
+
+    @property
+    def vertex_colors(self) -> List[Color]:
+        return self.read_section(b'VERTEXCOLOR')
+
+    @property
+    def vertex_normals(self) -> List[Vector3]:
+        return self.read_section(b'VTXNORMS')
+
+    @property
+    def morph_infos(self) -> List[Psk.MorphInfo]:
+        return self.read_section(b'MRPHINFO')
+
+    @property
+    def morph_data(self) -> List[Psk.MorphData]:
+        return self.read_section(b'MRPHDATA')
+
+    @property
+    def material_references(self) -> List[str]:
+        if self._material_references is None:
+            self._material_references = _read_material_references(self.path)
+        return self._material_references
+
+    def read_psk(self) -> Psk:
+        """
+        Reads every section and returns the complete `Psk`.
+        """
+        psk = Psk()
+        psk.points = self.points
+        psk.wedges = self.wedges
+        psk.faces = self.faces
+        psk.materials = self.materials
+        psk.bones = self.bones
+        psk.weights = self.weights
+        psk.extra_uvs = self.extra_uvs
+        psk.vertex_colors = self.vertex_colors
+        psk.vertex_normals = self.vertex_normals
+        psk.morph_infos = self.morph_infos
+        psk.morph_data = self.morph_data
+        psk.material_references = self.material_references
+        return psk
+
+
 __all__ = [
-    'read_psk'
+    'PskReader',
+    'read_psk',
+    'read_psk_from_file',
+    'read_psk_arrays',
+    'read_psk_arrays_from_file',
+    'read_psk_async',
+    'read_psk_arrays_async'
 ]
 
 
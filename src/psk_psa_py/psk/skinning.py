@@ -0,0 +1,146 @@
+from typing import Optional, Sequence
+
+import numpy as np
+from numpy.typing import DTypeLike
+
+from .arrays import PskArrays
+from .data import Psk
+from .weights import sort_and_normalize_weight_arrays
+from ..psa.pose import PoseEvaluator, bones_to_data_matrix, quaternion_multiply, quaternion_rotate, quaternion_to_matrix
+from ..shared.data import PsxBone
+
+
+class Skinner(object):
+    """
+    Deforms the points of a skinned mesh with linear blend skinning.
+
+    The weights are normalized and stored once, upon instantiation, as a sparse point x bone matrix in compressed row
+    form: the bone indices and values of each weighted point are contiguous, so the skinning transforms of a point's
+    bones can be blended with a single reduction over all points. Points without weights, or whose weights add up to zero,
+    do not move.
+    """
+
+    def __init__(self, points: np.ndarray, bones: Sequence[PsxBone], weight_point_indices: np.ndarray,
+                 weight_bone_indices: np.ndarray, weight_values: np.ndarray):
+        self.points: np.ndarray = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        self.bones = list(bones)
+        weight_point_indices = np.asarray(weight_point_indices, dtype=np.intp)
+        weight_bone_indices = np.asarray(weight_bone_indices, dtype=np.intp)
+        if len(weight_point_indices) > 0:
+            if weight_point_indices.min() < 0 or weight_point_indices.max() >= len(self.points):
+                raise ValueError(f'Weight point indices must be in the range [0, {len(self.points)})')
+            if weight_bone_indices.min() < 0 or weight_bone_indices.max() >= len(self.bones):
+                raise ValueError(f'Weight bone indices must be in the range [0, {len(self.bones)})')
+        weight_values = np.asarray(weight_values, dtype=np.float64)
+        # Weights that add up to zero cannot be normalized, so their points are treated as having no weights.
+        totals = np.bincount(weight_point_indices, weight_values, minlength=len(self.points))
+        has_weight = totals[weight_point_indices] != 0.0
+        weight_point_indices = weight_point_indices[has_weight]
+        weight_bone_indices = weight_bone_indices[has_weight]
+        weight_values = weight_values[has_weight]
+        order, values = sort_and_normalize_weight_arrays(weight_point_indices, weight_values)
+        weight_point_indices = weight_point_indices[order]
+        self.weight_bone_indices: np.ndarray = weight_bone_indices[order]
+        self.weight_values: np.ndarray = values.astype(np.float64)
+        self.weighted_point_indices, self.weight_starts = np.unique(weight_point_indices, return_index=True)
+
+        self.pose_evaluator = PoseEvaluator(self.bones)
+        self.reference_pose: np.ndarray = bones_to_data_matrix(self.bones)
+        bind_rotations, bind_locations = self.pose_evaluator.evaluate(self.reference_pose)
+        self.inverse_bind_rotations: np.ndarray = bind_rotations * [1.0, -1.0, -1.0, -1.0]
+        self.inverse_bind_locations: np.ndarray = -quaternion_rotate(self.inverse_bind_rotations, bind_locations)
+
+    @classmethod
+    def from_psk(cls, psk: Psk) -> 'Skinner':
+        return cls.from_psk_arrays(PskArrays.from_psk(psk))
+
+    @classmethod
+    def from_psk_arrays(cls, psk_arrays: PskArrays) -> 'Skinner':
+        return cls(psk_arrays.points, psk_arrays.bones, psk_arrays.weight_point_indices,
+                   psk_arrays.weight_bone_indices, psk_arrays.weight_values)
+
+    def get_bone_mapping(self, psa_bones: Sequence[PsxBone]) -> np.ndarray:
+        """
+        Matches the bones of the mesh to the bones of an animation by name, ignoring case.
+
+        @param psa_bones: The bones of the animation.
+        @return: The index into `psa_bones` of each bone of the mesh, or -1 where the animation has no such bone.
+        """
+        psa_bone_indices = {bone.name.lower(): i for i, bone in enumerate(psa_bones)}
+        return np.array([psa_bone_indices.get(bone.name.lower(), -1) for bone in self.bones], dtype=np.intp)
+
+    def get_local_pose(self, matrix: np.ndarray, psa_bones: Optional[Sequence[PsxBone]] = None) -> np.ndarray:
+        """
+        Arranges an animation's data matrix by the bones of the mesh.
+
+        @param matrix: An FxBx7 data matrix.
+        @param psa_bones: The bones of the animation, if they differ from those of the mesh. Mesh bones that are not
+        animated are held in their reference pose.
+        @return: An FxMx7 data matrix, where M is the number of bones in the mesh.
+        """
+        matrix = np.asarray(matrix)
+        if psa_bones is None:
+            return matrix
+        mapping = self.get_bone_mapping(psa_bones)
+        is_animated = mapping >= 0
+        local_pose = np.repeat(self.reference_pose[np.newaxis], len(matrix), axis=0)
+        local_pose[:, is_animated] = matrix[:, mapping[is_animated]]
+        return local_pose
+
+    def get_skinning_matrices(self, matrix: np.ndarray, psa_bones: Optional[Sequence[PsxBone]] = None) -> np.ndarray:
+        """
+        Computes the transform from the reference pose to the animated pose of each bone.
+
+        @param matrix: An FxBx7 data matrix (see :get_local_pose).
+        @param psa_bones: The bones of the animation (see :get_local_pose).
+        @return: An FxMx3x4 array of affine transforms, where M is the number of bones in the mesh.
+        """
+        rotations, locations = self.pose_evaluator.evaluate(self.get_local_pose(matrix, psa_bones))
+        rotations = rotations.astype(np.float64)
+        skinning_rotations = quaternion_multiply(rotations, self.inverse_bind_rotations)
+        skinning_matrices = np.empty(rotations.shape[:-1] + (3, 4), dtype=np.float64)
+        skinning_matrices[..., 0:3] = quaternion_to_matrix(skinning_rotations)
+        skinning_matrices[..., 3] = locations + quaternion_rotate(rotations, self.inverse_bind_locations)
+        return skinning_matrices
+
+    def deform(self, matrix: np.ndarray, psa_bones: Optional[Sequence[PsxBone]] = None,
+               frame_chunk_size: Optional[int] = None, dtype: DTypeLike = np.float32) -> np.ndarray:
+        """
+        Deforms the points of the mesh for every frame of an animation.
+
+        @param matrix: An FxBx7 data matrix, as returned by `PsaReader.read_sequence_data_matrix`.
+        @param psa_bones: The bones of the animation (see :get_local_pose).
+        @param frame_chunk_size: If set, frames are processed this many at a time. The temporary memory used is
+        proportional to the number of frames processed at once times the number of weights.
+        @param dtype: The dtype of the returned positions.
+        @return: An FxNx3 array of point positions, where N is the number of points.
+        """
+        matrix = np.asarray(matrix)
+        frame_count = len(matrix)
+        if frame_chunk_size is None:
+            frame_chunk_size = max(frame_count, 1)
+        if frame_chunk_size < 1:
+            raise ValueError(f'frame_chunk_size must be at least 1 (got {frame_chunk_size})')
+        positions = np.empty((frame_count, len(self.points), 3), dtype=dtype)
+        positions[:] = self.points
+        if len(self.weighted_point_indices) == 0:
+            return positions
+        weighted_points = self.points[self.weighted_point_indices]
+        weights = self.weight_values[np.newaxis, :, np.newaxis, np.newaxis]
+        for frame_start in range(0, frame_count, frame_chunk_size):
+            frames = slice(frame_start, frame_start + frame_chunk_size)
+            skinning_matrices = self.get_skinning_matrices(matrix[frames], psa_bones)
+            # Blend the transforms of each point's bones, then apply the blended transform to the point.
+            blended = np.add.reduceat(skinning_matrices[:, self.weight_bone_indices] * weights, self.weight_starts, axis=1)
+            positions[frames, self.weighted_point_indices] = \
+                np.einsum('fpij,pj->fpi', blended[..., 0:3], weighted_points) + blended[..., 3]
+        return positions
+
+
+__all__ = [
+    'Skinner'
+]
+
+
+def __dir__():
+    return __all__
@@ -0,0 +1,70 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def sort_and_normalize_weight_arrays(point_indices: np.ndarray, weights: np.ndarray, max_influences: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sorts weights by point index and normalizes them so that the weights of each point sum to one.
+
+    The sort is stable, so weights of the same point keep their relative order.
+    The sums are accumulated in the same order and precision as `Psk.sort_and_normalize_weights` always has, so the
+    results are identical to it. Points whose weights sum to zero are left unchanged.
+
+    @param point_indices: The point index of each weight.
+    @param weights: The weight values.
+    @param max_influences: If set, only the largest `max_influences` weights of each point are kept (ties are broken
+    by the original order) before normalizing.
+    @return: The indices of the kept weights in sorted order, and their normalized values (as float32).
+    """
+    point_indices = np.asarray(point_indices)
+    weights = np.asarray(weights)
+    order = np.argsort(point_indices, kind='stable')
+
+    if max_influences is not None and len(order) > 0:
+        if max_influences < 1:
+            raise ValueError(f'max_influences must be at least 1 (got {max_influences})')
+        sorted_point_indices = point_indices[order]
+        group_starts, group_ids = _get_groups(sorted_point_indices)
+        # Order the weights of each group from largest to smallest, then keep the first `max_influences` of each.
+        by_weight = np.lexsort((-weights[order], group_ids))
+        ranks = np.empty(len(order), dtype=np.int64)
+        ranks[by_weight] = np.arange(len(order)) - group_starts[group_ids[by_weight]]
+        order = order[ranks < max_influences]
+
+    sorted_point_indices = point_indices[order]
+    values = weights[order].astype(np.float64)
+    if len(order) == 0:
+        return order, values.astype(np.float32)
+
+    group_starts, group_ids = _get_groups(sorted_point_indices)
+    group_counts = np.diff(np.append(group_starts, len(order)))
+    ranks = np.arange(len(order)) - group_starts[group_ids]
+
+    # Accumulate one rank at a time so that each group is summed left to right, as a scalar loop would.
+    sums = np.zeros(len(group_starts), dtype=np.float64)
+    for rank in range(int(group_counts.max())):
+        mask = ranks == rank
+        sums[group_ids[mask]] += values[mask]
+
+    point_sums = sums[group_ids]
+    nonzero = point_sums != 0.0
+    values[nonzero] /= point_sums[nonzero]
+    return order, values.astype(np.float32)
+
+
+def _get_groups(sorted_keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Returns the start of each run of equal keys, and the run that each element belongs to.
+    is_start = np.empty(len(sorted_keys), dtype=bool)
+    is_start[0] = True
+    np.not_equal(sorted_keys[1:], sorted_keys[:-1], out=is_start[1:])
+    return np.flatnonzero(is_start), np.cumsum(is_start) - 1
+
+
+__all__ = [
+    'sort_and_normalize_weight_arrays'
+]
+
+
+def __dir__():
+    return __all__
@@ -0,0 +1,115 @@
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from .data import WEDGE32_DTYPE, FACE_DTYPE, FACE32_DTYPE
+
+
+class WeldResult(NamedTuple):
+    wedges: np.ndarray
+    """The unique wedges, as a structured array with the `WEDGE32_DTYPE` dtype, in order of first use."""
+    wedge_indices: np.ndarray
+    """The index of the wedge used by each face corner, with the same shape as the input."""
+
+
+def weld_wedges(point_indices: np.ndarray, uvs: np.ndarray, material_indices: np.ndarray, uv_tolerance: float = 0.0) -> WeldResult:
+    """
+    Builds the wedge table for a set of face corners by merging corners that share the same point, UV and material.
+
+    This replaces hashing a `Psk.Wedge` per corner with a single sort over all corners.
+    Negative and positive zero UVs are treated as equal.
+
+    @param point_indices: The point index of each face corner. This is typically an Mx3 array for M faces, but any
+    shape is accepted.
+    @param uvs: The UV of each face corner, with a trailing axis of 2.
+    @param material_indices: The material index of each face corner. This can also be a per-face array with one value
+    per row of `point_indices`.
+    @param uv_tolerance: If greater than zero, UVs are quantized to a grid of this size before being compared, and
+    corners whose UVs round to the same grid cell are merged. This is not a distance test: UVs in the same cell may be
+    up to `uv_tolerance` apart on each axis, while UVs on either side of a cell boundary stay distinct however close
+    they are. The UV of the first corner is kept for each wedge.
+    @return: The unique wedges and the wedge index of each face corner.
+    """
+    point_indices = np.asarray(point_indices)
+    shape = point_indices.shape
+    point_indices = point_indices.reshape(-1)
+    uvs = np.asarray(uvs, dtype=np.float32).reshape(-1, 2)
+    material_indices = np.asarray(material_indices)
+    if material_indices.ndim == 1 and len(shape) == 2 and len(material_indices) == shape[0]:
+        # One material index per face.
+        material_indices = np.repeat(material_indices, shape[1])
+    material_indices = material_indices.reshape(-1)
+
+    if len(uvs) != len(point_indices) or len(material_indices) != len(point_indices):
+        raise ValueError('point_indices, uvs and material_indices must have one entry per face corner')
+
+    # Pack each corner into a fixed-size row of integers so that corners can be compared as opaque byte strings.
+    keys = np.empty((len(point_indices), 4), dtype=np.int64)
+    keys[:, 0] = point_indices
+    keys[:, 3] = material_indices
+    if uv_tolerance > 0.0:
+        keys[:, 1:3] = np.floor(uvs / uv_tolerance + 0.5)
+    else:
+        # Adding zero turns negative zero into positive zero, so that the two have the same bit pattern.
+        keys[:, 1:3] = (uvs + np.float32(0.0)).view(np.int32)
+    keys = keys.view(np.dtype((np.void, keys.dtype.itemsize * 4))).reshape(-1)
+
+    _, first_indices, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+    # `np.unique` orders the wedges by key; put them in order of first use instead.
+    order = np.argsort(first_indices)
+    remap = np.empty_like(order)
+    remap[order] = np.arange(len(order))
+    first_indices = first_indices[order]
+
+    wedges = np.zeros(len(first_indices), dtype=WEDGE32_DTYPE)
+    wedges['point_index'] = point_indices[first_indices]
+    wedges['u'] = uvs[first_indices, 0]
+    wedges['v'] = uvs[first_indices, 1]
+    wedges['material_index'] = material_indices[first_indices]
+
+    wedge_indices = remap[inverse.reshape(-1)].reshape(shape).astype(np.uint32)
+    return WeldResult(wedges, wedge_indices)
+
+
+def create_face_array(wedge_indices: np.ndarray, material_indices: np.ndarray,
+                      smoothing_groups: Optional[np.ndarray] = None,
+                      aux_material_indices: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Creates a structured face array that can be assigned to `Psk.faces`.
+
+    @param wedge_indices: An Mx3 array of wedge indices, such as the one returned by :weld_wedges.
+    @param material_indices: The material index of each face.
+    @param smoothing_groups: The smoothing group bit mask of each face. Defaults to zero.
+    @param aux_material_indices: The auxiliary material index of each face. Defaults to zero.
+    @return: An array with the `FACE_DTYPE` dtype, or the `FACE32_DTYPE` dtype if any wedge index needs 32 bits.
+    @raise ValueError: If a material index does not fit in 8 bits.
+    """
+    for name, indices in (('material', material_indices), ('auxiliary material', aux_material_indices)):
+        if indices is None:
+            continue
+        indices = np.asarray(indices)
+        if indices.size > 0 and (indices.min() < 0 or indices.max() > 0xFF):
+            raise ValueError(f'Face {name} indices must be in the range [0, 255] '
+                             f'(got [{indices.min()}, {indices.max()}])')
+    wedge_indices = np.asarray(wedge_indices).reshape(-1, 3)
+    is_32bit = len(wedge_indices) > 0 and wedge_indices.max() > 0xFFFF
+    faces = np.zeros(len(wedge_indices), dtype=FACE32_DTYPE if is_32bit else FACE_DTYPE)
+    faces['wedge_indices'] = wedge_indices
+    faces['material_index'] = material_indices
+    if smoothing_groups is not None:
+        faces['smoothing_groups'] = smoothing_groups
+    if aux_material_indices is not None:
+        faces['aux_material_index'] = aux_material_indices
+    return faces
+
+
+__all__ = [
+    'WeldResult',
+    'weld_wedges',
+    'create_face_array'
+]
+
+
+def __dir__():
+    return __all__
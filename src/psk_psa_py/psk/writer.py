@@ -1,31 +1,55 @@
 import os
-from ctypes import Structure, sizeof
-from typing import BinaryIO, Type
+from typing import BinaryIO, Optional
 
-from .data import Psk
-from ..shared.data import Color, PsxBone, Section, Vector2, Vector3
+import numpy as np
+
+from .arrays import PskArrays, faces_to_array, wedges_to_array
+from .data import Psk, WEDGE16_DTYPE, WEDGE32_DTYPE, FACE_DTYPE, FACE32_DTYPE
+from ..shared.data import Color, PsxBone, Vector2, Vector3
+from ..shared.profiling import SectionObserver
+from ..shared.writer import write_section
 
 MAX_WEDGE_COUNT = 65536
+MAX_WEDGE32_COUNT = 4294967296
 MAX_POINT_COUNT = 4294967296
 MAX_BONE_COUNT = 2147483647
 MAX_MATERIAL_COUNT = 256
 
 
-def _write_section(fp, name: bytes, data_type: Type[Structure] | None = None, data: list | None = None):
-    section = Section()
-    section.name = name
-    if data_type is not None and data is not None:
-        section.data_size = sizeof(data_type)
-        section.data_count = len(data)
-    fp.write(section)
-    if data is not None:
-        for datum in data:
-            fp.write(datum)
-
-
-def write_psk(psk: Psk, fp: BinaryIO, is_extended_format: bool = False):
-    if len(psk.wedges) > MAX_WEDGE_COUNT:
-        raise RuntimeError(f'Number of wedges ({len(psk.wedges)}) exceeds limit of {MAX_WEDGE_COUNT}')
+def _convert_structured_array(array: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    if array.dtype == dtype:
+        return array
+    converted = np.zeros(len(array), dtype=dtype)
+    for field in dtype.names:
+        if field in array.dtype.names:
+            converted[field] = array[field]
+    return converted
+
+
+def _needs_32bit_formats(wedge_count: int, wedge_material_indices: np.ndarray) -> bool:
+    return wedge_count > MAX_WEDGE_COUNT or (wedge_count > 0 and int(wedge_material_indices.max()) > 0xFF)
+
+
+def write_psk(psk: Psk, fp: BinaryIO, is_extended_format: bool = False, observer: Optional[SectionObserver] = None,
+              use_32bit_formats: Optional[bool] = None):
+    """
+    Writes a PSK file.
+    Each list on the `Psk` can also be given as a NumPy array (or bytes-like object) laid out like its structure,
+    in which case its section is written with a single write.
+    If `observer` is set, it is called with a `SectionEvent` for each section written.
+
+    `use_32bit_formats` selects the wedge and face sections. By default, the 16-bit ones (`_Wedge16` and FACE0000) are
+    written if they can hold the mesh, and the 32-bit ones (`_Wedge32` and FACE3200) otherwise. Pass False to always
+    write the 16-bit ones, for importers that do not support the 32-bit ones (see `split_psk_arrays` for meshes that do
+    not fit), or True to always write the 32-bit ones.
+    """
+    wedges = wedges_to_array(psk.wedges)
+    wedge_count = len(wedges)
+    if use_32bit_formats is None:
+        use_32bit_formats = _needs_32bit_formats(wedge_count, wedges['material_index'])
+    max_wedge_count = MAX_WEDGE32_COUNT if use_32bit_formats else MAX_WEDGE_COUNT
+    if wedge_count > max_wedge_count:
+        raise RuntimeError(f'Number of wedges ({wedge_count}) exceeds limit of {max_wedge_count}')
     if len(psk.points) > MAX_POINT_COUNT:
         raise RuntimeError(f'Numbers of vertices ({len(psk.points)}) exceeds limit of {MAX_POINT_COUNT}')
     if len(psk.materials) > MAX_MATERIAL_COUNT:
@@ -35,46 +59,63 @@ def write_psk(psk: Psk, fp: BinaryIO, is_extended_format: bool = False):
     if len(psk.bones) == 0:
         raise RuntimeError(f'At least one bone must be marked for export')
 
-    _write_section(fp, b'ACTRHEAD')
-    _write_section(fp, b'PNTS0000', Vector3, psk.points)
+    write_section(fp, b'ACTRHEAD', observer=observer)
+    write_section(fp, b'PNTS0000', Vector3, psk.points, observer)
 
-    wedges = []
-    for w in psk.wedges:
-        wedge = Psk._Wedge16()
-        wedge.material_index = w.material_index
-        wedge.u = w.u
-        wedge.v = w.v
-        wedge.point_index = w.point_index
-        wedges.append(wedge)
-
-    _write_section(fp, b'VTXW0000', Psk._Wedge16, wedges)
-    _write_section(fp, b'FACE0000', Psk.Face, psk.faces)
-    _write_section(fp, b'MATT0000', Psk.Material, psk.materials)
-    _write_section(fp, b'REFSKELT', PsxBone, psk.bones)
-    _write_section(fp, b'RAWWEIGHTS', Psk.Weight, psk.weights)
+    faces = faces_to_array(psk.faces)
+    if use_32bit_formats:
+        write_section(fp, b'VTXW0000', Psk._Wedge32, _convert_structured_array(wedges, WEDGE32_DTYPE), observer)
+        write_section(fp, b'FACE3200', Psk._Face32, _convert_structured_array(faces, FACE32_DTYPE), observer)
+    else:
+        write_section(fp, b'VTXW0000', Psk._Wedge16, _convert_structured_array(wedges, WEDGE16_DTYPE), observer)
+        write_section(fp, b'FACE0000', Psk.Face, _convert_structured_array(faces, FACE_DTYPE), observer)
+    write_section(fp, b'MATT0000', Psk.Material, psk.materials, observer)
+    write_section(fp, b'REFSKELT', PsxBone, psk.bones, observer)
+    write_section(fp, b'RAWWEIGHTS', Psk.Weight, psk.weights, observer)
 
     if is_extended_format:
         for i, extra_uvs in enumerate(psk.extra_uvs):
-            _write_section(fp, f'EXTRAUV{i}'.encode('windows-1252'), Vector2, extra_uvs)
-        _write_section(fp, b'VTXNORMS', Vector3, psk.vertex_normals)
-        _write_section(fp, b'VERTEXCOLOR', Color, psk.vertex_colors)
-        _write_section(fp, b'MRPHINFO', Psk.MorphInfo, psk.morph_infos)
-        _write_section(fp, b'MRPHDATA', Psk.MorphData, psk.morph_data)
-
-
-def write_psk_to_path(psk: Psk, path: str, is_extended_format: bool = False):
+            write_section(fp, f'EXTRAUV{i}'.encode('windows-1252'), Vector2, extra_uvs, observer)
+        write_section(fp, b'VTXNORMS', Vector3, psk.vertex_normals, observer)
+        write_section(fp, b'VERTEXCOLOR', Color, psk.vertex_colors, observer)
+        write_section(fp, b'MRPHINFO', Psk.MorphInfo, psk.morph_infos, observer)
+        write_section(fp, b'MRPHDATA', Psk.MorphData, psk.morph_data, observer)
+
+
+def write_psk_arrays(psk_arrays: PskArrays, fp: BinaryIO, is_extended_format: bool = False,
+                     observer: Optional[SectionObserver] = None, use_32bit_formats: Optional[bool] = None):
+    if use_32bit_formats is None:
+        use_32bit_formats = _needs_32bit_formats(psk_arrays.wedge_count, psk_arrays.wedge_material_indices)
+    psk = Psk()
+    psk.points = psk_arrays.points.astype(np.float32, copy=False)
+    psk.wedges = psk_arrays.get_wedges(WEDGE32_DTYPE if use_32bit_formats else WEDGE16_DTYPE)
+    psk.faces = psk_arrays.get_faces(FACE32_DTYPE if use_32bit_formats else FACE_DTYPE)
+    psk.materials = psk_arrays.materials
+    psk.bones = psk_arrays.bones
+    psk.weights = psk_arrays.get_weights()
+    psk.extra_uvs = [extra_uvs.astype(np.float32, copy=False) for extra_uvs in psk_arrays.extra_uvs]
+    psk.vertex_colors = psk_arrays.vertex_colors.astype(np.uint8, copy=False)
+    psk.vertex_normals = psk_arrays.vertex_normals.astype(np.float32, copy=False)
+    psk.morph_infos = psk_arrays.morph_infos
+    psk.morph_data = psk_arrays.get_morph_data()
+    write_psk(psk, fp, is_extended_format, observer, use_32bit_formats)
+
+
+def write_psk_to_path(psk: Psk, path: str, is_extended_format: bool = False,
+                      observer: Optional[SectionObserver] = None, use_32bit_formats: Optional[bool] = None):
     # Make the directory for the file if it doesn't exist.
     os.makedirs(os.path.dirname(path), exist_ok=True)
 
     try:
         with open(path, 'wb') as fp:
-            write_psk(psk, fp, is_extended_format)
+            write_psk(psk, fp, is_extended_format, observer, use_32bit_formats)
     except PermissionError as e:
         raise RuntimeError(f'The current user "{os.getlogin()}" does not have permission to write to "{path}"') from e
 
 
 __all__ = [
     'write_psk',
+    'write_psk_arrays',
     'write_psk_to_path'
 ]
 
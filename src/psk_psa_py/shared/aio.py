@@ -0,0 +1,85 @@
+import asyncio
+import functools
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class ReadLimiter(object):
+    """
+    Bounds the number of reads in progress and the number of bytes they may hold at once, so that many concurrent
+    requests wait their turn instead of exhausting memory.
+
+    A limiter may be shared by any number of tasks on one event loop. A single read larger than `max_bytes` is allowed
+    once no other read is in progress.
+    """
+
+    def __init__(self, max_reads: Optional[int] = None, max_bytes: Optional[int] = None):
+        """
+        @param max_reads: The maximum number of reads in progress, or None for no limit.
+        @param max_bytes: The maximum total size of the reads in progress, in bytes, or None for no limit.
+        """
+        if max_reads is not None and max_reads < 1:
+            raise ValueError(f'max_reads must be at least 1 (got {max_reads})')
+        self.max_reads = max_reads
+        self.max_bytes = max_bytes
+        self.reads = 0
+        self.bytes = 0
+        self._condition = asyncio.Condition()
+
+    def _can_start(self, size: int) -> bool:
+        if self.reads == 0:
+            return True
+        if self.max_reads is not None and self.reads >= self.max_reads:
+            return False
+        return self.max_bytes is None or self.bytes + size <= self.max_bytes
+
+    @asynccontextmanager
+    async def reserve(self, size: int = 0):
+        """
+        Waits until a read of `size` bytes fits within the limits, and holds the reservation for the duration of the
+        `async with` block.
+        """
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._can_start(size))
+            self.reads += 1
+            self.bytes += size
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.reads -= 1
+                self.bytes -= size
+                self._condition.notify_all()
+
+
+async def run_blocking(function: Callable[..., T], *args, size: int = 0, executor: Optional[Executor] = None,
+                       limiter: Optional[ReadLimiter] = None) -> T:
+    """
+    Runs a blocking function in an executor, so that it does not block the event loop.
+
+    @param function: The function to run.
+    @param args: The arguments of the function.
+    @param size: An estimate of the memory the function needs, in bytes, which is reserved in `limiter`.
+    @param executor: The executor to run the function in. Defaults to the default executor of the event loop.
+    @param limiter: The limiter to wait on before running the function.
+    @return: The return value of the function.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(function, *args)
+    if limiter is None:
+        return await loop.run_in_executor(executor, call)
+    async with limiter.reserve(size):
+        return await loop.run_in_executor(executor, call)
+
+
+__all__ = [
+    'ReadLimiter',
+    'run_blocking'
+]
+
+
+def __dir__():
+    return __all__
@@ -0,0 +1,50 @@
+from ctypes import Structure, sizeof
+from typing import List, Sequence, Type
+
+import numpy as np
+from numpy.typing import DTypeLike
+
+
+def structures_to_array(data: Sequence[Structure], dtype: DTypeLike) -> np.ndarray:
+    """
+    Packs a sequence of ctypes structures into a single array without going through their fields.
+
+    @param data: The structures. Each one must be exactly `dtype.itemsize` bytes long.
+    @param dtype: The dtype that mirrors the structure's layout.
+    @return: A writable array with one element per structure.
+    """
+    dtype = np.dtype(dtype)
+    if isinstance(data, np.ndarray):
+        return data
+    if len(data) == 0:
+        return np.empty(0, dtype=dtype)
+    # ctypes structures expose the buffer protocol, so joining them is a single pass in C.
+    return np.frombuffer(bytearray(b''.join(data)), dtype=dtype)
+
+
+def array_to_structures(data_type: Type[Structure], array: np.ndarray) -> List[Structure]:
+    """
+    Unpacks an array into a list of ctypes structures.
+
+    The structures are views into a single ctypes array that owns a copy of the data, which is much cheaper than
+    copying each structure out of the buffer individually.
+
+    @param data_type: The ctypes structure type.
+    @param array: An array whose rows are laid out exactly like `data_type`.
+    @return: A list of structures.
+    """
+    array = np.ascontiguousarray(array)
+    count = array.nbytes // sizeof(data_type)
+    if count * sizeof(data_type) != array.nbytes:
+        raise ValueError(f'Array of {array.nbytes} bytes is not a whole number of {data_type.__name__} structures')
+    return list((data_type * count).from_buffer_copy(array))
+
+
+__all__ = [
+    'structures_to_array',
+    'array_to_structures'
+]
+
+
+def __dir__():
+    return __all__
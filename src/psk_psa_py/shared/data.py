@@ -1,6 +1,8 @@
 from ctypes import Structure, c_char, c_int32, c_float, c_ubyte, Array
 from typing import Tuple
 
+import numpy as np
+
 class StructureEq(Structure):
     def __eq__(self, other):
         for fld in self._fields_:
@@ -126,7 +128,16 @@ class Section(StructureEq):
         self.type_flags = 1999801
 
 
+# NumPy mirrors of the structures above. Arrays decoded with these have a trailing axis for the components.
+COLOR_DTYPE = np.dtype(('u1', (4,)))
+VECTOR2_DTYPE = np.dtype(('<f4', (2,)))
+VECTOR3_DTYPE = np.dtype(('<f4', (3,)))
+
+
 __all__ = [
+    'COLOR_DTYPE',
+    'VECTOR2_DTYPE',
+    'VECTOR3_DTYPE',
     'Color',
     'Vector2',
     'Vector3',
@@ -1,6 +1,8 @@
 from ctypes import Structure
 from typing import Tuple
 
+import numpy as np
+
 
 class StructureEq(Structure):
     pass
@@ -58,3 +60,8 @@ class Section(StructureEq):
     type_flags: int
     data_size: int
     data_count: int
+
+
+COLOR_DTYPE: np.dtype
+VECTOR2_DTYPE: np.dtype
+VECTOR3_DTYPE: np.dtype
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional
+
+import numpy as np
+
+# Bump this whenever the layout of cached entries changes, so that older entries are no longer found.
+FILE_CACHE_VERSION = 2
+
+_MANIFEST_NAME = 'manifest.json'
+
+# When the cache outgrows its budget, entries are evicted until it is this fraction of the budget, so that the cache is
+# not scanned again on the very next store.
+_EVICTION_TARGET = 0.75
+
+
+def _hash(value: str, length: int) -> str:
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()[:length]
+
+
+class FileCacheEntry(NamedTuple):
+    arrays: Dict[str, np.ndarray]
+    """The cached arrays, memory-mapped read-only."""
+    metadata: Dict[str, Any]
+    """The JSON-serializable values stored alongside the arrays."""
+
+
+class FileCache(object):
+    """
+    A directory of parsed PSK and PSA data, stored as `.npy` files that are memory-mapped when loaded.
+
+    Each source file has its own subdirectory, named after a hash of its absolute path, which holds an entry keyed by
+    the size and modification time of the file, so an entry is never used once its source changes. When a new entry is
+    stored, older entries in the same subdirectory are removed, so storing an entry does not depend on the size of the
+    rest of the cache.
+
+    The cache keeps an estimate of its size, and only scans the whole directory to evict the least recently used
+    entries once the estimate exceeds `max_bytes`. It then evicts down to three quarters of `max_bytes`. Entries stored
+    by other processes sharing the cache are not part of the estimate until the next scan (see :evict).
+
+    Entries are written to a temporary directory and renamed into place, so several processes can share a cache.
+    """
+
+    def __init__(self, directory, max_bytes: Optional[int] = None):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size_estimate: Optional[int] = None
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def get_key(path, kind: str) -> str:
+        """
+        @param path: The path of the source file.
+        @param kind: The kind of data parsed from the file (e.g., 'psk').
+        @return: The path of the cache entry for the current state of the file, relative to the cache directory, as
+        `<source>/<version>`.
+        """
+        path = Path(path).resolve()
+        stat = path.stat()
+        source_key = _hash(f'{FILE_CACHE_VERSION}\0{kind}\0{path}', 32)
+        version_key = _hash(f'{stat.st_size}\0{stat.st_mtime_ns}', 16)
+        return f'{source_key}/{version_key}'
+
+    def load(self, path, kind: str, key: Optional[str] = None) -> Optional[FileCacheEntry]:
+        """
+        @param path: The path of the source file.
+        @param kind: The kind of data parsed from the file (e.g., 'psk').
+        @param key: The key of the file (see :get_key), if it was already computed.
+        @return: The cached entry for the file, or None if there is none.
+        """
+        entry_directory = self.directory / (key if key is not None else self.get_key(path, kind))
+        manifest_path = entry_directory / _MANIFEST_NAME
+        try:
+            manifest = json.loads(manifest_path.read_text())
+            arrays = {name: np.load(entry_directory / f'{name}.npy', mmap_mode='r', allow_pickle=False)
+                      for name in manifest['arrays']}
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        # The modification time of the manifest records when the entry was last used.
+        try:
+            os.utime(manifest_path)
+        except OSError:
+            pass
+        self.hits += 1
+        return FileCacheEntry(arrays, manifest['metadata'])
+
+    def store(self, path, kind: str, arrays: Dict[str, np.ndarray], metadata: Optional[Dict[str, Any]] = None,
+              key: Optional[str] = None) -> bool:
+        """
+        Stores the parsed data of a file.
+
+        Pass the key of the file taken before it was read (see :get_key), so that the data is not stored under the key
+        of a newer version of the file if the file changes while it is being parsed.
+
+        @param path: The path of the source file.
+        @param kind: The kind of data parsed from the file (e.g., 'psk').
+        @param arrays: The arrays to store. Structured dtypes are supported, object dtypes are not.
+        @param metadata: Any JSON-serializable values to store alongside the arrays.
+        @param key: The key of the file when it was read. If given and the file has changed since, nothing is stored.
+        @return: Whether the data was stored.
+        """
+        try:
+            current_key = self.get_key(path, kind)
+        except FileNotFoundError:
+            return False
+        if key is not None and key != current_key:
+            return False
+        source_key, version_key = current_key.split('/')
+        source_directory = self.directory / source_key
+        entry_directory = source_directory / version_key
+        temporary_directory = Path(tempfile.mkdtemp(prefix=f'.{source_key}.', dir=self.directory))
+        try:
+            for name, array in arrays.items():
+                np.save(temporary_directory / f'{name}.npy', np.ascontiguousarray(array), allow_pickle=False)
+            manifest = {
+                'source': str(Path(path).resolve()),
+                'kind': kind,
+                'arrays': list(arrays.keys()),
+                'metadata': metadata or dict(),
+            }
+            (temporary_directory / _MANIFEST_NAME).write_text(json.dumps(manifest))
+            size = sum(file.stat().st_size for file in temporary_directory.iterdir())
+            # The source directory may be removed by another process evicting its last entry, so try again once.
+            for attempt in range(2):
+                source_directory.mkdir(exist_ok=True)
+                try:
+                    os.replace(temporary_directory, entry_directory)
+                    break
+                except FileNotFoundError:
+                    if attempt == 1:
+                        raise
+        except OSError:
+            # Another process stored the same entry first.
+            shutil.rmtree(temporary_directory, ignore_errors=True)
+            if not (entry_directory / _MANIFEST_NAME).is_file():
+                raise
+            size = 0
+        self._remove_stale_entries(source_directory, version_key)
+        if self.max_bytes is not None:
+            if self._size_estimate is None:
+                self._size_estimate = self.size_bytes
+            else:
+                self._size_estimate += size
+            if self._size_estimate > self.max_bytes:
+                self.evict(int(self.max_bytes * _EVICTION_TARGET))
+        return True
+
+    def evict(self, max_bytes: int):
+        """
+        Removes the least recently used entries until the cache holds no more than `max_bytes`.
+
+        This scans the whole cache, and also brings the size estimate up to date with entries stored by other processes.
+        """
+        entries = []
+        total_size = 0
+        for entry_directory in self._iter_entries():
+            try:
+                last_used = (entry_directory / _MANIFEST_NAME).stat().st_mtime
+                size = sum(file.stat().st_size for file in entry_directory.iterdir())
+            except OSError:
+                continue
+            entries.append((last_used, size, entry_directory))
+            total_size += size
+        for _, size, entry_directory in sorted(entries, key=lambda entry: entry[0]):
+            if total_size <= max_bytes:
+                break
+            shutil.rmtree(entry_directory, ignore_errors=True)
+            try:
+                # Fails if the source still has an entry (or one is being stored).
+                entry_directory.parent.rmdir()
+            except OSError:
+                pass
+            total_size -= size
+        self._size_estimate = total_size
+
+    def clear(self):
+        for source_directory in self._iter_source_directories():
+            shutil.rmtree(source_directory, ignore_errors=True)
+        self._size_estimate = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(file.stat().st_size for entry_directory in self._iter_entries() for file in entry_directory.iterdir())
+
+    def _iter_source_directories(self):
+        for source_directory in self.directory.iterdir():
+            if source_directory.is_dir() and not source_directory.name.startswith('.'):
+                yield source_directory
+
+    def _iter_entries(self):
+        for source_directory in self._iter_source_directories():
+            try:
+                yield from (entry_directory for entry_directory in source_directory.iterdir()
+                            if entry_directory.is_dir())
+            except FileNotFoundError:
+                # Removed by another process.
+                continue
+
+    @staticmethod
+    def _remove_stale_entries(source_directory: Path, version_key: str):
+        # Removes the entries of earlier versions of the same file, which are the only other entries in its directory.
+        for entry_directory in source_directory.iterdir():
+            if entry_directory.name != version_key:
+                shutil.rmtree(entry_directory, ignore_errors=True)
+
+
+def structures_to_bytes(data) -> np.ndarray:
+    """
+    @return: The bytes of a list of ctypes structures, as an array that can be stored in a `FileCache`.
+    """
+    return np.frombuffer(bytearray(b''.join(data)), dtype=np.uint8)
+
+
+__all__ = [
+    'FILE_CACHE_VERSION',
+    'FileCache',
+    'FileCacheEntry',
+    'structures_to_bytes'
+]
+
+
+def __dir__():
+    return __all__
@@ -0,0 +1,124 @@
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+
+class SectionEvent(NamedTuple):
+    """
+    Describes one section (or part of a section) being read, skipped or written.
+    """
+    operation: str
+    """One of 'read', 'skip' or 'write'."""
+    name: bytes
+    """The name of the section (e.g., b'PNTS0000')."""
+    offset: int
+    """The position of the data in the file, just past the section header, or -1 if the file is not seekable."""
+    data_size: int
+    """The size of each element, in bytes."""
+    data_count: int
+    """The number of elements."""
+    seconds: float
+    """The time taken to process the data."""
+
+    @property
+    def data_length(self) -> int:
+        return self.data_size * self.data_count
+
+
+SectionObserver = Callable[[SectionEvent], None]
+"""A function that is called with a `SectionEvent` after each section is processed."""
+
+
+def tell(fp) -> int:
+    # Returns the position of the file, or -1 for streams that cannot report one.
+    try:
+        return fp.tell()
+    except (AttributeError, OSError):
+        return -1
+
+
+class SectionTimer(object):
+    """
+    Times the processing of a section and reports it to an observer. Does nothing if the observer is None.
+    """
+
+    __slots__ = ('observer', 'start')
+
+    def __init__(self, observer: Optional[SectionObserver]):
+        self.observer = observer
+        self.start = time.perf_counter() if observer is not None else 0.0
+
+    def report(self, operation: str, name: bytes, offset: int, data_size: int, data_count: int):
+        if self.observer is not None:
+            self.observer(SectionEvent(operation, name, offset, data_size, data_count, time.perf_counter() - self.start))
+
+
+class SectionStats(NamedTuple):
+    event_count: int
+    data_count: int
+    data_length: int
+    seconds: float
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.data_length / self.seconds if self.seconds > 0.0 else float('inf')
+
+
+class SectionStatsCollector(object):
+    """
+    A section observer that keeps every event and aggregates them by operation and section name.
+
+    Pass an instance wherever an `observer` is accepted, then call :report for a summary.
+    """
+
+    def __init__(self):
+        self.events: List[SectionEvent] = []
+
+    def __call__(self, event: SectionEvent):
+        self.events.append(event)
+
+    def clear(self):
+        self.events.clear()
+
+    def summary(self) -> Dict[Tuple[str, bytes], SectionStats]:
+        """
+        @return: The totals of each operation and section name, in the order they were first seen.
+        """
+        totals: Dict[Tuple[str, bytes], List] = dict()
+        for event in self.events:
+            total = totals.setdefault((event.operation, event.name), [0, 0, 0, 0.0])
+            total[0] += 1
+            total[1] += event.data_count
+            total[2] += event.data_length
+            total[3] += event.seconds
+        return {key: SectionStats(*total) for key, total in totals.items()}
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(event.seconds for event in self.events)
+
+    def report(self) -> str:
+        """
+        @return: A table of the summary, with the slowest sections first.
+        """
+        summary = sorted(self.summary().items(), key=lambda item: item[1].seconds, reverse=True)
+        lines = [f'{"operation":<10}{"section":<20}{"events":>8}{"elements":>12}{"bytes":>14}{"ms":>10}{"MB/s":>10}']
+        for (operation, name), stats in summary:
+            megabytes_per_second = stats.bytes_per_second / 1e6
+            lines.append(f'{operation:<10}{name.decode(errors="replace"):<20}{stats.event_count:>8}'
+                         f'{stats.data_count:>12}{stats.data_length:>14}{stats.seconds * 1e3:>10.3f}'
+                         f'{megabytes_per_second:>10.1f}')
+        return '\n'.join(lines)
+
+
+__all__ = [
+    'SectionEvent',
+    'SectionObserver',
+    'SectionTimer',
+    'SectionStats',
+    'SectionStatsCollector',
+    'tell'
+]
+
+
+def __dir__():
+    return __all__
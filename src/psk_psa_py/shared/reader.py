@@ -0,0 +1,155 @@
+from ctypes import sizeof
+from typing import BinaryIO, Dict, Iterator, NamedTuple, Union
+
+from .data import Section
+from .profiling import tell
+
+# The size of the buffer used to skip data on streams that cannot seek.
+SKIP_BUFFER_SIZE = 1 << 16
+
+
+class SectionEntry(NamedTuple):
+    offset: int
+    """The position of the section's data in the file, just past its header."""
+    data_size: int
+    data_count: int
+
+    @property
+    def data_length(self) -> int:
+        return self.data_size * self.data_count
+
+
+def read_section_index(fp: BinaryIO) -> Dict[bytes, SectionEntry]:
+    """
+    Reads the section headers of a PSK or PSA file without reading any section data.
+
+    @param fp: A seekable file, positioned at the start of the first section.
+    @return: The sections of the file, in file order, keyed by name. If a name occurs more than once, the first
+    occurrence is kept.
+    """
+    sections: Dict[bytes, SectionEntry] = dict()
+    while True:
+        header = fp.read(sizeof(Section))
+        if len(header) == 0:
+            break
+        if len(header) != sizeof(Section):
+            raise EOFError('Unexpected end of file while reading section header')
+        section = Section.from_buffer_copy(header)
+        entry = SectionEntry(fp.tell(), section.data_size, section.data_count)
+        sections.setdefault(section.name, entry)
+        fp.seek(entry.data_length, 1)
+    return sections
+
+
+class SectionStream(object):
+    """
+    Reads the sections of a PSK or PSA file from any forward-only byte stream (e.g., a pipe, a socket, a `gzip` stream
+    or a member of a `zipfile` or `tarfile` archive), using only the lengths in the section headers to find where each
+    section ends.
+
+    Iterating yields the header of each section. The section's data can then be read with :read or :readinto, and any
+    data left unread is skipped before the next header is read. Reads always return as many bytes as were asked for,
+    unless the stream ends first, so short reads from pipes and sockets are handled.
+
+    Seeking is only used to skip data, and only if the stream reports that it is seekable.
+    """
+
+    def __init__(self, fp: BinaryIO):
+        self.fp = fp
+        self.position = 0
+        """The number of bytes consumed from the stream."""
+        self._start_offset = tell(fp)
+        self._data_end = 0
+        try:
+            self._is_seekable = fp.seekable()
+        except (AttributeError, OSError):
+            self._is_seekable = False
+
+    @property
+    def offset(self) -> int:
+        """The position in the underlying file, or -1 if it cannot report one."""
+        return -1 if self._start_offset == -1 else self._start_offset + self.position
+
+    def __iter__(self) -> Iterator[Section]:
+        while True:
+            self.skip(self._data_end - self.position)
+            header = self.read(sizeof(Section))
+            if len(header) == 0:
+                return
+            if len(header) != sizeof(Section):
+                raise EOFError('Unexpected end of file while reading section header')
+            section = Section.from_buffer_copy(header)
+            self._data_end = self.position + (section.data_size * section.data_count)
+            yield section
+
+    def read(self, size: int) -> bytes:
+        """
+        @return: The next `size` bytes, or fewer if the stream ends.
+        """
+        chunks = []
+        remaining = size
+        while remaining > 0:
+            chunk = self.fp.read(remaining)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        self.position += size - remaining
+        return chunks[0] if len(chunks) == 1 else b''.join(chunks)
+
+    def readinto(self, buffer: Union[bytearray, memoryview]) -> int:
+        """
+        Fills the buffer from the stream.
+
+        @return: The number of bytes read, which is less than the size of the buffer only if the stream ended.
+        """
+        view = memoryview(buffer).cast('B')
+        count = 0
+        readinto = getattr(self.fp, 'readinto', None)
+        while count < len(view):
+            if readinto is not None:
+                chunk_count = readinto(view[count:])
+            else:
+                chunk = self.fp.read(len(view) - count)
+                chunk_count = len(chunk)
+                view[count:count + chunk_count] = chunk
+            if not chunk_count:
+                break
+            count += chunk_count
+        self.position += count
+        return count
+
+    def skip(self, size: int):
+        """
+        Skips the next `size` bytes.
+        """
+        if size <= 0:
+            return
+        if self._is_seekable:
+            self.fp.seek(size, 1)
+            self.position += size
+            return
+        buffer = bytearray(min(size, SKIP_BUFFER_SIZE))
+        remaining = size
+        while remaining > 0:
+            count = self.readinto(memoryview(buffer)[:min(remaining, len(buffer))])
+            if count == 0:
+                raise EOFError('Unexpected end of file while skipping section data')
+            remaining -= count
+
+    def skip_section(self):
+        """
+        Skips the rest of the data of the current section.
+        """
+        self.skip(self._data_end - self.position)
+
+
+__all__ = [
+    'SectionEntry',
+    'SectionStream',
+    'read_section_index'
+]
+
+
+def __dir__():
+    return __all__
@@ -0,0 +1,77 @@
+from ctypes import Structure, sizeof
+from typing import BinaryIO, Optional, Type
+
+import numpy as np
+
+from .data import Section
+from .profiling import SectionObserver, SectionTimer, tell
+
+# Sections given as lists of structures are joined and written in chunks of this many elements, so that the number of
+# writes stays small without doubling the memory footprint of very large sections.
+WRITE_CHUNK_ELEMENT_COUNT = 65536
+
+
+def write_section(fp: BinaryIO, name: bytes, data_type: Optional[Type[Structure]] = None, data=None,
+                  observer: Optional[SectionObserver] = None) -> Section:
+    """
+    Writes a section header followed by its payload.
+
+    @param fp: The file to write to.
+    @param name: The name of the section.
+    @param data_type: The ctypes structure type of the elements. Determines the element size written to the header.
+    @param data: The elements of the section. This can be a sequence of `data_type` structures, a NumPy array whose
+    rows (or structured elements) are laid out like `data_type`, or any other bytes-like object.
+    @param observer: If set, called with a `SectionEvent` once the section has been written.
+    @return: The section header that was written.
+    """
+    timer = SectionTimer(observer)
+    section = Section()
+    section.name = name
+    payload = None
+    if data_type is not None and data is not None:
+        section.data_size = sizeof(data_type)
+        payload = get_section_payload(data, data_type)
+        section.data_count = len(data) if payload is None else payload.nbytes // section.data_size
+    fp.write(section)
+    offset = tell(fp) if observer is not None else -1
+    if payload is not None:
+        if payload.nbytes > 0:
+            fp.write(payload)
+    elif data is not None:
+        for i in range(0, len(data), WRITE_CHUNK_ELEMENT_COUNT):
+            fp.write(b''.join(data[i:i + WRITE_CHUNK_ELEMENT_COUNT]))
+    timer.report('write', name, offset, section.data_size, section.data_count)
+    return section
+
+
+def get_section_payload(data, data_type: Type[Structure]) -> Optional[np.ndarray]:
+    """
+    @param data: The elements of a section, in any form accepted by :write_section.
+    @param data_type: The ctypes structure type of the elements.
+    @return: A contiguous byte view of the data, or None if the data is a sequence of structures.
+    @raise ValueError: If an array or buffer is not laid out as a whole number of `data_type` elements.
+    """
+    data_size = sizeof(data_type)
+    if isinstance(data, np.ndarray):
+        if data.dtype.names is not None:
+            data = data.reshape(-1)
+        if data.ndim == 0 or len(data) * data_size != data.nbytes:
+            raise ValueError(f'Array with shape {data.shape} and dtype {data.dtype} does not match the layout of '
+                             f'{data_type.__name__}')
+        return np.ascontiguousarray(data).reshape(-1).view(np.uint8)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        payload = np.frombuffer(data, dtype=np.uint8)
+        if payload.nbytes % data_size != 0:
+            raise ValueError(f'Buffer of {payload.nbytes} bytes is not a whole number of {data_type.__name__} elements')
+        return payload
+    return None
+
+
+__all__ = [
+    'get_section_payload',
+    'write_section'
+]
+
+
+def __dir__():
+    return __all__
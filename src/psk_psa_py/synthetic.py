@@ -0,0 +1,162 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from .psa.data import Psa, KEY_DTYPE
+from .psk.arrays import PskArrays
+from .psk.data import Psk
+from .shared.data import PsxBone
+
+
+def generate_bones(bone_count: int, seed: int = 0) -> List[PsxBone]:
+    """
+    Generates a random bone hierarchy. Bone 0 is the root, and every other bone has a lower-numbered parent.
+    """
+    rng = np.random.default_rng(seed)
+    parent_indices = np.zeros(bone_count, dtype=np.int32)
+    if bone_count > 1:
+        parent_indices[1:] = (rng.random(bone_count - 1) * np.arange(1, bone_count)).astype(np.int32)
+    children_counts = np.bincount(parent_indices[1:], minlength=bone_count)
+    rotations = _random_quaternions(rng, bone_count)
+    locations = rng.uniform(-10.0, 10.0, (bone_count, 3))
+    bones = []
+    for i in range(bone_count):
+        bone = PsxBone()
+        bone.name = f'bone_{i}'.encode('windows-1252')
+        bone.parent_index = int(parent_indices[i])
+        bone.children_count = int(children_counts[i])
+        w, x, y, z = rotations[i]
+        bone.rotation.w, bone.rotation.x, bone.rotation.y, bone.rotation.z = w, x, y, z
+        bone.location.x, bone.location.y, bone.location.z = locations[i]
+        bones.append(bone)
+    return bones
+
+
+def generate_psk_arrays(point_count: int, wedge_count: int, face_count: int, bone_count: int = 1,
+                        material_count: int = 1, weights_per_point: int = 2, extra_uv_count: int = 0,
+                        morph_count: int = 0, has_vertex_colors: bool = False, has_vertex_normals: bool = False,
+                        seed: int = 0) -> PskArrays:
+    """
+    Generates a random mesh, for testing and benchmarking. The same arguments always produce the same mesh.
+
+    @param point_count: The number of points.
+    @param wedge_count: The number of wedges. Each wedge references a random point.
+    @param face_count: The number of faces. Each face references three random wedges.
+    @param bone_count: The number of bones.
+    @param material_count: The number of materials.
+    @param weights_per_point: The number of weights of each point, each to a random bone.
+    @param extra_uv_count: The number of extra UV channels.
+    @param morph_count: The number of morph targets, each of which moves a random tenth of the points.
+    @param has_vertex_colors: Whether to generate a color for each wedge.
+    @param has_vertex_normals: Whether to generate a normal for each point.
+    @param seed: The seed of the random number generator.
+    """
+    if point_count < 1 or wedge_count < 1 or bone_count < 1 or material_count < 1:
+        raise ValueError('A mesh needs at least one point, wedge, bone and material')
+    rng = np.random.default_rng(seed)
+    psk_arrays = PskArrays()
+    psk_arrays.points = rng.uniform(-100.0, 100.0, (point_count, 3)).astype(np.float32)
+    psk_arrays.wedge_point_indices = rng.integers(0, point_count, wedge_count, dtype=np.uint32)
+    psk_arrays.wedge_uvs = rng.random((wedge_count, 2), dtype=np.float32)
+    psk_arrays.wedge_material_indices = rng.integers(0, material_count, wedge_count, dtype=np.uint32)
+    psk_arrays.face_wedge_indices = rng.integers(0, wedge_count, (face_count, 3), dtype=np.uint32)
+    psk_arrays.face_material_indices = psk_arrays.wedge_material_indices[psk_arrays.face_wedge_indices[:, 0]].astype(np.uint8)
+    psk_arrays.face_aux_material_indices = np.zeros(face_count, dtype=np.uint8)
+    psk_arrays.face_smoothing_groups = rng.integers(0, 2, face_count, dtype=np.int32)
+
+    for i in range(material_count):
+        material = Psk.Material()
+        material.name = f'material_{i}'.encode('windows-1252')
+        material.texture_index = i
+        psk_arrays.materials.append(material)
+
+    psk_arrays.bones = generate_bones(bone_count, seed)
+
+    weight_count = point_count * weights_per_point
+    psk_arrays.weight_point_indices = np.repeat(np.arange(point_count, dtype=np.int32), weights_per_point)
+    psk_arrays.weight_bone_indices = rng.integers(0, bone_count, weight_count, dtype=np.int32)
+    psk_arrays.weight_values = rng.random(weight_count, dtype=np.float32)
+    psk_arrays.sort_and_normalize_weights()
+
+    psk_arrays.extra_uvs = [rng.random((wedge_count, 2), dtype=np.float32) for _ in range(extra_uv_count)]
+    if has_vertex_colors:
+        psk_arrays.vertex_colors = rng.integers(0, 256, (wedge_count, 4), dtype=np.uint8)
+    if has_vertex_normals:
+        normals = rng.normal(size=(point_count, 3))
+        psk_arrays.vertex_normals = (normals / np.linalg.norm(normals, axis=1, keepdims=True)).astype(np.float32)
+
+    morph_vertex_count = max(1, point_count // 10)
+    for i in range(morph_count):
+        morph_info = Psk.MorphInfo()
+        morph_info.name = f'morph_{i}'.encode('windows-1252')
+        morph_info.vertex_count = morph_vertex_count
+        psk_arrays.morph_infos.append(morph_info)
+    morph_data_count = morph_count * morph_vertex_count
+    psk_arrays.morph_position_deltas = rng.uniform(-1.0, 1.0, (morph_data_count, 3)).astype(np.float32)
+    psk_arrays.morph_tangent_z_deltas = rng.uniform(-1.0, 1.0, (morph_data_count, 3)).astype(np.float32)
+    psk_arrays.morph_point_indices = rng.integers(0, point_count, morph_data_count, dtype=np.int32)
+    return psk_arrays
+
+
+def generate_psa(bone_count: int, sequence_count: int, frame_count: int, fps: float = 30.0,
+                 seed: int = 0) -> Tuple[Psa, np.ndarray]:
+    """
+    Generates random animation data. The same arguments always produce the same data.
+    Each bone's keys follow a smooth random path, so that the data resembles real animation (e.g., for key reduction).
+
+    @param bone_count: The number of bones.
+    @param sequence_count: The number of sequences.
+    @param frame_count: The number of frames of each sequence.
+    @param fps: The frame rate of each sequence.
+    @param seed: The seed of the random number generator.
+    @return: The `Psa` and its keys, as an array with the `KEY_DTYPE` dtype. The keys are also assigned to `Psa.keys`,
+    so the result can be passed directly to `write_psa`.
+    """
+    rng = np.random.default_rng(seed)
+    psa = Psa()
+    psa.bones = generate_bones(bone_count, seed)
+    keys = np.empty((sequence_count, frame_count, bone_count), dtype=KEY_DTYPE)
+    t = np.linspace(0.0, 1.0, frame_count)[:, np.newaxis, np.newaxis]
+    for i in range(sequence_count):
+        sequence = Psa.Sequence()
+        sequence.name = f'sequence_{i}'.encode('windows-1252')
+        sequence.group = b'None'
+        sequence.bone_count = bone_count
+        sequence.fps = fps
+        sequence.track_time = frame_count
+        sequence.frame_start_index = i * frame_count
+        sequence.frame_count = frame_count
+        sequence.key_quotum = frame_count * bone_count
+        psa.sequences[sequence.name.decode()] = sequence
+
+        # Blend between two random poses, with a per-bone wobble on top.
+        start_rotations = _random_quaternions(rng, bone_count)
+        end_rotations = _random_quaternions(rng, bone_count)
+        rotations = (1.0 - t) * start_rotations + t * end_rotations
+        rotations += 0.05 * np.sin(t * rng.uniform(1.0, 10.0, (1, bone_count, 1)) * 2.0 * np.pi)
+        rotations /= np.linalg.norm(rotations, axis=-1, keepdims=True)
+        locations = rng.uniform(-10.0, 10.0, (1, bone_count, 3)) + t * rng.uniform(-1.0, 1.0, (1, bone_count, 3))
+        keys[i]['rotation'] = rotations[..., [1, 2, 3, 0]]
+        keys[i]['location'] = locations
+        keys[i]['time'] = 1.0 / fps
+    psa.keys = keys.reshape(-1)
+    return psa, psa.keys
+
+
+def _random_quaternions(rng: np.random.Generator, count: int) -> np.ndarray:
+    # Uniformly distributed unit quaternions (WXYZ) on the positive W hemisphere.
+    quaternions = rng.normal(size=(count, 4))
+    quaternions /= np.linalg.norm(quaternions, axis=1, keepdims=True)
+    quaternions[quaternions[:, 0] < 0.0] *= -1.0
+    return quaternions
+
+
+__all__ = [
+    'generate_bones',
+    'generate_psk_arrays',
+    'generate_psa'
+]
+
+
+def __dir__():
+    return __all__
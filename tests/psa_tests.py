@@ -82,3 +82,549 @@ def test_psa_config_read():
     config = read_psa_config(psa_sequence_names, config_path)
 
     print(config.sequence_bone_flags)
+
+
+def test_psa_read_sequence_data_matrix_matches_keys():
+    import numpy as np
+
+    with PsaReader('./tests/data/psa/grunt_hh_grabplayer_crouch_SEQ0.psa') as psa_reader:
+        bone_count = len(psa_reader.bones)
+        for sequence_name, sequence in psa_reader.sequences.items():
+            keys = psa_reader.read_sequence_keys(sequence_name)
+            expected = np.array([list(key.data) for key in keys]).reshape(sequence.frame_count, bone_count, 7)
+
+            matrix = psa_reader.read_sequence_data_matrix(sequence_name)
+            assert matrix.dtype == np.float64
+            assert (matrix == expected).all()
+
+            matrix, times = psa_reader.read_sequence_data_matrix_and_times(sequence_name, dtype=np.float32)
+            assert matrix.dtype == np.float32
+            assert (matrix == expected.astype(np.float32)).all()
+            assert times.shape == (sequence.frame_count, bone_count)
+            assert (times.ravel() == [key.time for key in keys]).all()
+
+
+def test_psa_reader_mmap():
+    import numpy as np
+
+    path = './tests/data/psa/Carlos_StrafeLF90_2.psa'
+    with PsaReader(path) as psa_reader, PsaReader(path, use_mmap=True) as mmap_reader:
+        assert mmap_reader.is_mmap
+        for sequence_name in psa_reader.sequences.keys():
+            keys = mmap_reader.read_sequence_key_array(sequence_name)
+            assert not keys.flags.writeable
+            assert (keys == psa_reader.read_sequence_key_array(sequence_name)).all()
+            assert (mmap_reader.read_sequence_data_matrix(sequence_name) == psa_reader.read_sequence_data_matrix(sequence_name)).all()
+            assert len(mmap_reader.read_sequence_keys(sequence_name)) == keys.size
+    # Views handed out by the reader remain valid after it is closed.
+    assert np.isfinite(keys['rotation']).all()
+
+
+def test_psa_write_key_array():
+    import numpy as np
+
+    with PsaReader('./tests/data/psa/grunt_hh_grabplayer_crouch_SEQ0.psa') as psa_reader:
+        psa = psa_reader.psa
+        psa.keys = [key for sequence_name in psa.sequences for key in psa_reader.read_sequence_keys(sequence_name)]
+        expected = BytesIO()
+        write_psa(psa, expected)
+
+        psa.keys = np.concatenate([psa_reader.read_sequence_key_array(sequence_name) for sequence_name in psa.sequences])
+        actual = BytesIO()
+        write_psa(psa, actual)
+
+    assert actual.getvalue() == expected.getvalue()
+
+
+def test_psa_reader_concurrent_reads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    with PsaReader('./tests/data/psa/Carlos_StrafeLF90_2.psa') as psa_reader:
+        sequence_name = next(iter(psa_reader.sequences.keys()))
+        expected = psa_reader.read_sequence_data_matrix(sequence_name)
+        sequence_names = [sequence_name] * 32
+
+        matrices = psa_reader.read_sequence_data_matrices(sequence_names, max_workers=8)
+        assert len(matrices) == len(sequence_names)
+        for matrix in matrices:
+            assert (matrix == expected).all()
+
+        # Interleave reads that would race on a shared file position.
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            keys = list(executor.map(lambda _: psa_reader.read_sequence_key_array(sequence_name), range(32)))
+        for k in keys:
+            assert (k == keys[0]).all()
+
+
+def test_psa_reader_cache():
+    import numpy as np
+
+    path = './tests/data/psa/Carlos_StrafeLF90_2.psa'
+    with PsaReader(path) as psa_reader, PsaReader(path, cache_max_bytes=1 << 30) as cached_reader:
+        sequence_name = next(iter(psa_reader.sequences.keys()))
+        expected = psa_reader.read_sequence_data_matrix(sequence_name)
+
+        first = cached_reader.read_sequence_data_matrix(sequence_name)
+        second = cached_reader.read_sequence_data_matrix(sequence_name)
+        assert first is second
+        assert not first.flags.writeable
+        assert (first == expected).all()
+        assert cached_reader.read_sequence_data_matrix(sequence_name, dtype=np.float32) is not first
+        keys = cached_reader.read_sequence_keys(sequence_name)
+        assert len(keys) == expected.shape[0] * expected.shape[1]
+        # The keys are new on each call, so modifying them does not change the cached sequence.
+        location_x = keys[0].location.x
+        keys[0].location.x += 1.0
+        assert cached_reader.read_sequence_keys(sequence_name)[0].location.x == location_x
+
+        stats = cached_reader.cache.stats()
+        assert stats['hits'] == 2
+        assert stats['misses'] == 3
+        assert stats['entries'] == 3
+        assert stats['size_bytes'] <= stats['max_bytes']
+
+
+def test_psa_reader_cache_eviction():
+    path = './tests/data/psa/Carlos_StrafeLF90_2.psa'
+    with PsaReader(path) as psa_reader:
+        sequence_name = next(iter(psa_reader.sequences.keys()))
+        matrix_size = psa_reader.read_sequence_data_matrix(sequence_name).nbytes
+
+    # The budget only fits one matrix, so each new format evicts the previous one.
+    with PsaReader(path, cache_max_bytes=matrix_size) as psa_reader:
+        psa_reader.read_sequence_data_matrix(sequence_name)
+        psa_reader.read_sequence_key_array(sequence_name)
+        psa_reader.read_sequence_data_matrix(sequence_name)
+        stats = psa_reader.cache.stats()
+        assert stats['hits'] == 0
+        assert stats['misses'] == 3
+        assert stats['evictions'] == 2
+        assert stats['size_bytes'] == matrix_size
+
+
+def test_psa_reader_cache_close_mmap():
+    path = './tests/data/psa/Carlos_StrafeLF90_2.psa'
+    psa_reader = PsaReader(path, use_mmap=True, cache_max_bytes=1 << 30)
+    mapping = psa_reader._mmap
+    for sequence_name in psa_reader.sequences.keys():
+        psa_reader.read_sequence_key_array(sequence_name)
+    # Views into the mapping do not count against the budget, and are released when the reader is closed.
+    assert len(psa_reader.cache) == len(psa_reader.sequences)
+    assert psa_reader.cache.size_bytes == 0
+    psa_reader.close()
+    assert mapping.closed
+
+
+def test_psa_read_sequence_subset():
+    path = './tests/data/psa/Carlos_StrafeLF90_2.psa'
+    with PsaReader(path) as psa_reader, PsaReader(path, use_mmap=True) as mmap_reader:
+        bone_count = len(psa_reader.bones)
+        bone_indices = [bone_count - 1, 0, bone_count // 2]
+        for sequence_name in psa_reader.sequences.keys():
+            full = psa_reader.read_sequence_data_matrix(sequence_name)
+            for frames in [slice(None), slice(1, 5), slice(0, None, 3), slice(None, None, -2), slice(100000, None)]:
+                for bones in [None, bone_indices]:
+                    expected = full[frames] if bones is None else full[frames][:, bones]
+                    for reader in (psa_reader, mmap_reader):
+                        matrix = reader.read_sequence_data_matrix(sequence_name, frames=frames, bone_indices=bones)
+                        assert matrix.shape == expected.shape
+                        assert (matrix == expected).all()
+
+
+def test_psa_read_sequence_subset_invalid_bone():
+    import pytest
+
+    with PsaReader('./tests/data/psa/Carlos_StrafeLF90_2.psa') as psa_reader:
+        sequence_name = next(iter(psa_reader.sequences.keys()))
+        with pytest.raises(IndexError):
+            psa_reader.read_sequence_data_matrix(sequence_name, bone_indices=[len(psa_reader.bones)])
+
+
+def test_psa_slerp_quaternions():
+    import numpy as np
+    from psk_psa_py.psa.resample import slerp_quaternions
+
+    identity = np.array([1.0, 0.0, 0.0, 0.0])
+    half_turn = np.array([0.0, 0.0, 0.0, 1.0])
+    # The midpoint of a half turn about Z is a quarter turn about Z.
+    q = slerp_quaternions(identity, half_turn, 0.5)
+    assert np.allclose(q, [np.sqrt(0.5), 0.0, 0.0, np.sqrt(0.5)])
+    # Negated quaternions represent the same rotation, so the result must not pass through zero.
+    q = slerp_quaternions(identity, -identity, 0.5)
+    assert np.allclose(np.abs(q), identity)
+
+
+def test_psa_resample_sequence_round_trip(tmp_path):
+    import numpy as np
+    from psk_psa_py.psa.data import Psa
+    from psk_psa_py.psa.resample import resample_data_matrix, resample_sequence
+
+    with PsaReader('./tests/data/psa/Carlos_StrafeLF90_2.psa') as psa_reader:
+        sequence_name, sequence = next(iter(psa_reader.sequences.items()))
+        matrix = psa_reader.read_sequence_data_matrix(sequence_name)
+        bones = psa_reader.bones
+
+    # Resampling to the same number of frames is the identity.
+    assert np.allclose(resample_data_matrix(matrix, len(matrix)), matrix, atol=1e-6)
+
+    # Doubling the frame rate keeps every original frame.
+    resampled_sequence, keys = resample_sequence(sequence, matrix, fps=sequence.fps * 2)
+    assert resampled_sequence.frame_count == (len(matrix) - 1) * 2 + 1
+    assert resampled_sequence.name == sequence.name
+
+    psa = Psa()
+    psa.bones = bones
+    psa.sequences[sequence_name] = resampled_sequence
+    psa.keys = keys
+    fp = BytesIO()
+    write_psa(psa, fp)
+
+    path = tmp_path / 'resampled.psa'
+    path.write_bytes(fp.getvalue())
+    with PsaReader(path) as output_reader:
+        assert output_reader.sequences[sequence_name].fps == sequence.fps * 2
+        output = output_reader.read_sequence_data_matrix(sequence_name)
+    assert output.shape == (resampled_sequence.frame_count,) + matrix.shape[1:]
+    assert np.allclose(output[::2], matrix, atol=1e-5)
+
+
+def test_psa_key_reduction():
+    import numpy as np
+    from psk_psa_py.psa.reduction import DEFAULT_MAX_FRAME_GAP, compute_key_reduction, reconstruct_data_matrix, \
+        reduce_sequence_keys
+
+    # A static bone and a bone moving at a constant rate only need their first and last keys.
+    matrix = np.zeros((10, 2, 7))
+    matrix[:, :, 0] = 1.0
+    matrix[:, 1, 4] = np.arange(10)
+    result = compute_key_reduction(matrix)
+    assert result.key_quotum == 4
+    assert (result.key_counts == [2, 2]).all()
+    assert result.mask[[0, -1]].all()
+
+    result = compute_key_reduction(matrix, max_frame_gap=3)
+    assert (result.key_counts == [4, 4]).all()
+    assert result.key_reduction == 8 / 20
+
+    # The default gap bounds the scan of long static tracks, which keep one key every `DEFAULT_MAX_FRAME_GAP` frames.
+    long_matrix = np.zeros((DEFAULT_MAX_FRAME_GAP * 4 + 1, 1, 7))
+    long_matrix[..., 0] = 1.0
+    assert compute_key_reduction(long_matrix).key_quotum == 5
+    assert compute_key_reduction(long_matrix, max_frame_gap=None).key_quotum == 2
+
+    with PsaReader('./tests/data/psa/Carlos_StrafeLF90_2.psa') as psa_reader:
+        sequence_name, sequence = next(iter(psa_reader.sequences.items()))
+        matrix = psa_reader.read_sequence_data_matrix(sequence_name)
+
+    position_tolerance, angle_tolerance = 0.01, 0.01
+    result = reduce_sequence_keys(sequence, matrix, position_tolerance, angle_tolerance)
+    assert sequence.key_quotum == result.key_quotum <= matrix.shape[0] * matrix.shape[1]
+    assert np.isclose(sequence.key_reduction, result.key_reduction)
+
+    reconstructed = reconstruct_data_matrix(matrix, result.mask)
+    assert (np.linalg.norm(reconstructed[..., 4:7] - matrix[..., 4:7], axis=-1) <= position_tolerance + 1e-6).all()
+    dots = np.abs(np.sum(reconstructed[..., 0:4] * matrix[..., 0:4], axis=-1))
+    assert (2.0 * np.arccos(np.minimum(dots, 1.0)) <= angle_tolerance + 1e-4).all()
+
+
+def test_psa_pose_evaluator():
+    import numpy as np
+    from psk_psa_py.psa.pose import PoseEvaluator, quaternion_multiply, quaternion_rotate
+
+    with PsaReader('./tests/data/psa/grunt_hh_grabplayer_crouch_SEQ0.psa') as psa_reader:
+        bones = psa_reader.bones
+        sequence_name = next(iter(psa_reader.sequences.keys()))
+        matrix = psa_reader.read_sequence_data_matrix(sequence_name, frames=slice(0, 4))
+
+    evaluator = PoseEvaluator(bones)
+    assert sorted(np.concatenate(evaluator.levels).tolist()) == list(range(len(bones)))
+    rotations, locations = evaluator.evaluate(matrix)
+    assert rotations.shape == matrix.shape[:2] + (4,)
+    assert locations.shape == matrix.shape[:2] + (3,)
+
+    # Compare against walking the hierarchy one bone at a time.
+    for frame_index in range(len(matrix)):
+        world_rotations, world_locations = {}, {}
+        for bone_index, bone in enumerate(bones):
+            rotation = matrix[frame_index, bone_index, 0:4] / np.linalg.norm(matrix[frame_index, bone_index, 0:4])
+            location = matrix[frame_index, bone_index, 4:7]
+            if bone_index == 0:
+                world_rotations[0], world_locations[0] = rotation, location
+                continue
+            rotation = rotation * [1.0, -1.0, -1.0, -1.0]
+            parent_rotation = world_rotations[bone.parent_index]
+            world_rotations[bone_index] = quaternion_multiply(parent_rotation, rotation)
+            world_locations[bone_index] = world_locations[bone.parent_index] + quaternion_rotate(parent_rotation, location)
+        assert np.allclose(rotations[frame_index], [world_rotations[i] for i in range(len(bones))])
+        assert np.allclose(locations[frame_index], [world_locations[i] for i in range(len(bones))])
+
+    matrices = evaluator.evaluate_matrices(matrix)
+    assert matrices.shape == matrix.shape[:2] + (4, 4)
+    assert np.allclose(matrices[..., 0:3, 3], locations)
+    assert np.allclose(matrices[..., 0:3, 0:3] @ [1.0, 2.0, 3.0], quaternion_rotate(rotations, np.array([1.0, 2.0, 3.0])))
+
+
+def test_psa_synthetic(tmp_path):
+    import numpy as np
+    from psk_psa_py.synthetic import generate_psa
+
+    psa, keys = generate_psa(bone_count=5, sequence_count=3, frame_count=10)
+    path = tmp_path / 'synthetic.psa'
+    with open(path, 'wb') as fp:
+        write_psa(psa, fp)
+    with PsaReader(path) as psa_reader:
+        assert len(psa_reader.bones) == 5
+        assert list(psa_reader.sequences.keys()) == ['sequence_0', 'sequence_1', 'sequence_2']
+        key_array = np.concatenate([psa_reader.read_sequence_key_array(name).reshape(-1) for name in psa_reader.sequences])
+    assert key_array.tobytes() == keys.tobytes()
+
+
+def test_psa_section_observer():
+    import warnings
+    from psk_psa_py.shared.profiling import SectionStatsCollector
+
+    collector = SectionStatsCollector()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        psa_reader = PsaReader('./tests/data/psa/Carlos_StrafeLF90_2.psa', observer=collector)
+    with psa_reader:
+        operations = {event.name: event.operation for event in collector.events}
+        assert operations[b'BONENAMES'] == 'read'
+        assert operations[b'ANIMKEYS'] == 'skip'
+        assert operations[b'SCALEKEYS'] == 'skip'
+
+        collector.clear()
+        sequence_name, sequence = next(iter(psa_reader.sequences.items()))
+        psa_reader.read_sequence_key_array(sequence_name)
+        psa_reader.read_sequence_key_array(sequence_name, frames=slice(0, None, 2), bone_indices=[0, 1])
+        first, strided = collector.events
+        assert first.name == b'ANIMKEYS'
+        assert first.offset == psa_reader.keys_data_offset + sequence.frame_start_index * len(psa_reader.bones) * 32
+        assert first.data_count == sequence.frame_count * len(psa_reader.bones)
+        assert strided.data_count == len(range(0, sequence.frame_count, 2)) * 2
+
+        # A narrow selection of bones only reads those bones, even for contiguous frames.
+        collector.clear()
+        psa_reader.read_sequence_key_array(sequence_name, bone_indices=[1, 2])
+        assert sum(event.data_count for event in collector.events) == sequence.frame_count * 2
+
+
+def test_psa_file_cache(tmp_path):
+    import numpy as np
+    from psk_psa_py.shared.file_cache import FileCache
+
+    path = './tests/data/psa/Carlos_StrafeLF90_2.psa'
+    cache = FileCache(tmp_path / 'cache')
+    with PsaReader(path, file_cache=cache) as reader:
+        sequence_name = next(iter(reader.sequences.keys()))
+        expected_matrix = reader.read_sequence_data_matrix(sequence_name)
+        expected_bones = [bytes(bone) for bone in reader.bones]
+    assert cache.misses == 1
+    with PsaReader(path, file_cache=cache) as reader:
+        assert cache.hits == 1
+        assert [bytes(bone) for bone in reader.bones] == expected_bones
+        assert next(iter(reader.sequences.keys())) == sequence_name
+        assert np.array_equal(reader.read_sequence_data_matrix(sequence_name), expected_matrix)
+
+
+def test_load_psa_batch():
+    import numpy as np
+    from psk_psa_py.batch import load_psa_batch
+
+    results = load_psa_batch('./tests/data/psa/*.psa', read_keys=True, max_workers=2)
+    assert len(results) == 2
+    for result in results:
+        assert result.is_ok
+        with PsaReader(result.path) as reader:
+            assert list(result.value.sequences.keys()) == list(reader.sequences.keys())
+            assert len(result.value.bones) == len(reader.bones)
+            for sequence_name, sequence in reader.sequences.items():
+                start = sequence.frame_start_index * len(reader.bones)
+                keys = result.value.keys[start:start + sequence.frame_count * len(reader.bones)]
+                assert np.array_equal(keys, reader.read_sequence_key_array(sequence_name).reshape(-1))
+    assert not load_psa_batch(['./tests/data/psa/missing.psa'])[0].is_ok
+
+
+def test_load_psa_batch_frees_shared_memory():
+    import os
+    import pytest
+    from concurrent.futures import ThreadPoolExecutor
+    from psk_psa_py import batch
+
+    if not os.path.isdir('/dev/shm'):
+        pytest.skip('Shared memory blocks are not visible in the file system')
+
+    def list_blocks():
+        return set(name for name in os.listdir('/dev/shm') if name.startswith('psm_'))
+
+    blocks = list_blocks()
+    paths = ['./tests/data/psa/Carlos_StrafeLF90_2.psa'] * 8
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        assert all(result.is_ok for result in batch.load_psa_batch(paths, executor=executor))
+
+    class Interrupt(BaseException):
+        pass
+
+    def build(arrays, metadata):
+        raise Interrupt()
+
+    # Stopping after the first file frees the blocks of the files that were loaded but never received.
+    with pytest.raises(Interrupt):
+        batch._run_batch(paths, batch._load_psa, build, (False,), 2, None)
+    assert list_blocks() == blocks
+
+
+def test_psa_reader_async():
+    import asyncio
+    import numpy as np
+    from psk_psa_py.shared.aio import ReadLimiter
+
+    path = './tests/data/psa/Carlos_StrafeLF90_2.psa'
+
+    async def main():
+        limiter = ReadLimiter(max_reads=1)
+        reader = await PsaReader.open_async(path, use_mmap=True)
+        with reader:
+            names = list(reader.sequences.keys())
+            matrices = await asyncio.gather(*(reader.read_sequence_data_matrix_async(name, limiter=limiter)
+                                              for name in names))
+            key_array = await reader.read_sequence_key_array_async(names[0], frames=slice(0, 2))
+            keys = await reader.read_sequence_keys_async(names[0])
+            return names, matrices, key_array.copy(), keys
+
+    names, matrices, key_array, keys = asyncio.run(main())
+    with PsaReader(path) as reader:
+        for name, matrix in zip(names, matrices):
+            assert np.array_equal(matrix, reader.read_sequence_data_matrix(name))
+        assert np.array_equal(key_array, reader.read_sequence_key_array(names[0], frames=slice(0, 2)))
+        assert [bytes(key) for key in keys] == [bytes(key) for key in reader.read_sequence_keys(names[0])]
+
+
+def test_psa_writer_streaming(tmp_path):
+    import pytest
+    from psk_psa_py.psa.writer import PsaWriter
+    from psk_psa_py.synthetic import generate_psa
+
+    psa, keys = generate_psa(bone_count=5, sequence_count=3, frame_count=4)
+    expected = BytesIO()
+    write_psa(psa, expected)
+    keys = keys.reshape(3, 4, 5)
+    sequences = list(psa.sequences.values())
+
+    # Keys are spooled to a temporary file when the number of sequences is not known.
+    fp = BytesIO()
+    with PsaWriter(fp, psa.bones) as writer:
+        for sequence, sequence_keys in zip(sequences, keys):
+            writer.add_sequence(sequence, sequence_keys)
+    assert fp.getvalue() == expected.getvalue()
+
+    # The ANIMINFO section is reserved and filled in on close when it is.
+    path = tmp_path / 'streamed.psa'
+    with PsaWriter(path, psa.bones, sequence_count=3) as writer:
+        for sequence, sequence_keys in zip(sequences, keys):
+            writer.add_sequence(sequence, bytes(sequence_keys.reshape(-1)))
+    assert path.read_bytes() == expected.getvalue()
+
+    # Closing with missing sequences writes nothing and leaves the writer open, so the sequences can still be added.
+    fp = BytesIO()
+    writer = PsaWriter(fp, psa.bones, sequence_count=3)
+    writer.add_sequence(sequences[0], keys[0])
+    with pytest.raises(ValueError):
+        writer.close()
+    assert not writer.is_closed
+    for sequence, sequence_keys in zip(sequences[1:], keys[1:]):
+        writer.add_sequence(sequence, sequence_keys)
+    writer.close()
+    assert fp.getvalue() == expected.getvalue()
+
+    # A file created by the writer is deleted if it cannot be completed.
+    path = tmp_path / 'incomplete.psa'
+    with pytest.raises(ValueError):
+        with PsaWriter(path, psa.bones, sequence_count=2) as writer:
+            writer.add_sequence(sequences[0], keys[0])
+    assert not path.exists()
+
+
+def test_psa_repack(tmp_path):
+    import os
+    import threading
+    import numpy as np
+    import pytest
+    from psk_psa_py.psa.repack import extract_psa_sequences, merge_psa_files, write_psa_sequences
+    from psk_psa_py.synthetic import generate_psa
+
+    paths = []
+    for i in range(2):
+        psa, _ = generate_psa(bone_count=4, sequence_count=3, frame_count=5 + i)
+        for sequence in psa.sequences.values():
+            sequence.name = f'file{i}_{sequence.name.decode()}'.encode()
+        psa.sequences = {sequence.name.decode(): sequence for sequence in psa.sequences.values()}
+        paths.append(tmp_path / f'{i}.psa')
+        with open(paths[-1], 'wb') as fp:
+            write_psa(psa, fp)
+
+    def read_all(path):
+        with PsaReader(path) as reader:
+            return {name: reader.read_sequence_key_array(name) for name in reader.sequences.keys()}
+
+    expected = {**read_all(paths[0]), **read_all(paths[1])}
+    merged_path = tmp_path / 'merged.psa'
+    merge_psa_files(paths, merged_path)
+    merged = read_all(merged_path)
+    assert list(merged.keys()) == list(expected.keys())
+    for name, keys in expected.items():
+        assert np.array_equal(merged[name], keys)
+
+    # Extracting to an in-memory file takes the buffered path.
+    fp = BytesIO()
+    extract_psa_sequences(merged_path, fp, ['file1_sequence_2', 'file0_sequence_0'])
+    extracted_path = tmp_path / 'extracted.psa'
+    extracted_path.write_bytes(fp.getvalue())
+    extracted = read_all(extracted_path)
+    assert list(extracted.keys()) == ['file1_sequence_2', 'file0_sequence_0']
+    assert np.array_equal(extracted['file1_sequence_2'], expected['file1_sequence_2'])
+    assert np.array_equal(extracted['file0_sequence_0'], expected['file0_sequence_0'])
+
+    # Writing to a pipe takes the buffered path, and copying does not move the file position of the reader.
+    read_fd, write_fd = os.pipe()
+    chunks = []
+    drain = threading.Thread(target=lambda: chunks.extend(iter(lambda: os.read(read_fd, 1 << 16), b'')))
+    drain.start()
+    with PsaReader(merged_path) as reader, open(write_fd, 'wb') as pipe:
+        position = reader.fp.tell()
+        write_psa_sequences(pipe, [(reader, 'file1_sequence_2'), (reader, 'file0_sequence_0')], observer=lambda _: None)
+        assert reader.fp.tell() == position
+    drain.join()
+    os.close(read_fd)
+    assert b''.join(chunks) == fp.getvalue()
+
+    with PsaReader(paths[0]) as reader:
+        with pytest.raises(ValueError):
+            write_psa_sequences(BytesIO(), [(reader, 'file0_sequence_0'), (reader, 'file0_sequence_0')])
+        renamed = write_psa_sequences(BytesIO(), [(reader, 'file0_sequence_0'), (reader, 'file0_sequence_0', 'copy')])
+        assert list(renamed.sequences.keys()) == ['file0_sequence_0', 'copy']
+        with PsaReader('./tests/data/psa/Carlos_StrafeLF90_2.psa') as other_reader:
+            with pytest.raises(ValueError):
+                write_psa_sequences(BytesIO(), [(reader, 'file0_sequence_0'),
+                                                (other_reader, next(iter(other_reader.sequences.keys())))])
+
+
+def test_read_psa_from_stream(tmp_path):
+    import tarfile
+    import numpy as np
+    from psk_psa_py.psa.reader import read_psa
+
+    path = './tests/data/psa/Carlos_StrafeLF90_2.psa'
+    archive_path = tmp_path / 'animations.tar.gz'
+    with tarfile.open(archive_path, 'w:gz') as archive:
+        archive.add(path, arcname='Carlos.psa')
+    with tarfile.open(archive_path, 'r|gz') as archive:
+        member = archive.next()
+        psa = read_psa(archive.extractfile(member))
+    with PsaReader(path) as reader:
+        assert list(psa.sequences.keys()) == list(reader.sequences.keys())
+        bone_count = len(reader.bones)
+        for sequence_name, sequence in reader.sequences.items():
+            start = sequence.frame_start_index * bone_count
+            keys = psa.keys[start:start + sequence.frame_count * bone_count]
+            assert np.array_equal(keys, reader.read_sequence_key_array(sequence_name).reshape(-1))
@@ -1,7 +1,8 @@
 from io import BytesIO
 from pathlib import Path
-from psk_psa_py.psk.reader import read_psk, read_psk_from_file
-from psk_psa_py.psk.writer import write_psk
+from psk_psa_py.psk.arrays import PskArrays
+from psk_psa_py.psk.reader import read_psk, read_psk_from_file, read_psk_arrays_from_file
+from psk_psa_py.psk.writer import write_psk, write_psk_arrays
 
 
 def _assert_psk_round_trip_data_is_unchanged(path: Path):
@@ -110,3 +111,597 @@ def test_psk_import_export_round_trip():
         count += 1
     
     assert count > 0
+
+
+def test_psk_arrays_match_object_model():
+    """
+    Ensures that the columnar reader decodes the same data as the object model, and that the two convert losslessly.
+    """
+    import numpy as np
+    from glob import glob
+
+    test_data_directory = './tests/data/psk'
+    for filename in glob('*.psk', root_dir=test_data_directory):
+        path = str(Path(test_data_directory) / filename)
+        psk = read_psk_from_file(path)
+        psk_arrays = read_psk_arrays_from_file(path)
+        converted = PskArrays.from_psk(psk)
+
+        for name in ('points', 'wedge_point_indices', 'wedge_uvs', 'wedge_material_indices', 'face_wedge_indices',
+                     'face_material_indices', 'face_aux_material_indices', 'face_smoothing_groups', 'weight_values',
+                     'weight_point_indices', 'weight_bone_indices', 'vertex_colors', 'vertex_normals',
+                     'morph_position_deltas', 'morph_tangent_z_deltas', 'morph_point_indices'):
+            assert np.array_equal(getattr(psk_arrays, name), getattr(converted, name)), f'{filename}: {name} differs'
+        assert len(psk_arrays.extra_uvs) == len(converted.extra_uvs)
+        for u1, u2 in zip(psk_arrays.extra_uvs, converted.extra_uvs):
+            assert np.array_equal(u1, u2)
+        assert psk_arrays.material_references == psk.material_references
+
+        output = psk_arrays.to_psk()
+        assert list(output.points) == list(psk.points)
+        assert [tuple(f.wedge_indices) for f in output.faces] == [tuple(f.wedge_indices) for f in psk.faces]
+        assert [(w.point_index, w.u, w.v, w.material_index) for w in output.wedges] == \
+               [(w.point_index, w.u, w.v, w.material_index) for w in psk.wedges]
+        assert list(output.weights) == list(psk.weights)
+        assert list(output.vertex_normals) == list(psk.vertex_normals)
+
+
+def test_psk_write_arrays_matches_write_psk():
+    """
+    Ensures that writing the columnar representation produces the same bytes as writing the object model.
+    """
+    from glob import glob
+
+    test_data_directory = './tests/data/psk'
+    for filename in glob('*.psk', root_dir=test_data_directory):
+        path = str(Path(test_data_directory) / filename)
+
+        expected = BytesIO()
+        write_psk(read_psk_from_file(path), expected, is_extended_format=True)
+
+        actual = BytesIO()
+        write_psk_arrays(read_psk_arrays_from_file(path), actual, is_extended_format=True)
+
+        assert actual.getvalue() == expected.getvalue(), filename
+
+
+def _sort_and_normalize_weights_reference(weights):
+    # The original scalar implementation of `Psk.sort_and_normalize_weights`, operating on (weight, point, bone) lists.
+    weights = [list(w) for w in sorted(weights, key=lambda x: x[1])]
+    weight_index = 0
+    while weight_index < len(weights):
+        point_index = weights[weight_index][1]
+        weight_sum = weights[weight_index][0]
+        point_weight_total = 1
+        for i in range(weight_index + 1, len(weights)):
+            if weights[i][1] != point_index:
+                break
+            weight_sum += weights[i][0]
+            point_weight_total += 1
+        if weight_sum != 0.0:
+            for i in range(weight_index, weight_index + point_weight_total):
+                weights[i][0] /= weight_sum
+        weight_index += point_weight_total
+    return [tuple(w) for w in weights]
+
+
+def test_psk_sort_and_normalize_weights():
+    import numpy as np
+    from glob import glob
+
+    test_data_directory = './tests/data/psk'
+    for filename in glob('*.psk', root_dir=test_data_directory):
+        psk = read_psk_from_file(str(Path(test_data_directory) / filename))
+        expected = [(float(np.float32(w)), p, b) for w, p, b in
+                    _sort_and_normalize_weights_reference([(w.weight, w.point_index, w.bone_index) for w in psk.weights])]
+        psk.sort_and_normalize_weights()
+        assert [(w.weight, w.point_index, w.bone_index) for w in psk.weights] == expected, filename
+
+        psk.sort_and_normalize_weights(max_influences=2)
+        weights = np.array([(w.weight, w.point_index) for w in psk.weights]).reshape(-1, 2)
+        point_indices, counts = np.unique(weights[:, 1], return_counts=True)
+        assert (counts <= 2).all()
+        sums = np.bincount(np.searchsorted(point_indices, weights[:, 1]), weights=weights[:, 0])
+        assert np.allclose(sums[sums != 0.0], 1.0, atol=1e-5)
+
+
+def test_psk_weld_wedges():
+    """
+    Rebuilds the wedges of each test mesh from its face corners and checks that the result describes the same mesh.
+    """
+    import numpy as np
+    import pytest
+    from glob import glob
+    from psk_psa_py.psk.welding import weld_wedges, create_face_array
+
+    test_data_directory = './tests/data/psk'
+    for filename in glob('*.psk', root_dir=test_data_directory):
+        psk_arrays = read_psk_arrays_from_file(str(Path(test_data_directory) / filename))
+        corners = psk_arrays.face_wedge_indices
+        point_indices = psk_arrays.wedge_point_indices[corners]
+        uvs = psk_arrays.wedge_uvs[corners]
+        material_indices = psk_arrays.wedge_material_indices[corners]
+
+        wedges, wedge_indices = weld_wedges(point_indices, uvs, material_indices)
+        assert wedge_indices.shape == corners.shape
+        assert len(wedges) <= psk_arrays.wedge_count
+        assert np.array_equal(wedges['point_index'][wedge_indices], point_indices)
+        assert np.array_equal(wedges['u'][wedge_indices], uvs[..., 0])
+        assert np.array_equal(wedges['v'][wedge_indices], uvs[..., 1])
+        assert np.array_equal(wedges['material_index'][wedge_indices], material_indices)
+
+        # Snapping to a coarse grid can only merge more wedges.
+        welded, _ = weld_wedges(point_indices, uvs, psk_arrays.face_material_indices, uv_tolerance=1e-3)
+        assert len(welded) <= len(wedges)
+
+        # The welded wedges and faces can be written out directly.
+        psk = psk_arrays.to_psk()
+        psk.wedges = wedges
+        psk.faces = create_face_array(wedge_indices, psk_arrays.face_material_indices, psk_arrays.face_smoothing_groups)
+        fp = BytesIO()
+        write_psk(psk, fp)
+        fp.seek(0)
+        output = read_psk(fp)
+        assert len(output.wedges) == len(wedges)
+        assert [tuple(f.wedge_indices) for f in output.faces] == [tuple(i) for i in wedge_indices.tolist()]
+
+    # Material indices that would wrap around in the 8-bit face field are rejected.
+    with pytest.raises(ValueError):
+        create_face_array(np.zeros((2, 3), dtype=np.uint32), [0, 256])
+
+
+def test_psk_reader_lazy_sections():
+    from glob import glob
+    from psk_psa_py.psk.reader import PskReader
+
+    test_data_directory = './tests/data/psk'
+    for filename in glob('*.psk', root_dir=test_data_directory):
+        path = str(Path(test_data_directory) / filename)
+        psk = read_psk_from_file(path)
+        with PskReader(path) as psk_reader:
+            assert psk_reader.point_count == len(psk.points)
+            assert psk_reader.wedge_count == len(psk.wedges)
+            assert psk_reader.face_count == len(psk.faces)
+            # Only the requested sections are decoded.
+            assert [b.name for b in psk_reader.bones] == [b.name for b in psk.bones]
+            assert [m.name for m in psk_reader.materials] == [m.name for m in psk.materials]
+            assert set(psk_reader._cache.keys()) == {b'REFSKELT', b'MATT0000'}
+
+            output = psk_reader.read_psk()
+            assert list(output.points) == list(psk.points)
+            assert [(w.point_index, w.u, w.v, w.material_index) for w in output.wedges] == \
+                   [(w.point_index, w.u, w.v, w.material_index) for w in psk.wedges]
+            assert [tuple(f.wedge_indices) for f in output.faces] == [tuple(f.wedge_indices) for f in psk.faces]
+            assert list(output.weights) == list(psk.weights)
+            assert [list(u) for u in output.extra_uvs] == [list(u) for u in psk.extra_uvs]
+            assert list(output.vertex_colors) == list(psk.vertex_colors)
+            assert list(output.morph_data) == list(psk.morph_data)
+            assert output.material_references == psk.material_references
+
+
+def test_psk_skinning():
+    import numpy as np
+    from psk_psa_py.psa.pose import bones_to_data_matrix
+    from psk_psa_py.psa.reader import PsaReader
+    from psk_psa_py.psk.skinning import Skinner
+
+    psk = read_psk_from_file('./tests/data/psk/carlos_head_carlos.psk')
+    skinner = Skinner.from_psk(psk)
+    points = np.array([tuple(point) for point in psk.points])
+
+    # The reference pose leaves the mesh where it is.
+    reference_pose = bones_to_data_matrix(psk.bones)[np.newaxis]
+    assert np.allclose(skinner.deform(reference_pose, dtype=np.float64)[0], points, atol=1e-3)
+
+    with PsaReader('./tests/data/psa/Carlos_StrafeLF90_2.psa') as psa_reader:
+        sequence_name = next(iter(psa_reader.sequences.keys()))
+        matrix = psa_reader.read_sequence_data_matrix(sequence_name, frames=slice(0, 5))
+        psa_bones = psa_reader.bones
+
+    positions = skinner.deform(matrix, psa_bones)
+    assert positions.shape == (5, len(points), 3)
+    assert positions.dtype == np.float32
+    assert np.allclose(skinner.deform(matrix, psa_bones, frame_chunk_size=2), positions)
+
+    # Compare a few points against blending their bones' transforms one weight at a time.
+    skinning_matrices = skinner.get_skinning_matrices(matrix, psa_bones)
+    weights = [(w.point_index, w.bone_index, w.weight) for w in psk.weights]
+    for point_index in np.linspace(0, len(points) - 1, 10).astype(int):
+        point_weights = [(bone_index, weight) for i, bone_index, weight in weights if i == point_index]
+        if not point_weights:
+            continue
+        total = sum(weight for _, weight in point_weights)
+        expected = sum(weight / total * (skinning_matrices[:, bone_index, :, 0:3] @ points[point_index] + skinning_matrices[:, bone_index, :, 3])
+                       for bone_index, weight in point_weights)
+        assert np.allclose(positions[:, point_index], expected, atol=1e-3)
+
+
+def test_psk_skinning_zero_weights():
+    import numpy as np
+    from psk_psa_py.psa.pose import bones_to_data_matrix
+    from psk_psa_py.psk.skinning import Skinner
+    from psk_psa_py.synthetic import generate_bones
+
+    bones = generate_bones(2)
+    points = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0], [7.0, 8.0, 9.0]])
+    # Point 0 has weights that add up to zero, point 1 is fully weighted to bone 1 and point 2 has no weights.
+    skinner = Skinner(points, bones, [0, 0, 1], [0, 1, 1], [0.0, 0.0, 1.0])
+    matrix = bones_to_data_matrix(bones)[np.newaxis].copy()
+    matrix[:, :, 4:7] += 10.0
+    positions = skinner.deform(matrix, dtype=np.float64)
+    assert np.array_equal(positions[0, 0], points[0])
+    assert np.array_equal(positions[0, 2], points[2])
+    assert not np.allclose(positions[0, 1], points[1])
+
+
+def test_psk_bounds():
+    import numpy as np
+    from psk_psa_py.psa.reader import PsaReader
+    from psk_psa_py.psk.bounds import compute_bone_bounds, iter_sequence_bounds
+    from psk_psa_py.psk.skinning import Skinner
+
+    skinner = Skinner.from_psk(read_psk_from_file('./tests/data/psk/carlos_head_carlos.psk'))
+    bone_bounds = compute_bone_bounds(skinner)
+    assert bone_bounds.shape == (len(skinner.bones), 2, 3)
+    is_influencing = np.isin(np.arange(len(skinner.bones)), skinner.weight_bone_indices)
+    assert (~np.isnan(bone_bounds[:, 0, 0]) == is_influencing).all()
+    assert (bone_bounds[is_influencing, 0] <= bone_bounds[is_influencing, 1]).all()
+
+    with PsaReader('./tests/data/psa/Carlos_StrafeLF90_2.psa') as psa_reader:
+        exact = list(iter_sequence_bounds(skinner, psa_reader, frame_chunk_size=7))
+        conservative = list(iter_sequence_bounds(skinner, psa_reader, conservative=True))
+        sequence_name = exact[0].sequence_name
+        positions = skinner.deform(psa_reader.read_sequence_data_matrix(sequence_name), psa_reader.bones, dtype=np.float64)
+
+    assert [b.sequence_name for b in exact] == list(psa_reader.sequences.keys())
+    assert np.allclose(exact[0].frame_bounds[:, 0], positions.min(axis=1))
+    assert np.allclose(exact[0].frame_bounds[:, 1], positions.max(axis=1))
+    assert np.allclose(exact[0].bounds, [positions.min(axis=(0, 1)), positions.max(axis=(0, 1))])
+    # The conservative bounds contain the exact ones.
+    for e, c in zip(exact, conservative):
+        assert (c.frame_bounds[:, 0] <= e.frame_bounds[:, 0] + 1e-3).all()
+        assert (c.frame_bounds[:, 1] >= e.frame_bounds[:, 1] - 1e-3).all()
+
+
+def test_psk_synthetic():
+    import numpy as np
+    from psk_psa_py.psk.reader import read_psk_arrays
+    from psk_psa_py.synthetic import generate_psk_arrays
+
+    psk_arrays = generate_psk_arrays(500, 800, 300, bone_count=8, material_count=3, extra_uv_count=2, morph_count=2,
+                                     has_vertex_colors=True, has_vertex_normals=True, seed=1)
+    same_psk_arrays = generate_psk_arrays(500, 800, 300, bone_count=8, material_count=3, extra_uv_count=2, morph_count=2,
+                                          has_vertex_colors=True, has_vertex_normals=True, seed=1)
+    for use_32bit_formats in (False, True):
+        fp = BytesIO()
+        write_psk_arrays(psk_arrays, fp, is_extended_format=True, use_32bit_formats=use_32bit_formats)
+        same_fp = BytesIO()
+        write_psk_arrays(same_psk_arrays, same_fp, is_extended_format=True, use_32bit_formats=use_32bit_formats)
+        assert fp.getvalue() == same_fp.getvalue()
+
+        fp.seek(0)
+        psk = read_psk(fp)
+        assert len(psk.points) == 500
+        assert len(psk.wedges) == 800
+        assert len(psk.faces) == 300
+        assert len(psk.bones) == 8
+        assert len(psk.extra_uvs) == 2
+        assert len(psk.morph_infos) == 2
+        fp.seek(0)
+        output = read_psk_arrays(fp)
+        assert (output.face_wedge_indices == psk_arrays.face_wedge_indices).all()
+        assert (output.wedge_point_indices == psk_arrays.wedge_point_indices).all()
+        assert np.allclose(output.morph_position_deltas, psk_arrays.morph_position_deltas)
+
+    # A full 16-bit wedge range still uses the 16-bit sections.
+    fp = BytesIO()
+    write_psk_arrays(generate_psk_arrays(16, 65536, 16), fp)
+    assert b'FACE0000' in fp.getvalue() and b'FACE3200' not in fp.getvalue()
+
+
+def test_psk_section_observer():
+    from psk_psa_py.shared.profiling import SectionStatsCollector
+
+    path = './tests/data/psk/Suzanne.psk'
+    collector = SectionStatsCollector()
+    psk = read_psk_from_file(path, observer=collector)
+    names = [event.name for event in collector.events]
+    assert names[0] == b'ACTRHEAD'
+    assert b'PNTS0000' in names
+    points = next(event for event in collector.events if event.name == b'PNTS0000')
+    assert points.operation == 'read'
+    assert points.data_count == len(psk.points)
+    assert points.data_length == len(psk.points) * 12
+    with open(path, 'rb') as fp:
+        fp.seek(points.offset)
+        assert fp.read(12) == bytes(psk.points[0])
+
+    collector.clear()
+    fp = BytesIO()
+    write_psk(psk, fp, observer=collector)
+    assert sum(event.data_length for event in collector.events) + 32 * len(collector.events) == len(fp.getvalue())
+    summary = collector.summary()
+    assert summary[('write', b'PNTS0000')].data_count == len(psk.points)
+    assert 'PNTS0000' in collector.report()
+
+
+def test_psk_file_cache(tmp_path):
+    import os
+    import shutil
+    import numpy as np
+    from psk_psa_py.shared.file_cache import FileCache
+
+    path = tmp_path / 'Suzanne.psk'
+    shutil.copyfile('./tests/data/psk/Suzanne.psk', path)
+    cache = FileCache(tmp_path / 'cache')
+    expected = read_psk_arrays_from_file(path, cache=cache)
+    assert (cache.hits, cache.misses) == (0, 1)
+    cached = read_psk_arrays_from_file(path, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert isinstance(cached.points, np.memmap)
+    assert not cached.points.flags.writeable
+    assert np.array_equal(cached.points, expected.points)
+    assert np.array_equal(cached.face_wedge_indices, expected.face_wedge_indices)
+    assert [bytes(bone) for bone in cached.bones] == [bytes(bone) for bone in expected.bones]
+    assert [bytes(material) for material in cached.materials] == [bytes(material) for material in expected.materials]
+    psk = read_psk_from_file(path, cache=cache)
+    assert len(psk.wedges) == expected.wedge_count
+
+    # Changing the file invalidates its entry, which is replaced rather than kept alongside the new one.
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    read_psk_arrays_from_file(path, cache=cache)
+    assert cache.misses == 2
+    assert len(list((tmp_path / 'cache').glob('*/*'))) == 1
+
+    cache.evict(0)
+    assert cache.size_bytes == 0
+
+    # Data parsed from an earlier version of the file is not stored under the key of the current one.
+    key = cache.get_key(path, 'psk')
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+    assert not cache.store(path, 'psk', {'points': expected.points}, key=key)
+    assert cache.load(path, 'psk') is None
+
+    # Once the cache outgrows its budget, the least recently used entries are evicted.
+    entry_size = 1 << 16
+    cache = FileCache(tmp_path / 'budget_cache', max_bytes=entry_size * 4)
+    for i in range(8):
+        source_path = tmp_path / f'{i}.bin'
+        source_path.write_bytes(b'')
+        cache.store(source_path, 'test', {'data': np.zeros(entry_size, dtype=np.uint8)})
+        assert cache.size_bytes <= cache.max_bytes
+    assert cache.load(tmp_path / '7.bin', 'test') is not None
+    assert cache.load(tmp_path / '0.bin', 'test') is None
+
+
+def test_load_psk_arrays_batch(tmp_path):
+    import numpy as np
+    from psk_psa_py.batch import load_psk_arrays_batch
+
+    corrupt_path = tmp_path / 'corrupt.psk'
+    corrupt_path.write_bytes(b'ACTRHEAD')
+    paths = ['./tests/data/psk/S*.psk', corrupt_path]
+    results = load_psk_arrays_batch(paths, max_workers=2)
+    assert [Path(result.path).name for result in results] == ['Shrek.psk', 'Slurp_Monster_Axe_LOD0.psk', 'Suzanne.psk', 'corrupt.psk']
+    for result in results[:3]:
+        assert result.is_ok
+        expected = read_psk_arrays_from_file(result.path)
+        assert np.array_equal(result.value.points, expected.points)
+        assert np.array_equal(result.value.face_wedge_indices, expected.face_wedge_indices)
+        assert len(result.value.extra_uvs) == len(expected.extra_uvs)
+        assert [bytes(bone) for bone in result.value.bones] == [bytes(bone) for bone in expected.bones]
+        assert result.value.material_references == expected.material_references
+    assert not results[3].is_ok
+    assert results[3].value is None
+
+
+def test_read_psk_async():
+    import asyncio
+    import numpy as np
+    from psk_psa_py.psk.reader import read_psk_async, read_psk_arrays_async
+    from psk_psa_py.shared.aio import ReadLimiter
+
+    paths = ['./tests/data/psk/Suzanne.psk', './tests/data/psk/Shrek.psk', './tests/data/psk/Bat.psk']
+
+    async def main():
+        limiter = ReadLimiter(max_reads=2, max_bytes=1)
+        psks = await asyncio.gather(*(read_psk_async(path, limiter=limiter) for path in paths))
+        psk_arrays = await read_psk_arrays_async(paths[0])
+        assert (limiter.reads, limiter.bytes) == (0, 0)
+        return psks, psk_arrays
+
+    psks, psk_arrays = asyncio.run(main())
+    for path, psk in zip(paths, psks):
+        expected = read_psk_from_file(path)
+        assert [bytes(point) for point in psk.points] == [bytes(point) for point in expected.points]
+    assert np.array_equal(psk_arrays.points, read_psk_arrays_from_file(paths[0]).points)
+
+
+class _ForwardOnlyStream(object):
+    # A stream that returns short reads and cannot seek or report its position, like a pipe or a socket.
+
+    def __init__(self, data: bytes, chunk_size: int = 1000):
+        self.data = data
+        self.position = 0
+        self.chunk_size = chunk_size
+
+    def read(self, size: int = -1) -> bytes:
+        size = self.chunk_size if size < 0 else min(size, self.chunk_size)
+        chunk = self.data[self.position:self.position + size]
+        self.position += len(chunk)
+        return chunk
+
+
+def test_read_psk_from_streams(tmp_path):
+    import gzip
+    import zipfile
+    import numpy as np
+    import pytest
+    from psk_psa_py.psk.reader import read_psk_arrays
+
+    path = './tests/data/psk/Slurp_Monster_Axe_LOD0.psk'
+    data = Path(path).read_bytes()
+    expected = read_psk_arrays_from_file(path)
+
+    def assert_matches(psk_arrays):
+        assert np.array_equal(psk_arrays.points, expected.points)
+        assert np.array_equal(psk_arrays.face_wedge_indices, expected.face_wedge_indices)
+        assert np.array_equal(psk_arrays.extra_uvs[0], expected.extra_uvs[0])
+
+    assert_matches(read_psk_arrays(_ForwardOnlyStream(data)))
+    psk = read_psk(_ForwardOnlyStream(data))
+    assert len(psk.wedges) == expected.wedge_count
+
+    archive_path = tmp_path / 'assets.zip'
+    with zipfile.ZipFile(archive_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('Axe.psk', data)
+    with zipfile.ZipFile(archive_path) as archive, archive.open('Axe.psk') as fp:
+        assert_matches(read_psk_arrays(fp))
+    with gzip.open(BytesIO(gzip.compress(data))) as fp:
+        assert_matches(read_psk_arrays(fp))
+
+    with pytest.raises(EOFError):
+        read_psk_arrays(_ForwardOnlyStream(data[:-10]))
+
+
+def test_write_psk_32bit_formats():
+    import numpy as np
+    import pytest
+    from psk_psa_py.psk.reader import read_psk_arrays
+    from psk_psa_py.shared.profiling import SectionStatsCollector
+    from psk_psa_py.synthetic import generate_psk_arrays
+
+    psk_arrays = generate_psk_arrays(point_count=1000, wedge_count=70000, face_count=2000, material_count=2)
+    collector = SectionStatsCollector()
+    fp = BytesIO()
+    write_psk_arrays(psk_arrays, fp, observer=collector)
+    assert [event.name for event in collector.events if event.name.startswith(b'FACE')] == [b'FACE3200']
+    fp.seek(0)
+    output = read_psk_arrays(fp)
+    assert np.array_equal(output.face_wedge_indices, psk_arrays.face_wedge_indices)
+    assert np.array_equal(output.wedge_point_indices, psk_arrays.wedge_point_indices)
+
+    with pytest.raises(RuntimeError):
+        write_psk_arrays(psk_arrays, BytesIO(), use_32bit_formats=False)
+
+    # Small meshes still use the 16-bit formats unless asked otherwise.
+    psk = read_psk_from_file('./tests/data/psk/Suzanne.psk')
+    collector.clear()
+    write_psk(psk, BytesIO(), observer=collector)
+    assert b'FACE0000' in [event.name for event in collector.events]
+    fp = BytesIO()
+    write_psk(psk, fp, use_32bit_formats=True)
+    fp.seek(0)
+    output = read_psk(fp)
+    assert [tuple(face.wedge_indices) for face in output.faces] == [tuple(face.wedge_indices) for face in psk.faces]
+
+
+def test_split_psk_arrays():
+    import numpy as np
+    from psk_psa_py.psk.partition import split_psk_arrays
+    from psk_psa_py.synthetic import generate_psk_arrays
+
+    psk_arrays = generate_psk_arrays(point_count=2000, wedge_count=3000, face_count=4000, bone_count=4,
+                                     material_count=3, extra_uv_count=1, morph_count=2, has_vertex_normals=True)
+    for by_material in (True, False):
+        chunks = split_psk_arrays(psk_arrays, max_wedge_count=1000, by_material=by_material)
+        assert len(chunks) > 1
+        assert sum(chunk.face_count for chunk in chunks) == psk_arrays.face_count
+        assert sum(len(chunk.morph_point_indices) for chunk in chunks) >= len(psk_arrays.morph_point_indices)
+        for chunk in chunks:
+            assert chunk.wedge_count <= 1000
+            # Every face corner still refers to the same position, UV and extra UV.
+            positions = chunk.points[chunk.wedge_point_indices[chunk.face_wedge_indices]]
+            assert positions.shape == (chunk.face_count, 3, 3)
+            assert chunk.face_wedge_indices.max() < chunk.wedge_count
+            assert chunk.wedge_point_indices.max() < chunk.point_count
+            assert len(chunk.extra_uvs[0]) == chunk.wedge_count
+            assert len(chunk.vertex_normals) == chunk.point_count
+            assert sum(morph_info.vertex_count for morph_info in chunk.morph_infos) == len(chunk.morph_point_indices)
+            assert np.array_equal(np.unique(chunk.weight_point_indices), np.arange(chunk.point_count))
+        # Reassembling the corners of all chunks gives back the corners of the mesh.
+        expected = np.sort(psk_arrays.points[psk_arrays.wedge_point_indices[psk_arrays.face_wedge_indices]].reshape(-1, 9), axis=0)
+        actual = np.sort(np.concatenate([chunk.points[chunk.wedge_point_indices[chunk.face_wedge_indices]].reshape(-1, 9)
+                                         for chunk in chunks]), axis=0)
+        assert np.array_equal(actual, expected)
+
+
+def test_compute_corner_normals():
+    import numpy as np
+    from psk_psa_py.psk.normals import compute_corner_normals
+
+    # A cube, with two triangles per side.
+    points = np.array([[x, y, z] for x in (-1.0, 1.0) for y in (-1.0, 1.0) for z in (-1.0, 1.0)])
+    quads = [[0, 1, 3, 2], [4, 6, 7, 5], [0, 4, 5, 1], [2, 3, 7, 6], [0, 2, 6, 4], [1, 5, 7, 3]]
+    face_point_indices = np.array([[a, b, c] for a, b, c, d in quads] + [[a, c, d] for a, b, c, d in quads])
+    face_normals = np.cross(points[face_point_indices[:, 1]] - points[face_point_indices[:, 0]],
+                            points[face_point_indices[:, 2]] - points[face_point_indices[:, 0]])
+    face_normals /= np.linalg.norm(face_normals, axis=1, keepdims=True)
+
+    # Smooth shading points every corner away from the center of the cube.
+    normals = compute_corner_normals(points, face_point_indices, np.ones(12, dtype=np.int32))
+    assert np.allclose(normals, points[face_point_indices] / np.sqrt(3.0))
+    assert np.allclose(compute_corner_normals(points, face_point_indices), normals)
+
+    # A smoothing group per side, or none at all, gives the face normals.
+    sides = np.tile(np.arange(6), 2)
+    for smoothing_groups in (1 << sides, np.zeros(12, dtype=np.int32)):
+        normals = compute_corner_normals(points, face_point_indices, smoothing_groups)
+        assert np.allclose(normals, face_normals[:, np.newaxis])
+
+    # Check mixed smoothing groups against a direct per-corner sum.
+    rng = np.random.default_rng(0)
+    smoothing_groups = rng.choice([0, 1, 2, 3, 4, 6], 12).astype(np.int32)
+    for weighting in ('area', 'angle', 'uniform'):
+        normals = compute_corner_normals(points, face_point_indices, smoothing_groups, weighting)
+        corners = points[face_point_indices]
+        for f in range(12):
+            for c in range(3):
+                total = np.zeros(3)
+                for g in range(12):
+                    for d in range(3):
+                        if face_point_indices[g, d] != face_point_indices[f, c]:
+                            continue
+                        if g != f and (smoothing_groups[f] & smoothing_groups[g]) == 0:
+                            continue
+                        if weighting == 'area':
+                            weight = np.linalg.norm(np.cross(corners[g, 1] - corners[g, 0], corners[g, 2] - corners[g, 0]))
+                        elif weighting == 'angle':
+                            a = corners[g, (d + 1) % 3] - corners[g, d]
+                            b = corners[g, (d + 2) % 3] - corners[g, d]
+                            weight = np.arccos(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+                        else:
+                            weight = 1.0
+                        total += weight * face_normals[g]
+                assert np.allclose(normals[f, c], total / np.linalg.norm(total))
+
+
+def test_generate_vertex_normals():
+    import numpy as np
+    from psk_psa_py.psk.normals import compute_wedge_normals, generate_vertex_normals
+
+    psk = read_psk_from_file('./tests/data/psk/Suzanne.psk')
+    assert not psk.has_vertex_normals
+    assert generate_vertex_normals(psk)
+    assert not generate_vertex_normals(psk)
+    assert len(psk.vertex_normals) == len(psk.points)
+
+    fp = BytesIO()
+    write_psk(psk, fp, is_extended_format=True)
+    fp.seek(0)
+    output = read_psk(fp)
+    normals = np.array([[normal.x, normal.y, normal.z] for normal in output.vertex_normals])
+    assert np.allclose(np.linalg.norm(normals, axis=1), 1.0, atol=1e-5)
+
+    psk_arrays = PskArrays.from_psk(psk)
+    psk_arrays.vertex_normals = np.empty((0, 3), dtype=np.float32)
+    assert generate_vertex_normals(psk_arrays)
+    assert np.allclose(psk_arrays.vertex_normals, normals)
+
+    # Suzanne has hard edges, so some wedges of the same point have different normals.
+    wedge_normals = compute_wedge_normals(psk_arrays)
+    assert np.allclose(np.linalg.norm(wedge_normals, axis=1), 1.0)
+    smooth_wedge_normals = compute_wedge_normals(psk_arrays, use_smoothing_groups=False)
+    assert not np.allclose(wedge_normals, smooth_wedge_normals)
+    assert np.allclose(smooth_wedge_normals, normals[psk_arrays.wedge_point_indices], atol=1e-5)